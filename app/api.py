@@ -1,21 +1,48 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
+from datetime import datetime, timedelta, timezone
+import math
 import os
 from dotenv import load_dotenv
 import sys
-from sqlalchemy.orm import Session
+import threading
+import time
+import uuid
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, generate_latest
+from sqlalchemy.ext.asyncio import AsyncSession
 
 base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 sys.path.append(base_dir)
 
-from app.core.database import get_db
+from app.core.config import config
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.core.log import get_logger, request_id
+from app.core.metrics import HTTP_REQUEST_SECONDS, init_sentry
+from app.core.responses import CompressionMiddleware, FastJSONResponse, etag_matches
+from app.models.malt_profile import ProfileStatus
 from app.services.profile_service import ProfileService
+from app.services.batch_service import CHUNK_SIZE, BatchPlan, BatchService, read_urls
+from app.services.export_service import ExportService
+from app.services.browser_supervisor import browser_supervisor
+from app.services.scrape_queue import scrape_queue
+from app.services.profile_cache import cache_headers, profile_cache
+from app.services.recrawl_scheduler import recrawl_scheduler
+from app.services.retry_scheduler import retry_scheduler
+from app.services.search_service import SearchService
+from app.services.worker_service import WorkerService
+from app.services.rate_limiter import scrape_throttle
+from app.services.shared_rate_limiter import share_rate_limits
 
 # Load environment variables
 load_dotenv()
 
+# Before the app is created, so Sentry instruments it
+init_sentry()
+logger = get_logger("malt.api")
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Malt Scraper API",
@@ -24,6 +51,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
 # Configure CORS
@@ -34,6 +62,74 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Tag the request with an ID, time it and log it as a JSON line."""
+    token = request_id.set(request.headers.get("X-Request-ID") or uuid.uuid4().hex)
+    started_at = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id.get()
+        return response
+    finally:
+        duration = time.perf_counter() - started_at
+        # Label by route template, not by path, to bound cardinality
+        route = request.scope.get("route")
+        route = route.path if route else "unmatched"
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method, route=route, status=status
+        ).observe(duration)
+        logger.info(
+            "request",
+            extra={
+                "fields": {
+                    "event": "request",
+                    "method": request.method,
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 1),
+                }
+            },
+        )
+        request_id.reset(token)
+
+
+Gauge("malt_scrape_jobs_pending", "Scrape jobs queued or running").set_function(
+    lambda: scrape_queue.pending
+)
+Gauge("malt_scrape_concurrency_limit", "Adaptive scrape concurrency").set_function(
+    lambda: scrape_throttle.concurrency.limit
+)
+Gauge("malt_recrawl_due", "Profiles due for a recrawl").set_function(
+    lambda: recrawl_scheduler.stats()["due"] or 0
+)
+Gauge("malt_recrawl_lag_seconds", "Overdue time of the oldest profile").set_function(
+    lambda: recrawl_scheduler.stats()["lag_seconds"] or 0
+)
+
+
+def _browsers_in_use() -> int:
+    # Reading the pool must not load the browser stack into the API
+    browser_pool = sys.modules.get("app.services.browser_pool")
+    if browser_pool is None:
+        return 0
+    return browser_pool.get_browser_pool(headless=False).stats()["in_use"]
+
+
+Gauge("malt_browsers_in_use", "Pooled browsers checked out").set_function(
+    _browsers_in_use
+)
+Gauge("malt_browser_processes", "Chrome processes of pooled browsers").set_function(
+    lambda: browser_supervisor.stats()["processes"]
+)
+Gauge("malt_browser_rss_bytes", "Resident memory of pooled browsers").set_function(
+    lambda: browser_supervisor.stats()["rss_bytes"]
+)
 
 
 # Response models
@@ -51,6 +147,117 @@ class ErrorResponse(BaseResponse):
     details: Optional[Dict[str, Any]] = None
 
 
+class Language(BaseModel):
+    name: str
+    level: Optional[str] = None
+
+
+class Certification(BaseModel):
+    name: str
+    date: Optional[str] = None
+    description: Optional[str] = None
+
+
+class ProfileData(BaseModel):
+    profile_id: str
+    fullname: Optional[str] = None
+    title: Optional[str] = None
+    experience_years: Optional[str] = None
+    categories: Optional[List[str]] = None
+    daily_rate: Optional[str] = None
+    daily_rate_eur: Optional[int] = None
+    image_url: Optional[str] = None
+    profile_url: Optional[str] = None
+    location: Optional[str] = None
+    work_locations: Optional[List[str]] = None
+    top_skills: Optional[List[str]] = None
+    response_rate: Optional[str] = None
+    languages: Optional[List[Language]] = None
+    availability: Optional[str] = None
+    missions_count: Optional[int] = None
+    description: Optional[str] = None
+    education: Optional[List[Dict[str, Any]]] = None
+    experience: Optional[List[Dict[str, Any]]] = None
+    certifications: Optional[List[Certification]] = None
+    status: ProfileStatus
+    content_hash: Optional[str] = None
+    last_scraped_at: Optional[datetime] = None
+
+
+class JobData(BaseModel):
+    job_id: str
+    profile_id: str
+    status: ProfileStatus
+    attempt_count: int
+    next_retry_at: Optional[datetime] = None
+    last_error_kind: Optional[str] = None
+    profile: Optional[ProfileData] = None
+
+
+class ProfileResponse(BaseResponse):
+    data: ProfileData
+
+
+class JobResponse(BaseResponse):
+    data: JobData
+
+
+@app.on_event("startup")
+def start_browser_supervisor():
+    """Kill Chrome processes left by a previous run, then watch new ones."""
+    if not scrape_queue.remote:
+        browser_supervisor.start()
+
+
+@app.on_event("startup")
+def warm_up_browser_pool():
+    """Start the minimum number of pooled browsers in the background.
+
+    The browser stack is imported there too, so it does not delay startup.
+    API processes that leave scraping to workers never load it.
+    """
+    if scrape_queue.remote:
+        return
+
+    def warm_up():
+        from app.services.browser_pool import get_browser_pool
+
+        get_browser_pool(headless=False).warm_up()
+
+    threading.Thread(target=warm_up, daemon=True).start()
+
+
+@app.on_event("startup")
+async def share_scrape_rate_limits():
+    """Pace hosts together with the workers and the other API processes."""
+    share_rate_limits(scrape_throttle.limiter)
+
+
+@app.on_event("startup")
+def start_retry_scheduler():
+    """Retry failed scrapes once their backoff is over, resume abandoned jobs.
+
+    Scrape workers lease due retries and TODO jobs themselves.
+    """
+    if not scrape_queue.remote:
+        retry_scheduler.start()
+
+
+@app.on_event("startup")
+def start_recrawl_scheduler():
+    """Scrape profiles past `RECRAWL_TTL` again, within the hourly budget."""
+    if config.RECRAWL_ENABLED:
+        recrawl_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_scrape_queue():
+    browser_supervisor.stop()
+    recrawl_scheduler.stop()
+    retry_scheduler.stop()
+    scrape_queue.shutdown()
+
+
 # Routes
 @app.get("/api/health", response_model=SuccessResponse)
 async def health_check():
@@ -58,10 +265,21 @@ async def health_check():
     return SuccessResponse(
         status=True,
         message="Service is healthy",
-        data={"timestamp": "2025-02-23T16:12:28Z"},
+        data={
+            "timestamp": "2025-02-23T16:12:28Z",
+            "cache": profile_cache.snapshot(),
+            "throttle": scrape_throttle.stats(),
+            "browsers": browser_supervisor.stats(),
+        },
     )
 
 
+@app.get("/api/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/", response_model=SuccessResponse)
 async def root():
     """Root endpoint."""
@@ -70,17 +288,348 @@ async def root():
     )
 
 
-@app.get("/api/profile", response_model=SuccessResponse)
-async def profile(url: str, db: Session = Depends(get_db)):
+@app.get(
+    "/api/profile",
+    responses={
+        200: {"model": ProfileResponse},
+        202: {"model": JobResponse},
+        304: {"description": "Not modified"},
+        503: {"model": ErrorResponse},
+    },
+)
+async def profile(
+    url: str,
+    request: Request,
+    max_age: Optional[int] = Query(None, ge=0),
+    force: bool = False,
+    screenshot: Optional[bool] = None,
+    engine: Optional[Literal["browser", "http"]] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Return a stored profile, or queue its scrape and return the job.
+
+    Profiles older than `max_age` seconds (default `PROFILE_TTL`) are served
+    stale while a refresh is queued, `force` always queues a new scrape.
+    Profiles not found answer 404, failed ones answer 503 with `Retry-After`
+    until their scheduled retry unless forced.
+    `screenshot` forces a full page screenshot on or off for this scrape,
+    `engine` overrides the configured scrape engine.
+    Served profiles carry an ETag, `If-None-Match` answers 304 while the
+    profile is unchanged.
+    """
     try:
         service = ProfileService(db)
-        result = service.process_profile(url)
+        result = await service.lookup_profile(url, max_age=max_age, force=force)
+        if result["cache"] == "not_found":
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        if result["job_id"]:
+            scrape_queue.submit(result["job_id"], screenshot=screenshot, engine=engine)
+
+        if result["cache"] in ("hit", "stale"):
+            headers = {
+                "X-Cache": result["cache"].upper(),
+                **cache_headers(result["data"], result["cache"], max_age=max_age),
+            }
+            matched = etag_matches(
+                request.headers.get("If-None-Match"), headers["ETag"]
+            )
+            if matched:
+                return Response(status_code=304, headers={**headers, "ETag": matched})
+            # Encoded straight from the formatted row, the models document it
+            return FastJSONResponse(
+                {
+                    "status": True,
+                    "message": (
+                        "Profile found in database"
+                        if result["cache"] == "hit"
+                        else (
+                            "Stale profile served, refresh queued"
+                            if result["job_id"]
+                            else "Stale profile served"
+                        )
+                    ),
+                    "data": result["data"],
+                },
+                headers=headers,
+            )
+
+        if not result["job_id"]:
+            # Failed scrape, nothing is queued before its retry is due
+            failed = result["profile"]
+            retry_in = (
+                failed.next_retry_at - datetime.now(timezone.utc)
+            ).total_seconds()
+            return FastJSONResponse(
+                {
+                    "status": False,
+                    "message": "Profile scrape failed, retry scheduled",
+                    "error": failed.last_error_kind or "error",
+                    "details": service.format_job_response(failed),
+                },
+                status_code=503,
+                headers={
+                    "Retry-After": str(max(math.ceil(retry_in), 1)),
+                    "Cache-Control": "no-store",
+                },
+            )
 
-        return SuccessResponse(
-            status=True, message=result["message"], data=result["data"]
+        return FastJSONResponse(
+            {
+                "status": True,
+                "message": "Profile scrape queued",
+                "data": service.format_job_response(result["profile"]),
+            },
+            status_code=202,
+            headers={"X-Cache": result["cache"].upper(), "Cache-Control": "no-store"},
         )
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/profiles/changes", response_model=SuccessResponse)
+async def profile_changes(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    profile_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """List profile field changes recorded after the change ID `after`.
+
+    Consumers pull deltas by passing the returned `next` as `after`.
+    """
+    service = ProfileService(db)
+    changes = await service.get_changes(after=after, limit=limit, profile_id=profile_id)
+    return SuccessResponse(
+        status=True,
+        message=f"{len(changes)} profile changes",
+        data={
+            "changes": [service.format_change_response(c) for c in changes],
+            "next": changes[-1].id if changes else after,
+        },
+    )
+
+
+@app.get("/api/workers", response_model=SuccessResponse)
+async def workers(
+    since: int = Query(3600, ge=0, description="Seconds since the last heartbeat"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Scrape workers seen recently, their throughput and the lease counts."""
+    service = WorkerService(db)
+    found = await service.list_workers(timedelta(seconds=since))
+    return SuccessResponse(
+        status=True,
+        message=f"{len(found)} scrape workers",
+        data={
+            "execution": config.SCRAPE_EXECUTION,
+            "workers": [service.format_worker_response(w) for w in found],
+            **await service.lease_counts(),
+        },
+    )
+
+
+@app.get("/api/recrawl", response_model=SuccessResponse)
+async def recrawl():
+    """Recrawl scheduler backlog, lag and budget."""
+    return SuccessResponse(
+        status=True, message="Recrawl status", data=recrawl_scheduler.stats()
+    )
+
+
+@app.get("/api/profiles/search", response_model=SuccessResponse)
+async def search_profiles(
+    skill: List[str] = Query([]),
+    category: List[str] = Query([]),
+    language: List[str] = Query([]),
+    location: Optional[str] = None,
+    availability: Optional[str] = None,
+    min_rate: Optional[int] = Query(None, ge=0),
+    max_rate: Optional[int] = Query(None, ge=0),
+    q: Optional[str] = None,
+    sort: Literal["recent", "rate_asc", "rate_desc"] = "recent",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Search scraped profiles by skill, category, language, location,
+    availability and daily rate in euros.
+
+    Repeated `skill`, `category` and `language` parameters must all match.
+    Pages are fetched by passing the returned `next` as `cursor`.
+    """
+    try:
+        profiles, next_cursor = await SearchService(db).search(
+            skills=skill,
+            categories=category,
+            languages=language,
+            location=location,
+            availability=availability,
+            min_rate=min_rate,
+            max_rate=max_rate,
+            q=q,
+            sort=sort,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    service = ProfileService(db)
+    return SuccessResponse(
+        status=True,
+        message=f"{len(profiles)} profiles",
+        data={
+            "profiles": [service.format_profile_response(p) for p in profiles],
+            "next": next_cursor,
+        },
+    )
+
+
+@app.get("/api/profiles/export")
+async def export_profiles(
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    compression: Optional[Literal["gzip", "zstd"]] = None,
+    changed_since: Optional[datetime] = None,
+    skill: List[str] = Query([]),
+    category: List[str] = Query([]),
+    language: List[str] = Query([]),
+    location: Optional[str] = None,
+    availability: Optional[str] = None,
+    min_rate: Optional[int] = Query(None, ge=0),
+    max_rate: Optional[int] = Query(None, ge=0),
+    q: Optional[str] = None,
+):
+    """Stream every scraped profile matching the search filters as a file.
+
+    `changed_since` keeps the profiles whose content changed since then.
+    Nothing is scraped, rows come straight from the database.
+    """
+    try:
+        ExportService.check_options(format, compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        # Own session, dependencies are closed before a streamed body is sent
+        async with AsyncSessionLocal() as db:
+            async for chunk in ExportService(db).export(
+                format=format,
+                compression=compression,
+                changed_since=changed_since,
+                skills=skill,
+                categories=category,
+                languages=language,
+                location=location,
+                availability=availability,
+                min_rate=min_rate,
+                max_rate=max_rate,
+                q=q,
+            ):
+                yield chunk
+
+    filename = ExportService.filename(format, compression)
+    return StreamingResponse(
+        body(),
+        media_type=ExportService.media_type(format, compression),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _request_lines(request: Request):
+    """Yield the lines of a streamed request body."""
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += chunk.decode("utf-8", errors="replace")
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def _request_line_chunks(request: Request, size: int = CHUNK_SIZE):
+    """Yield the lines of a streamed request body, `size` at a time."""
+    chunk = []
+    async for line in _request_lines(request):
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@app.post("/api/profiles/batch", status_code=202, response_model=SuccessResponse)
+async def profiles_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Queue scrapes for a list of profile URLs.
+
+    The body holds one URL per line, or one `{"url": ...}` JSON object per
+    line, it is registered and queued as it streams in. Already scraped and
+    duplicate profiles are skipped. Returns counts and the batch id, follow
+    the batch on `/api/batches/{batch_id}`.
+    """
+    service = BatchService(db)
+    plan = BatchPlan()
+    async for lines in _request_line_chunks(request):
+        for job_id, _ in await service.add(read_urls(lines), plan):
+            scrape_queue.submit(job_id)
+
+    return SuccessResponse(
+        status=True,
+        message=f"{plan.queued} profile scrapes queued",
+        data=plan.summary(),
+    )
+
+
+@app.get("/api/batches/{batch_id}", response_model=SuccessResponse)
+async def batch(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Count the profiles of a batch by status.
+
+    A profile counts for the last batch that queued it.
+    """
+    statuses = await BatchService(db).status(batch_id)
+    if not statuses:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return SuccessResponse(
+        status=True,
+        message="Batch status",
+        data={
+            "batch_id": batch_id,
+            "total": sum(statuses.values()),
+            "statuses": statuses,
+        },
+    )
+
+
+async def _load_job(job_id: str):
+    # A session per poll, so long-polls do not hold a connection
+    async with AsyncSessionLocal() as db:
+        service = ProfileService(db)
+        profile = await service.get_profile(job_id)
+        return service.format_job_response(profile) if profile else None
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def job(job_id: str, wait: float = Query(0, ge=0, le=60)):
+    """Return a scrape job state, waiting up to `wait` seconds for it to end."""
+    deadline = time.monotonic() + wait
+    while True:
+        data = await _load_job(job_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        remaining = deadline - time.monotonic()
+        if (
+            data["status"] not in (ProfileStatus.TODO, ProfileStatus.IN_PROGRESS)
+            or remaining <= 0
+        ):
+            return JobResponse(status=True, message="Job status", data=data)
+
+        # Poll the database at least every second for jobs run elsewhere
+        await scrape_queue.wait(job_id, min(remaining, 1.0))
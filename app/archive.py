@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(base_dir)
+
+from app.services.page_archive import page_archive
+from app.services.reextract_service import reextract
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archived profile pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Pages, profiles and sizes of the archive")
+
+    train = commands.add_parser(
+        "train", help="Train the compression dictionary of new pages"
+    )
+    train.add_argument("--samples", type=int, default=500, help="Pages sampled")
+    train.add_argument(
+        "--size", type=int, default=112640, help="Dictionary size in bytes"
+    )
+
+    extract = commands.add_parser(
+        "reextract", help="Extract profiles again from their last archived page"
+    )
+    extract.add_argument("profile_ids", nargs="*", help="Profile IDs, all if none")
+    extract.add_argument(
+        "--processes", type=int, help="Parser processes, defaults to the CPU count"
+    )
+    extract.add_argument(
+        "--batch-size", type=int, default=500, help="Results per bulk upsert"
+    )
+    extract.add_argument("--dry-run", action="store_true", help="Parse only")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(page_archive.stats(), indent=2))
+    elif args.command == "train":
+        dict_id = page_archive.train_dictionary(args.samples, args.size)
+        print(f"Dictionary {dict_id} trained, new pages are compressed with it")
+    else:
+        stats = asyncio.run(
+            reextract(
+                profile_ids=args.profile_ids or None,
+                processes=args.processes,
+                batch_size=args.batch_size,
+                dry_run=args.dry_run,
+            )
+        )
+        print("\nRe-extraction Results:")
+        print(json.dumps(stats, indent=2))
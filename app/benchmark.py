@@ -0,0 +1,408 @@
+"""Offline extraction benchmark.
+
+Replays saved profile pages (the `page_source.html` files scrapes leave in
+the workspace) through a local static server and measures extraction:
+
+    html        ExtractMaltHtml on the raw page, no browser
+    extract     ExtractMaltInfo.extract on an already loaded page
+    full        MaltScrapper.extract_profile_data, pool checkout included
+    throughput  the full path over N concurrent browsers
+
+Results are written as JSON, `--compare` diffs them against a previous run.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(base_dir)
+
+from app.core.config import config
+from app.services.browser_pool import BrowserPool
+from app.services.extract_malt_html import ExtractMaltHtml
+from app.services.extract_malt_info import ExtractMaltInfo
+from app.services.malt_scrapper import MaltScrapper
+
+MODES = ("html", "extract", "full", "throughput")
+
+# Scripts would call out to malt.fr, JSON-LD is data and is kept
+SCRIPT_PATTERN = re.compile(
+    r"<script(?![^>]*application/ld\+json)[^>]*>.*?</script>", re.I | re.S
+)
+
+
+def load_fixtures(path: str, strip_scripts: bool = True) -> Dict[str, str]:
+    """Load `<path>/<profile id>/page_source.html` pages by profile ID."""
+    fixtures = {}
+    for profile_id in sorted(os.listdir(path)):
+        page = os.path.join(path, profile_id, "page_source.html")
+        if not os.path.isfile(page):
+            continue
+        with open(page, encoding="utf-8") as f:
+            html = f.read()
+        fixtures[profile_id] = SCRIPT_PATTERN.sub("", html) if strip_scripts else html
+    return fixtures
+
+
+class FixtureServer:
+    """Serve fixtures at `/profile/<profile id>` from a background thread."""
+
+    def __init__(self, fixtures: Dict[str, str]):
+        pages = {
+            profile_id: html.encode("utf-8") for profile_id, html in fixtures.items()
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path.split("?")[0].rsplit("/", 1)[-1])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, profile_id: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/profile/{profile_id}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def count_round_trips(driver) -> Dict[str, int]:
+    """Count the WebDriver commands sent by a driver, CDP calls included.
+
+    Returns the counter of the driver, reset it by setting `count` to 0.
+    """
+    counter = getattr(driver, "_benchmark_counter", None)
+    if counter is None:
+        counter = {"count": 0}
+        execute = driver.execute
+
+        def counted(*args, **kwargs):
+            counter["count"] += 1
+            return execute(*args, **kwargs)
+
+        driver.execute = counted
+        driver._benchmark_counter = counter
+    return counter
+
+
+def browser_rss(driver) -> int:
+    """Resident memory in bytes of the browser and its child processes."""
+    pid = getattr(driver, "browser_pid", None) or driver.service.process.pid
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return 0
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate per profile samples into percentiles and means."""
+    ok = [s for s in samples if not s.get("error")]
+    summary: Dict[str, Any] = {
+        "profiles": len(samples),
+        "errors": len(samples) - len(ok),
+    }
+    if not ok:
+        return summary
+    wall = sorted(s["wall_ms"] for s in ok)
+    summary["wall_ms"] = {
+        "p50": round(statistics.median(wall), 1),
+        "p95": round(wall[min(len(wall) - 1, int(len(wall) * 0.95))], 1),
+        "mean": round(statistics.fmean(wall), 1),
+    }
+    if "round_trips" in ok[0]:
+        summary["round_trips"] = round(
+            statistics.fmean(s["round_trips"] for s in ok), 1
+        )
+    if "rss_mb" in ok[0]:
+        summary["browser_rss_mb"] = max(s["rss_mb"] for s in ok)
+    return summary
+
+
+def _timed(run: Callable[[], Any]) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    try:
+        run()
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {
+        "wall_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        "error": error,
+    }
+
+
+def bench_html(fixtures: Dict[str, str], repeat: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(repeat):
+        for profile_id, html in fixtures.items():
+            sample = _timed(
+                lambda: ExtractMaltHtml(
+                    html, f"https://www.malt.fr/profile/{profile_id}"
+                ).extract()
+            )
+            samples.append({"profile_id": profile_id, **sample})
+    return {"summary": summarize(samples), "samples": samples}
+
+
+def bench_extract(
+    fixtures: Dict[str, str], server: FixtureServer, pool: BrowserPool, repeat: int
+) -> Dict[str, Any]:
+    samples = []
+    session = pool.acquire()
+    try:
+        driver = session.driver
+        counter = count_round_trips(driver)
+        for _ in range(repeat):
+            for profile_id in fixtures:
+                driver.get(server.url(profile_id))
+                counter["count"] = 0
+                sample = _timed(lambda: ExtractMaltInfo(driver).extract())
+                samples.append(
+                    {
+                        "profile_id": profile_id,
+                        **sample,
+                        "round_trips": counter["count"],
+                        "rss_mb": round(browser_rss(driver) / 2**20, 1),
+                    }
+                )
+    finally:
+        pool.release(session)
+    return {"summary": summarize(samples), "samples": samples}
+
+
+def _scrape_full(url: str, pool: BrowserPool) -> Dict[str, Any]:
+    started_at = time.perf_counter()
+    scraper = MaltScrapper(headless=pool.headless, profil_url=url, pool=pool)
+    driver = scraper.driver
+    counter = count_round_trips(driver)
+    counter["count"] = 0
+    error = None
+    try:
+        scraper.extract_profile_data(screenshot=False)
+    except Exception as e:
+        error = str(e)
+    return {
+        "wall_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        "error": error,
+        "round_trips": counter["count"],
+        "rss_mb": round(browser_rss(driver) / 2**20, 1),
+    }
+
+
+def bench_full(
+    fixtures: Dict[str, str], server: FixtureServer, pool: BrowserPool, repeat: int
+) -> Dict[str, Any]:
+    samples = [
+        {"profile_id": profile_id, **_scrape_full(server.url(profile_id), pool)}
+        for _ in range(repeat)
+        for profile_id in fixtures
+    ]
+    return {"summary": summarize(samples), "samples": samples}
+
+
+def bench_throughput(
+    fixtures: Dict[str, str],
+    server: FixtureServer,
+    headless: bool,
+    workers: int,
+    repeat: int,
+) -> Dict[str, Any]:
+    urls = [server.url(profile_id) for _ in range(repeat) for profile_id in fixtures]
+    pool = BrowserPool(headless=headless, min_size=workers, max_size=workers)
+    try:
+        # Browser startup is measured by the full mode, not here
+        pool.warm_up()
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            samples = list(executor.map(lambda url: _scrape_full(url, pool), urls))
+        elapsed = time.perf_counter() - started_at
+    finally:
+        pool.close()
+    return {
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 2),
+        "profiles_per_minute": round(len(urls) / elapsed * 60, 1),
+        **summarize(samples),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=base_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print the change of each summary metric between two runs."""
+    print(f"\nComparison {previous.get('commit')} -> {current.get('commit')}:")
+    for mode in ("html", "extract", "full"):
+        before = previous["results"].get(mode, {}).get("summary", {})
+        after = current["results"].get(mode, {}).get("summary", {})
+        for metric in ("wall_ms.p50", "wall_ms.p95", "round_trips", "browser_rss_mb"):
+            key, _, sub = metric.partition(".")
+            old = before.get(key, {}).get(sub) if sub else before.get(key)
+            new = after.get(key, {}).get(sub) if sub else after.get(key)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            print(f"  {mode:8} {metric:16} {old:>10} -> {new:>10} ({change:+.1f}%)")
+
+    before = {r["workers"]: r for r in previous["results"].get("throughput", [])}
+    for result in current["results"].get("throughput", []):
+        old = before.get(result["workers"], {}).get("profiles_per_minute")
+        if old:
+            new = result["profiles_per_minute"]
+            print(
+                f"  throughput workers={result['workers']:<3} {old:>10} -> {new:>10} "
+                f"profiles/min ({(new - old) / old * 100:+.1f}%)"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark profile extraction")
+    parser.add_argument(
+        "--fixtures",
+        default=config.WORKSPACE_BASE_PATH,
+        help="Directory of <profile id>/page_source.html pages",
+    )
+    parser.add_argument(
+        "--modes", nargs="+", choices=MODES, default=list(MODES), help="What to run"
+    )
+    parser.add_argument(
+        "--workers",
+        nargs="+",
+        type=int,
+        default=[1, 2, 4],
+        help="Concurrent browsers of each throughput run",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Passes per fixture")
+    parser.add_argument("--headless", action="store_true", help="Headless Chrome")
+    parser.add_argument(
+        "--keep-scripts", action="store_true", help="Serve pages with their scripts"
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(config.WORKSPACE_BASE_PATH, "benchmarks"),
+        help="Directory of the JSON results",
+    )
+    parser.add_argument("--compare", metavar="FILE", help="Previous results to diff")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures, strip_scripts=not args.keep_scripts)
+    if not fixtures:
+        parser.error(f"No page_source.html fixtures found in {args.fixtures}")
+    print(f"{len(fixtures)} fixtures loaded from {args.fixtures}")
+
+    # Scrapes dump failed pages in the workspace, keep the fixtures intact
+    config.WORKSPACE_BASE_PATH = tempfile.mkdtemp(prefix="malt-benchmark-")
+
+    results: Dict[str, Any] = {}
+    if "html" in args.modes:
+        results["html"] = bench_html(fixtures, args.repeat)
+
+    browser_modes = {"extract", "full", "throughput"} & set(args.modes)
+    if browser_modes:
+        with FixtureServer(fixtures) as server:
+            if browser_modes & {"extract", "full"}:
+                pool = BrowserPool(headless=args.headless, max_size=1)
+                try:
+                    if "extract" in args.modes:
+                        results["extract"] = bench_extract(
+                            fixtures, server, pool, args.repeat
+                        )
+                    if "full" in args.modes:
+                        results["full"] = bench_full(
+                            fixtures, server, pool, args.repeat
+                        )
+                finally:
+                    pool.close()
+            if "throughput" in args.modes:
+                results["throughput"] = [
+                    bench_throughput(
+                        fixtures, server, args.headless, workers, args.repeat
+                    )
+                    for workers in args.workers
+                ]
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "fixtures": len(fixtures),
+        "repeat": args.repeat,
+        "settings": {
+            "extraction_mode": config.EXTRACTION_MODE,
+            "resource_blocking": config.RESOURCE_BLOCKING_ENABLED,
+            "headless": args.headless,
+        },
+        "results": results,
+    }
+
+    for mode, result in results.items():
+        if mode == "throughput":
+            for run in result:
+                print(
+                    f"throughput workers={run['workers']}: "
+                    f"{run['profiles_per_minute']} profiles/min"
+                )
+        else:
+            print(f"{mode}: {json.dumps(result['summary'])}")
+
+    os.makedirs(args.output, exist_ok=True)
+    name = f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}.json"
+    path = os.path.join(args.output, name)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
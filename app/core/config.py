@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,9 +7,116 @@ class AppConfig(BaseSettings):
     OPENAI_API_KEY: str
     HTTP_TOKEN: str
     SENTRY_DSN: str | None = None
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.1  # share of requests traced
     ENVIRONMENT: str = "local"
     WORKSPACE_BASE_PATH: str = "var"
 
+    # Connection pool of the async engine, one per process: keep
+    # (DB_POOL_SIZE + DB_MAX_OVERFLOW) x processes below max_connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: int = 30  # seconds
+
+    # Browser pool
+    BROWSER_POOL_MIN_SIZE: int = 0
+    BROWSER_POOL_MAX_SIZE: int = 2
+    BROWSER_POOL_IDLE_TIMEOUT: int = 300  # seconds
+    BROWSER_POOL_MAX_PAGES: int = 50  # page loads before a browser is recycled
+    BROWSER_POOL_ACQUIRE_TIMEOUT: int = 120  # seconds
+    CHROME_PROFILES_BASE_PATH: str = "/home/chrome/.config/chromium-pool"
+    # Browser supervisor: recycles browsers past their memory or age budget
+    # and kills Chrome processes left behind by failed quits or dead workers
+    BROWSER_MAX_RSS_MB: int = 1500  # process tree of one browser
+    BROWSER_MAX_AGE: int = 3600  # seconds
+    BROWSER_SUPERVISOR_INTERVAL: int = 15  # seconds between samples
+    BROWSER_ORPHAN_GRACE: int = 120  # seconds an untracked browser may run
+
+    # Resource blocking in the scraping browser, resource types are image,
+    # font, media, stylesheet and script, lists are JSON in the environment
+    RESOURCE_BLOCKING_ENABLED: bool = True
+    BLOCKED_RESOURCE_TYPES: List[str] = ["image", "font", "media"]
+    ALLOWED_RESOURCE_TYPES: List[str] = []
+    BLOCK_TRACKERS: bool = True
+    BLOCKED_URL_PATTERNS: List[str] = []
+
+    # Scrape engine: "browser" (Selenium) or "http" (falls back to browser)
+    SCRAPE_ENGINE: str = "browser"
+    HTTP_POOL_SIZE: int = 10
+    HTTP_TIMEOUT: int = 15  # seconds
+
+    # Extraction: "script" (single round-trip), "selectors" or "compare"
+    EXTRACTION_MODE: str = "script"
+    PAGE_READY_TIMEOUT: int = 20  # seconds to wait for the profile header
+    PAGE_READY_MAX_TIMEOUT: int = 80  # longest wait when retrying timeouts
+    NETWORK_IDLE_TIMEOUT: float = 3  # seconds to wait for network idle
+    NETWORK_IDLE_MS: int = 500  # no new resource for this long means idle
+
+    # Screenshots: "never", "failure", "sample" (1 in SCREENSHOT_SAMPLE_RATE
+    # scrapes plus failures) or "always"
+    SCREENSHOT_MODE: str = "failure"
+    SCREENSHOT_SAMPLE_RATE: int = 100
+
+    # Archive of the page of every scrape, for offline re-extraction. Pages
+    # are content addressed and zstd compressed with a shared dictionary
+    # trained by `app/archive.py train`
+    PAGE_ARCHIVE_ENABLED: bool = True
+    PAGE_ARCHIVE_PATH: Optional[str] = None  # defaults to <workspace>/archive
+    PAGE_ARCHIVE_LEVEL: int = 10  # zstd level
+
+    # Profile freshness
+    PROFILE_TTL: int = 7 * 24 * 3600  # seconds a scrape stays fresh
+    PROFILE_STALE_TTL: int = 30 * 24 * 3600  # extra seconds served stale
+    PROFILE_CACHE_SIZE: int = 1000  # profiles kept in the in-process LRU
+    # seconds a profile stays in the LRU, scrapes by other processes show after
+    PROFILE_CACHE_TTL: int = 60
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024  # bytes, smaller bodies sent as is
+
+    # Scrape jobs
+    SCRAPE_WORKERS: int = 2  # concurrent scrapes, keep <= BROWSER_POOL_MAX_SIZE
+    CLAIM_TIMEOUT: int = 900  # seconds an API process claim is leased for
+    BATCH_FLUSH_SIZE: int = 25  # batch results written per bulk upsert
+
+    # Where scrapes run: "local" in the API process, or "workers" in
+    # app/worker.py processes on any number of hosts, the API then only
+    # queues them as TODO rows
+    SCRAPE_EXECUTION: str = "local"
+    WORKER_LEASE_TTL: int = 90  # seconds a lease outlives its last heartbeat
+    WORKER_HEARTBEAT_INTERVAL: int = 15  # seconds
+    WORKER_POLL_INTERVAL: float = 2  # seconds between lease attempts when idle
+    WORKER_STALE_AFTER: int = 120  # seconds without heartbeat before a worker is lost
+
+    # Pacing per host, shared by every scraping process through the database
+    RATE_LIMIT_PER_SECOND: float = 0.5  # sustained page loads per second
+    RATE_LIMIT_BURST: int = 2
+    RATE_LIMIT_JITTER: float = 0.5  # random extra wait, share of an interval
+    # Adaptive concurrency of each process: grows while scrapes are healthy,
+    # halves on timeouts, 429s and captcha pages. SCRAPE_WORKERS and the
+    # browser pool size still bound it
+    CONCURRENCY_MIN: int = 1
+    CONCURRENCY_MAX: int = 4
+    CONCURRENCY_TARGET_LATENCY: float = 20  # seconds, slower scrapes hold
+    THROTTLE_COOLDOWN: int = 60  # seconds paused after a 429 or captcha
+
+    # Retries of failed scrapes, run in the background
+    RETRY_MAX_ATTEMPTS: int = 5
+    RETRY_BASE_DELAY: int = 60  # seconds, doubled on every attempt
+    RETRY_MAX_DELAY: int = 6 * 3600  # seconds
+    RETRY_POLL_INTERVAL: int = 30  # seconds between scans for due retries
+    RETRY_BATCH_SIZE: int = 20  # due retries and abandoned TODO jobs queued per scan
+
+    # Background recrawl of profiles older than RECRAWL_TTL, most requested
+    # and recently changed profiles first
+    RECRAWL_ENABLED: bool = True
+    RECRAWL_TTL: int = 7 * 24 * 3600  # seconds
+    RECRAWL_BUDGET_PER_HOUR: int = 60  # profiles, all API processes together
+    RECRAWL_INTERVAL: int = 60  # seconds between scans
+    RECRAWL_MAX_PENDING: int = 4  # TODO or IN_PROGRESS rows before scans hold off
+    RECRAWL_CHANGE_WINDOW: int = 30 * 24 * 3600  # seconds a change boosts
+    RECRAWL_CHANGE_BOOST: int = 10  # requests a recent change is worth
+    RECRAWL_REQUEST_COUNTS: int = 100_000  # profiles counted between two scans
+
     model_config = SettingsConfigDict(
         env_file=(".env"),
         extra="ignore",
@@ -0,0 +1,110 @@
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import config
+from app.core.log import get_logger
+
+logger = get_logger("malt.spans")
+
+# Scrape stages last from milliseconds (DB writes) to a minute (page loads)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "malt_stage_duration_seconds",
+    "Duration of scrape and storage stages",
+    ["stage", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+FIELD_SECONDS = Histogram(
+    "malt_extract_field_duration_seconds",
+    "Duration of the WebDriver lookup of a profile field",
+    ["field"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+EXTRACT_FIELDS_TOTAL = Counter(
+    "malt_extract_fields_total",
+    "Profile fields found or missing on extracted pages",
+    ["field", "presence"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "malt_http_request_duration_seconds",
+    "Duration of API requests",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+SCRAPES_TOTAL = Counter(
+    "malt_scrapes_total", "Profile scrapes by engine and outcome", ["engine", "outcome"]
+)
+BROWSER_RECYCLES_TOTAL = Counter(
+    "malt_browser_recycles_total", "Browsers retired over budget", ["reason"]
+)
+BROWSER_KILLS_TOTAL = Counter(
+    "malt_browser_kills_total", "Chrome processes killed by the supervisor", ["reason"]
+)
+
+# Set by `init_sentry` when tracing is enabled
+_sentry = None
+
+
+def init_sentry() -> bool:
+    """Enable Sentry error reporting and performance tracing if configured.
+
+    `sentry-sdk` is optional, tracing stays off when it is not installed.
+    """
+    global _sentry
+    if not config.SENTRY_DSN:
+        return False
+    try:
+        import sentry_sdk
+    except ImportError:
+        print("SENTRY_DSN is set but sentry-sdk is not installed, tracing disabled")
+        return False
+
+    sentry_sdk.init(
+        dsn=config.SENTRY_DSN,
+        environment=config.ENVIRONMENT,
+        traces_sample_rate=config.SENTRY_TRACES_SAMPLE_RATE,
+    )
+    _sentry = sentry_sdk
+    return True
+
+
+@contextmanager
+def span(stage: str, **fields) -> Iterator[None]:
+    """Time a stage of a scrape.
+
+    The duration is observed in `malt_stage_duration_seconds`, logged as a
+    JSON line with `fields`, and traced as a Sentry span when enabled. A
+    transaction is started when none runs, as in workers.
+    """
+    outcome = "ok"
+    started_at = time.perf_counter()
+    with ExitStack() as stack:
+        if _sentry is not None:
+            if _sentry.get_current_span() is None:
+                stack.enter_context(_sentry.start_transaction(op=stage, name=stage))
+            else:
+                stack.enter_context(_sentry.start_span(op=stage))
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - started_at
+            STAGE_SECONDS.labels(stage=stage, outcome=outcome).observe(duration)
+            logger.info(
+                stage,
+                extra={
+                    "fields": {
+                        "event": "span",
+                        "stage": stage,
+                        "outcome": outcome,
+                        "duration_ms": round(duration * 1000, 1),
+                        **fields,
+                    }
+                },
+            )
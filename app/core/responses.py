@@ -0,0 +1,144 @@
+import gzip
+from typing import Any, Optional
+
+import brotli
+import orjson
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import config
+
+# Content types worth compressing, others are binary or already compressed
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """JSON response encoded by orjson, UTC datetimes end in "Z" like pydantic."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+        )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """Return the tag of `If-None-Match` that matches `etag`, if any.
+
+    Tags of compressed responses carry the encoding, `"<tag>-br"`, they match
+    the tag they were derived from.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            # Weak comparison, as If-None-Match requires
+            tag = tag[2:]
+        if tag == etag or tag in (_encoded_etag(etag, e) for e in ("br", "gzip")):
+            return tag
+    return None
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """Brotli when the client takes it, else gzip, else None."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    for encoding in ("br", "gzip"):
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compress response bodies of at least `minimum_size` bytes.
+
+    Brotli is preferred over gzip when the client accepts both. Only bodies
+    sent in one piece are compressed, streamed responses such as exports
+    pass through. Strong ETags get the encoding appended, a compressed body
+    is a different representation.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = config.RESPONSE_COMPRESSION_MIN_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held until the body shows whether it is worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(held["headers"]))
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(held)
+                await send(message)
+                return
+
+            body = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.startswith('"'):
+                headers["ETag"] = _encoded_etag(etag, encoding)
+            await send({**held, "headers": headers.raw})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
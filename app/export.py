@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(base_dir)
+
+from app.core.database import AsyncSessionLocal
+from app.services.export_service import COMPRESSIONS, FORMATS, ExportService
+
+
+async def export(args: argparse.Namespace) -> None:
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    size = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            async for chunk in ExportService(db, batch_size=args.batch_size).export(
+                format=args.format,
+                compression=args.compress,
+                changed_since=args.since,
+                skills=args.skill,
+                categories=args.category,
+                languages=args.language,
+                location=args.location,
+                availability=args.availability,
+                min_rate=args.min_rate,
+                max_rate=args.max_rate,
+                q=args.q,
+            ):
+                output.write(chunk)
+                size += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    if args.output != "-":
+        print(f"{size} bytes written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export scraped Malt profiles")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="gzip or zstd")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only profiles changed since this ISO date",
+    )
+    parser.add_argument("--skill", action="append", default=[], help="Repeatable")
+    parser.add_argument("--category", action="append", default=[], help="Repeatable")
+    parser.add_argument("--language", action="append", default=[], help="Repeatable")
+    parser.add_argument("--location")
+    parser.add_argument("--availability")
+    parser.add_argument("--min-rate", type=int, help="Daily rate in euros")
+    parser.add_argument("--max-rate", type=int, help="Daily rate in euros")
+    parser.add_argument("--q", help="Text in the name or title")
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Rows fetched per round-trip"
+    )
+    parser.add_argument("-o", "--output", default="-", help="File, '-' for stdout")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and args.output == "-" and sys.stdout.isatty():
+        parser.error("Parquet is binary, pass --output")
+    asyncio.run(export(args))
@@ -0,0 +1,99 @@
+"""Startup time and memory of each process role.
+
+Every run starts a fresh interpreter that imports what the role loads
+before serving, then reports the import time, the resident memory and
+which parts of the scraping stack came with it:
+
+    api     the FastAPI app, `uvicorn app.api:app`
+    worker  a scrape worker, `python app/worker.py`, engines included
+
+The interpreter alone is measured as a baseline.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(base_dir)
+
+ROLES = {
+    "python": [],
+    "api": ["app.api"],
+    "worker": ["app.services.lease_worker", "app.services.scrape_engine"],
+}
+
+# Modules only scraping needs
+HEAVY_MODULES = ("undetected_chromedriver", "selenium.webdriver", "bs4", "soupsieve")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for module in sys.argv[2:]:
+    __import__(module)
+seconds = time.perf_counter() - started
+import psutil
+print(json.dumps({
+    "seconds": seconds,
+    "rss_bytes": psutil.Process().memory_info().rss,
+    "modules": len(sys.modules),
+    "heavy": [m for m in json.loads(sys.argv[1]) if m in sys.modules],
+}))
+"""
+
+
+def measure(role: str, repeat: int) -> Dict[str, Any]:
+    """Median import time and memory of `role` over `repeat` fresh processes."""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, json.dumps(HEAVY_MODULES), *ROLES[role]],
+            cwd=base_dir,
+            env={**os.environ, "PYTHONPATH": base_dir},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        # Startup hooks may print, the probe result is the last line
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "role": role,
+        "seconds": round(statistics.median(r["seconds"] for r in runs), 3),
+        "rss_mb": round(statistics.median(r["rss_bytes"] for r in runs) / 2**20, 1),
+        "modules": runs[-1]["modules"],
+        "heavy": runs[-1]["heavy"],
+    }
+
+
+def report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'role':<8} {'import s':>9} {'rss MB':>8} {'modules':>8}  scraping stack")
+    for result in results:
+        print(
+            f"{result['role']:<8} {result['seconds']:>9.3f} {result['rss_mb']:>8.1f}"
+            f" {result['modules']:>8}  {', '.join(result['heavy']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure startup time and memory of the API and worker roles"
+    )
+    parser.add_argument(
+        "roles", nargs="*", help=f"Roles among {', '.join(ROLES)}, all by default"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per role")
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args()
+    unknown = set(args.roles) - set(ROLES)
+    if unknown:
+        parser.error(f"Unknown roles: {', '.join(sorted(unknown))}")
+
+    results = [measure(role, args.repeat) for role in args.roles or ROLES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        report(results)
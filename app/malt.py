@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import json
 import os
 import sys
@@ -5,10 +7,15 @@ import sys
 base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 sys.path.append(base_dir)
 
+from app.core.database import AsyncSessionLocal
+from app.services.batch_service import BatchService, read_urls, run_batch
+from app.services.browser_pool import BrowserPool
 from app.services.malt_scrapper import MaltScrapper
+from app.services.rate_limiter import scrape_throttle
+from app.services.shared_rate_limiter import share_rate_limits
 
-if __name__ == "__main__":
-    id: str = "yacinebenkhedimallah"
+
+def scrape_one(id: str) -> None:
     scraper = MaltScrapper(
         headless=False,
         profil_url=f"https://malt.fr/profile/{id}",
@@ -16,3 +23,55 @@ if __name__ == "__main__":
     result = scraper.extract_profile_data()
     print("\nFinal Results:")
     print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+async def scrape_batch(path: str, workers: int) -> None:
+    source = sys.stdin if path == "-" else open(path)
+    try:
+        async with AsyncSessionLocal() as db:
+            plan = await BatchService(db).prepare(read_urls(source))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(
+        f"{plan.received} URLs read: {plan.invalid} invalid, "
+        f"{plan.duplicates} duplicates, {plan.skipped} already scrapped, "
+        f"{len(plan.jobs)} to scrape with {workers} workers"
+    )
+
+    share_rate_limits(scrape_throttle.limiter)
+    # Start at full width, throttling and timeouts still halve it
+    scrape_throttle.concurrency.start_at(workers)
+    pool = BrowserPool(headless=False, max_size=workers)
+    try:
+        stats = await run_batch(plan, workers, pool=pool)
+    finally:
+        pool.close()
+
+    print("\nBatch Results:")
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Malt profiles")
+    parser.add_argument(
+        "id", nargs="?", default="yacinebenkhedimallah", help="Profile ID"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="File of profile URLs, one per line or JSONL, '-' for stdin",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Parallel browsers for --batch, lowered while the site throttles",
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        asyncio.run(scrape_batch(args.batch, args.workers))
+    else:
+        scrape_one(args.id)
@@ -2,14 +2,17 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 from sqlalchemy import (
+    BigInteger,
     Column,
     Integer,
     String,
     Float,
     JSON,
     DateTime,
+    Index,
     Enum as SQLAlchemyEnum,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -33,30 +36,100 @@ class MaltProfile(Base):
     fullname: Optional[str] = Column(String, index=True)
     title: Optional[str] = Column(String)
     experience_years: Optional[str] = Column(String)
-    categories: Optional[List[dict]] = Column(JSON)  # List of categories
+    categories: Optional[List[dict]] = Column(JSONB)  # List of categories
     daily_rate: Optional[str] = Column(String)
+    daily_rate_eur: Optional[int] = Column(Integer, index=True)  # parsed daily_rate
     image_url: Optional[str] = Column(String)
     profile_url: Optional[str] = Column(String)
     location: str = Column(String)  # location
-    work_locations: Optional[List[dict]] = Column(JSON)  # List of work locations
-    top_skills: Optional[List[dict]] = Column(JSON)  # List of top skills
-    skills: Optional[List[dict]] = Column(JSON)  # List of skills with levels
+    work_locations: Optional[List[dict]] = Column(JSONB)  # List of work locations
+    top_skills: Optional[List[dict]] = Column(JSONB)  # List of top skills
+    skills: Optional[List[dict]] = Column(JSONB)  # List of skills with levels
     response_rate: Optional[str] = Column(String)
-    languages: Optional[List[dict]] = Column(JSON)  # List of languages with levels
+    languages: Optional[List[dict]] = Column(JSONB)  # List of languages with levels
     availability: Optional[str] = Column(String)
     missions_count: Optional[int] = Column(Integer)
     description: Optional[str] = Column(String)
     education: Optional[List[dict]] = Column(JSON)  # List of education entries
-    expertise_domains: Optional[List[dict]] = Column(JSON)  # List of expertise domains
+    expertise_domains: Optional[List[dict]] = Column(JSONB)  # List of expertise domains
     experience: Optional[List[dict]] = Column(JSON)  # List of work experiences
     certifications: Optional[List[dict]] = Column(JSON)  # List of certifications
     status: ProfileStatus = Column(
         SQLAlchemyEnum(ProfileStatus), default=ProfileStatus.TODO, nullable=False
     )
 
+    # Hash of the scraped content and of each field group, see change_detection
+    content_hash: Optional[str] = Column(String, nullable=True)
+    field_hashes: Optional[dict] = Column(JSON, nullable=True)
+
     last_scraped_at: Optional[datetime] = Column(DateTime(timezone=True), nullable=True)
+    # Recrawl priority: API requests and last scrape that changed the content
+    request_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    content_changed_at: Optional[datetime] = Column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Last queued by the recrawl scheduler, counts against its hourly budget
+    recrawl_queued_at: Optional[datetime] = Column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    # Last batch that queued the profile, see batch_service
+    batch_id: Optional[str] = Column(String, nullable=True, index=True)
+    # Failed scrapes since the last success, see retry_policy
+    attempt_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    next_retry_at: Optional[datetime] = Column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    last_error: Optional[str] = Column(String, nullable=True)
+    last_error_kind: Optional[str] = Column(String, nullable=True)
+    # Process scraping an IN_PROGRESS profile, reclaimed once the lease expires
+    leased_by: Optional[str] = Column(String, nullable=True)
+    lease_expires_at: Optional[datetime] = Column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Recrawl scans by status and age
+        Index("ix_malt_profiles_status_last_scraped_at", "status", "last_scraped_at"),
+        # Search: containment on JSONB lists, substring match on text
+        *(
+            Index(
+                f"ix_malt_profiles_{column}_gin",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "jsonb_path_ops"},
+            )
+            for column in ("skills", "top_skills", "categories", "languages")
+        ),
+        *(
+            Index(
+                f"ix_malt_profiles_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in ("fullname", "title", "location")
+        ),
+    )
+
+    # Fetch server generated values on flush, async sessions cannot lazy load
+    __mapper_args__ = {"eager_defaults": True}
+
     class Config:
         orm_mode = True
+
+
+class MaltProfileChange(Base):
+    """A field group of a profile that changed on a scrape."""
+
+    __tablename__ = "malt_profile_changes"
+
+    id: int = Column(BigInteger, primary_key=True, autoincrement=True)
+    profile_id: str = Column(String, index=True, nullable=False)
+    field: str = Column(String, nullable=False)
+    old_hash: Optional[str] = Column(String, nullable=True)
+    new_hash: str = Column(String, nullable=False)
+    changed_at: datetime = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
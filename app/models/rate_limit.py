@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, DateTime, Float, String
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class RateLimit(Base):
+    """Token bucket of a scraped host, shared by every scraping process."""
+
+    __tablename__ = "rate_limits"
+
+    host: str = Column(String, primary_key=True)
+    tokens: float = Column(Float, nullable=False)
+    # Database time of the last refill, the clocks of the hosts do not matter
+    updated_at: datetime = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Set by a 429 or captcha, no token is handed out before
+    paused_until: Optional[datetime] = Column(DateTime(timezone=True), nullable=True)
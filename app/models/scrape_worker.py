@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, DateTime, Float, Integer, String
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ScrapeWorker(Base):
+    """A scrape worker process, updated by its heartbeats."""
+
+    __tablename__ = "scrape_workers"
+
+    # Also the `MaltProfile.leased_by` of its leases
+    id: str = Column(String, primary_key=True)
+    hostname: str = Column(String, nullable=False)
+    pid: int = Column(Integer, nullable=False)
+    concurrency: int = Column(Integer, nullable=False)
+    started_at: datetime = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    heartbeat_at: datetime = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    stopped_at: Optional[datetime] = Column(DateTime(timezone=True), nullable=True)
+    in_flight: int = Column(Integer, default=0, server_default="0", nullable=False)
+    scraped_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    failed_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    # Scrapes per minute over the last `RECENT_WINDOW` seconds of the worker
+    recent_per_minute: float = Column(
+        Float, default=0, server_default="0", nullable=False
+    )
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import config
+from app.core.database import AsyncSessionLocal
+from app.models.malt_profile import MaltProfile, ProfileStatus
+from app.services.profile_service import ProfileService
+
+if TYPE_CHECKING:
+    from app.services.browser_pool import BrowserPool
+
+
+# Rows per statement, asyncpg takes at most 32767 bind parameters
+CHUNK_SIZE = 1000
+
+
+def _chunks(items: Iterable[Any], size: int = CHUNK_SIZE) -> Iterator[List[Any]]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def read_urls(lines: Iterable[str]) -> Iterator[str]:
+    """Yield profile URLs from plain text lines or JSONL records.
+
+    JSONL records must hold the URL under a `url` key, blank lines and lines
+    starting with `#` are ignored.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                url = json.loads(line).get("url")
+            except (json.JSONDecodeError, AttributeError):
+                url = None
+            if not url:
+                print(f"Skipping invalid JSONL record: {line[:80]}")
+                continue
+            yield url
+        else:
+            yield line
+
+
+@dataclass
+class BatchPlan:
+    # Set on the profiles queued by the batch, to follow its progress
+    batch_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    received: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    queued: int = 0
+    # (job id, profile id) of every profile left to scrape, kept by `prepare`
+    jobs: List[Tuple[str, str]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "received": self.received,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "queued": self.queued,
+        }
+
+
+class BatchService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add(self, urls: Iterable[str], plan: BatchPlan) -> List[Tuple[str, str]]:
+        """Normalise and de-duplicate URLs, and register the ones to scrape.
+
+        Takes at most `CHUNK_SIZE` URLs. Known profiles are loaded and missing
+        ones inserted in TODO, tagged with the batch id, which also finds the
+        duplicates of earlier chunks. Already scraped ones are skipped. The
+        chunk is committed, so its jobs can be scraped right away.
+
+        Returns:
+            List[Tuple[str, str]]: (job id, profile id) of the profiles to scrape
+        """
+        urls_by_id: Dict[str, str] = {}
+        for url in urls:
+            plan.received += 1
+            try:
+                url, profile_id = ProfileService.parse_profile_url(url)
+            except ValueError:
+                plan.invalid += 1
+                continue
+            if profile_id in urls_by_id:
+                plan.duplicates += 1
+                continue
+            urls_by_id[profile_id] = url
+
+        existing = {
+            profile.profile_id: profile
+            for profile in await self.db.scalars(
+                select(MaltProfile).where(MaltProfile.profile_id.in_(list(urls_by_id)))
+            )
+        }
+
+        profiles = []
+        missing = []
+        for profile_id, url in urls_by_id.items():
+            profile = existing.get(profile_id)
+            if profile is None:
+                missing.append(
+                    {
+                        "profile_id": profile_id,
+                        "profile_url": url,
+                        "status": ProfileStatus.TODO,
+                        "batch_id": plan.batch_id,
+                    }
+                )
+            elif profile.batch_id == plan.batch_id:
+                plan.duplicates += 1
+            elif profile.status == ProfileStatus.SCRAPPED:
+                plan.skipped += 1
+            else:
+                if profile.status not in (
+                    ProfileStatus.TODO,
+                    ProfileStatus.IN_PROGRESS,
+                ):
+                    profile.status = ProfileStatus.TODO
+                profile.batch_id = plan.batch_id
+                profiles.append(profile)
+
+        if missing:
+            # A concurrent batch may insert the same profiles, keep theirs
+            await self.db.execute(
+                insert(MaltProfile)
+                .values(missing)
+                .on_conflict_do_nothing(index_elements=[MaltProfile.profile_id])
+            )
+            profiles.extend(
+                await self.db.scalars(
+                    select(MaltProfile).where(
+                        MaltProfile.profile_id.in_(
+                            [row["profile_id"] for row in missing]
+                        )
+                    )
+                )
+            )
+
+        jobs = [(profile.id, profile.profile_id) for profile in profiles]
+        await self.db.commit()
+        plan.queued += len(jobs)
+        return jobs
+
+    async def prepare(self, urls: Iterable[str]) -> BatchPlan:
+        """Register URLs in a new batch `CHUNK_SIZE` at a time, keeping its jobs."""
+        plan = BatchPlan()
+        for chunk in _chunks(urls):
+            plan.jobs.extend(await self.add(chunk, plan))
+        return plan
+
+    async def status(self, batch_id: str) -> Dict[str, int]:
+        """Count the profiles of a batch by status, empty for unknown batches."""
+        rows = await self.db.execute(
+            select(MaltProfile.status, func.count())
+            .where(MaltProfile.batch_id == batch_id)
+            .group_by(MaltProfile.status)
+        )
+        return {status.value: count for status, count in rows}
+
+
+async def _scrape_job(
+    job_id: str,
+    semaphore: asyncio.Semaphore,
+    executor: Executor,
+    pool: Optional["BrowserPool"],
+) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    async with semaphore:
+        async with AsyncSessionLocal() as db:
+            service = ProfileService(db)
+            profile = await service.get_profile(job_id)
+            if profile is None:
+                return None
+            # Results are written in bulk by `run_batch`
+            data = await service.scrape_profile(
+                profile, pool=pool, executor=executor, persist=False
+            )
+            return profile.profile_id, profile.profile_url, data
+
+
+async def _flush_results(results: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+    async with AsyncSessionLocal() as db:
+        await ProfileService(db).upsert_profiles_data(results)
+    print(f"Stored {len(results)} scraped profiles")
+
+
+async def run_batch(
+    plan: BatchPlan,
+    workers: int,
+    pool: Optional["BrowserPool"] = None,
+    flush_size: int = config.BATCH_FLUSH_SIZE,
+) -> Dict[str, Any]:
+    """Scrape the profiles of a plan over `workers` parallel browsers.
+
+    Scraped profiles are stored `flush_size` at a time with one bulk upsert.
+    Prints one progress line per finished profile and returns throughput
+    stats once every job is done.
+    """
+    total = len(plan.jobs)
+    succeeded = 0
+    failed = 0
+    started_at = time.monotonic()
+    results: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    semaphore = asyncio.Semaphore(workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        async def scrape(job_id: str, profile_id: str):
+            try:
+                return (
+                    profile_id,
+                    await _scrape_job(job_id, semaphore, executor, pool),
+                    None,
+                )
+            except Exception as e:
+                return profile_id, None, e
+
+        tasks = [scrape(job_id, profile_id) for job_id, profile_id in plan.jobs]
+        for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+            profile_id, result, error = await task
+            if error is None:
+                succeeded += 1
+                outcome = "ok"
+                if result is not None:
+                    results.append(result)
+            else:
+                failed += 1
+                outcome = f"error: {str(error)}"
+            elapsed = time.monotonic() - started_at
+            rate = done / elapsed * 60 if elapsed else 0.0
+            print(f"[{done}/{total}] {profile_id} {outcome} ({rate:.1f} profiles/min)")
+
+            if len(results) >= flush_size:
+                await _flush_results(results)
+                results = []
+
+    if results:
+        await _flush_results(results)
+
+    elapsed = time.monotonic() - started_at
+    return {
+        "scraped": succeeded,
+        "failed": failed,
+        "skipped": plan.skipped,
+        "elapsed_seconds": round(elapsed, 1),
+        "profiles_per_minute": round(total / elapsed * 60, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,320 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import undetected_chromedriver as uc
+
+from app.core.config import config
+from app.core.metrics import span
+from app.services.browser_supervisor import PROFILE_PREFIX, browser_supervisor
+from app.services.resource_blocker import resource_blocker
+
+
+def create_driver(headless: bool, user_data_dir: str) -> uc.Chrome:
+    """Launch a Chrome instance bound to its own user data directory.
+
+    Args:
+        headless (bool): Run Chrome in headless mode
+        user_data_dir (str): Profile directory reserved for this instance
+
+    Returns:
+        uc.Chrome: The started driver
+    """
+    options = uc.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")  # Use new headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-infobars")
+    # Each browser gets its own profile and cache, Chrome locks both
+    options.add_argument(f"--user-data-dir={user_data_dir}")
+    options.add_argument(f"--disk-cache-dir={user_data_dir}/cache")
+    options.binary_location = os.getenv("CHROME_EXECUTABLE_PATH", "/usr/bin/chromium")
+    resource_blocker.configure_options(options)
+
+    driver = uc.Chrome(
+        options=options,
+        browser_executable_path=options.binary_location,
+        driver_executable_path="/usr/bin/chromedriver",
+        version_main=119,
+        headless=headless,
+        use_subprocess=True,  # Changed to True for better process management
+    )
+    try:
+        resource_blocker.install(driver)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+class BrowserSession:
+    """A pooled Chrome instance and its bookkeeping."""
+
+    def __init__(self, driver: uc.Chrome, user_data_dir: str):
+        self.driver = driver
+        self.user_data_dir = user_data_dir
+        self.pages_served = 0
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        # Set by the supervisor, the session is quit when next released
+        self.retired = False
+
+    def is_healthy(self) -> bool:
+        """Check that the browser still answers WebDriver commands."""
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def quit(self) -> None:
+        """Stop the browser and remove its profile directory.
+
+        Chrome processes that outlive `driver.quit()` are killed and reaped.
+        """
+        processes = browser_supervisor.processes(self)
+        try:
+            self.driver.quit()
+        except Exception:
+            # If quit fails, try to close the browser
+            try:
+                self.driver.close()
+            except Exception:
+                pass
+        browser_supervisor.untrack(self, processes)
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class BrowserPool:
+    """Keeps warm Chrome sessions that scrapers check out and return.
+
+    Sessions are recycled after `max_pages` page loads or when the browser
+    supervisor retires them, dropped when idle for longer than `idle_timeout`
+    (down to `min_size`) and health checked before every checkout. At most
+    `max_size` browsers run at the same time, extra callers wait up to
+    `acquire_timeout` seconds for one to be returned.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        min_size: int = config.BROWSER_POOL_MIN_SIZE,
+        max_size: int = config.BROWSER_POOL_MAX_SIZE,
+        idle_timeout: int = config.BROWSER_POOL_IDLE_TIMEOUT,
+        max_pages: int = config.BROWSER_POOL_MAX_PAGES,
+        acquire_timeout: int = config.BROWSER_POOL_ACQUIRE_TIMEOUT,
+    ):
+        self.headless = headless
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+        self._idle: List[BrowserSession] = []
+        self._in_use: set = set()
+        self._starting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._reaper: Optional[threading.Thread] = None
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._starting
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "starting": self._starting,
+                "max_size": self.max_size,
+            }
+
+    def _launch(self) -> BrowserSession:
+        os.makedirs(config.CHROME_PROFILES_BASE_PATH, exist_ok=True)
+        user_data_dir = tempfile.mkdtemp(
+            prefix=PROFILE_PREFIX, dir=config.CHROME_PROFILES_BASE_PATH
+        )
+        try:
+            print("Initializing Chrome driver...")
+            with span("driver_init"):
+                driver = create_driver(self.headless, user_data_dir)
+            print("Chrome driver initialized successfully")
+        except Exception as e:
+            print(f"Error initializing Chrome driver: {str(e)}")
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise e
+        session = BrowserSession(driver, user_data_dir)
+        browser_supervisor.track(session, self)
+        return session
+
+    def _take_expired_locked(self) -> List[BrowserSession]:
+        """Remove idle sessions past their idle timeout, keeping `min_size`."""
+        now = time.monotonic()
+        expired = []
+        # Oldest idle sessions sit at the start of the list
+        for session in list(self._idle):
+            if self.size - len(expired) <= self.min_size:
+                break
+            if now - session.last_used_at >= self.idle_timeout:
+                self._idle.remove(session)
+                expired.append(session)
+        return expired
+
+    def _start_reaper(self) -> None:
+        with self._cond:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(
+                target=self._reap_loop, name="browser-pool-reaper", daemon=True
+            )
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(min(self.idle_timeout / 2, 30), 1)
+        while not self._closed:
+            time.sleep(interval)
+            self.prune()
+
+    def prune(self) -> None:
+        """Quit idle sessions past their idle timeout."""
+        with self._cond:
+            expired = self._take_expired_locked()
+            if expired:
+                self._cond.notify_all()
+        for session in expired:
+            print("Closing idle Chrome session...")
+            session.quit()
+
+    def retire(self, session: BrowserSession) -> None:
+        """Quit a session now if idle, else when it is released."""
+        with self._cond:
+            session.retired = True
+            idle = session in self._idle
+            if idle:
+                self._idle.remove(session)
+                self._cond.notify_all()
+        if idle:
+            session.quit()
+
+    def warm_up(self) -> None:
+        """Start browsers until the pool holds `min_size` sessions."""
+        while True:
+            with self._cond:
+                if self._closed or self.size >= self.min_size:
+                    return
+                self._starting += 1
+            try:
+                session = self._launch()
+            except Exception:
+                with self._cond:
+                    self._starting -= 1
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._starting -= 1
+                self._idle.append(session)
+                self._cond.notify_all()
+            self._start_reaper()
+
+    def acquire(self) -> BrowserSession:
+        """Check a healthy session out of the pool, launching one if allowed.
+
+        Raises:
+            TimeoutError: No session became available within `acquire_timeout`
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        self._start_reaper()
+        while True:
+            session = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+                    if self._idle:
+                        session = self._idle.pop()  # Most recently used first
+                        self._in_use.add(session)
+                        break
+                    if self.size < self.max_size:
+                        self._starting += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("No browser available in pool")
+                    self._cond.wait(remaining)
+
+            if session is None:
+                try:
+                    session = self._launch()
+                finally:
+                    with self._cond:
+                        self._starting -= 1
+                        if session is not None:
+                            self._in_use.add(session)
+                        self._cond.notify_all()
+                return session
+
+            if session.is_healthy():
+                return session
+
+            print("Discarding unhealthy Chrome session")
+            self.release(session, discard=True)
+
+    def release(self, session: BrowserSession, discard: bool = False) -> None:
+        """Return a session to the pool, recycling it when it is worn out."""
+        session.pages_served += 1
+        session.last_used_at = time.monotonic()
+        with self._cond:
+            self._in_use.discard(session)
+            recycle = (
+                discard
+                or self._closed
+                or session.retired
+                or session.pages_served >= self.max_pages
+            )
+            if not recycle:
+                self._idle.append(session)
+            self._cond.notify_all()
+        if recycle:
+            session.quit()
+
+    def close(self) -> None:
+        """Quit idle sessions, in-use ones are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for session in idle:
+            session.quit()
+
+
+_pools: Dict[bool, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """Return the process wide pool for the given headless mode."""
+    with _pools_lock:
+        if headless not in _pools:
+            _pools[headless] = BrowserPool(headless=headless)
+        return _pools[headless]
+
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
@@ -0,0 +1,362 @@
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import psutil
+
+from app.core.config import config
+from app.core.metrics import BROWSER_KILLS_TOTAL, BROWSER_RECYCLES_TOTAL
+
+CHROME_NAMES = ("chrome", "chromium", "chromedriver")
+# Prefix of the profile directories pools create under CHROME_PROFILES_BASE_PATH
+PROFILE_PREFIX = "profile-"
+
+
+def _is_chrome(process: psutil.Process) -> bool:
+    try:
+        return process.name().lower().startswith(CHROME_NAMES)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+
+
+def _is_crashpad(process: psutil.Process) -> bool:
+    try:
+        return "crashpad" in process.name()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return True
+
+
+def _profile_dir(process: psutil.Process) -> Optional[str]:
+    """Pool profile directory a Chrome process runs on, from its arguments."""
+    base = os.path.realpath(config.CHROME_PROFILES_BASE_PATH) + os.sep
+    try:
+        arguments = process.cmdline()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    for argument in arguments:
+        # Browsers pass --user-data-dir, crash handlers --database=<dir>/...
+        for flag in ("--user-data-dir=", "--database="):
+            if argument.startswith(flag):
+                path = os.path.realpath(argument[len(flag) :])
+                if path.startswith(base):
+                    name = path[len(base) :].split(os.sep)[0]
+                    if name.startswith(PROFILE_PREFIX):
+                        return base + name
+    return None
+
+
+def _runs_on_pool_profile(process: psutil.Process) -> bool:
+    """Whether a process or one of its children uses a pool profile.
+
+    Chromedriver has no profile argument, the browser it started does.
+    """
+    try:
+        processes = [process, *process.children(recursive=True)]
+    except psutil.NoSuchProcess:
+        return False
+    return any(_profile_dir(p) is not None for p in processes)
+
+
+def _tree(roots: List[psutil.Process]) -> List[psutil.Process]:
+    """The live processes of a browser: chromedriver, Chrome and children."""
+    processes = []
+    for root in roots:
+        try:
+            if root.is_running():
+                processes.append(root)
+                processes.extend(root.children(recursive=True))
+        except psutil.NoSuchProcess:
+            pass
+    return list({process.pid: process for process in processes}.values())
+
+
+def kill_tree(processes: List[psutil.Process], timeout: float = 3) -> int:
+    """Terminate processes, then kill the ones still running after `timeout`.
+
+    Waiting on them also reaps the ones that are our children.
+
+    Returns:
+        int: How many were still running
+    """
+    alive = [p for p in processes if p.is_running()]
+    running = len(alive)
+    for process in alive:
+        try:
+            process.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    _, alive = psutil.wait_procs(alive, timeout=timeout)
+    for process in alive:
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(alive, timeout=timeout)
+    return running
+
+
+class BrowserSupervisor:
+    """Watches the Chrome processes of the browser pools.
+
+    Every browser a pool launches is tracked by the PIDs of its chromedriver
+    and Chrome processes. Every `interval` seconds the supervisor samples the
+    memory and CPU of each process tree, and has the pool retire browsers
+    over `max_rss_mb` or older than `max_age`. It also kills Chrome processes
+    nothing tracks: those reparented to init when their worker died, those
+    left running by a failed `driver.quit()` and profile directories left
+    behind.
+    """
+
+    def __init__(
+        self,
+        max_rss_mb: int = config.BROWSER_MAX_RSS_MB,
+        max_age: int = config.BROWSER_MAX_AGE,
+        interval: float = config.BROWSER_SUPERVISOR_INTERVAL,
+        orphan_grace: int = config.BROWSER_ORPHAN_GRACE,
+    ):
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.max_age = max_age
+        self.interval = interval
+        self.orphan_grace = orphan_grace
+        # Session -> (pool, root processes)
+        self._tracked: Dict[Any, tuple] = {}
+        self._cpu: Dict[int, psutil.Process] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._kills: Dict[str, int] = {}
+        self._recycles: Dict[str, int] = {}
+        self._sample: Dict[str, Any] = {"processes": 0, "rss_bytes": 0, "browsers": []}
+
+    def track(self, session, pool) -> None:
+        """Start watching a browser launched by `pool`."""
+        pids = [getattr(session.driver, "browser_pid", None)]
+        service = getattr(session.driver, "service", None)
+        pids.append(getattr(getattr(service, "process", None), "pid", None))
+        roots = []
+        for pid in pids:
+            if pid:
+                try:
+                    roots.append(psutil.Process(pid))
+                except psutil.NoSuchProcess:
+                    pass
+        with self._lock:
+            self._tracked[session] = (pool, roots)
+        self.start()
+
+    def processes(self, session) -> List[psutil.Process]:
+        with self._lock:
+            _, roots = self._tracked.get(session, (None, []))
+        return _tree(roots)
+
+    def untrack(self, session, processes: List[psutil.Process]) -> None:
+        """Stop watching a quit browser, killing what `quit` left running."""
+        with self._lock:
+            self._tracked.pop(session, None)
+        killed = kill_tree(processes)
+        if killed:
+            self._count_kill("quit_failed", killed)
+            print(f"Killed {killed} Chrome processes left by quit")
+
+    def _count_kill(self, reason: str, count: int = 1) -> None:
+        BROWSER_KILLS_TOTAL.labels(reason=reason).inc(count)
+        with self._lock:
+            self._kills[reason] = self._kills.get(reason, 0) + count
+
+    def _cpu_percent(self, process: psutil.Process) -> float:
+        # cpu_percent compares with the previous call on the same object
+        with self._lock:
+            process = self._cpu.setdefault(process.pid, process)
+        return process.cpu_percent(None)
+
+    def sample(self) -> Dict[str, Any]:
+        """Measure every tracked browser and retire the ones over budget."""
+        with self._lock:
+            tracked = list(self._tracked.items())
+        now = time.monotonic()
+        browsers, total_rss, total_processes, seen = [], 0, 0, set()
+        for session, (pool, roots) in tracked:
+            rss = cpu = 0.0
+            processes = _tree(roots)
+            for process in processes:
+                try:
+                    rss += process.memory_info().rss
+                    cpu += self._cpu_percent(process)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+                seen.add(process.pid)
+            age = now - session.created_at
+            browsers.append(
+                {
+                    "processes": len(processes),
+                    "rss_bytes": int(rss),
+                    "cpu_percent": round(cpu, 1),
+                    "age_seconds": round(age),
+                    "pages_served": session.pages_served,
+                }
+            )
+            total_rss += rss
+            total_processes += len(processes)
+
+            reason = None
+            if self.max_rss and rss > self.max_rss:
+                reason = "rss"
+            elif self.max_age and age > self.max_age:
+                reason = "age"
+            if reason and not session.retired:
+                print(f"Retiring Chrome session over its {reason} budget")
+                BROWSER_RECYCLES_TOTAL.labels(reason=reason).inc()
+                with self._lock:
+                    self._recycles[reason] = self._recycles.get(reason, 0) + 1
+                pool.retire(session)
+
+        with self._lock:
+            self._cpu = {pid: p for pid, p in self._cpu.items() if pid in seen}
+            self._sample = {
+                "processes": total_processes,
+                "rss_bytes": int(total_rss),
+                "browsers": browsers,
+            }
+        return self._sample
+
+    def reap_orphans(self) -> int:
+        """Kill Chrome processes no pool tracks and remove unused profiles.
+
+        Orphans are Chrome processes reparented to init, crash handlers whose
+        profile no browser uses, and children of this process that were not
+        tracked within `orphan_grace`. Only processes running on a pool
+        profile directory are considered: browsers of other live processes
+        and the user's own browser are left alone.
+
+        Returns:
+            int: Processes killed
+        """
+        with self._lock:
+            tracked = [roots for _, roots in self._tracked.values()]
+        tracked_pids: Set[int] = {p.pid for roots in tracked for p in _tree(roots)}
+        uid = os.getuid()
+        me = os.getpid()
+        now = time.time()
+
+        chrome = []
+        for process in psutil.process_iter():
+            try:
+                if process.uids().real == uid and _is_chrome(process):
+                    chrome.append(process)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        in_use = {_profile_dir(p) for p in chrome if not _is_crashpad(p)}
+
+        orphans = []
+        for process in chrome:
+            if process.pid in tracked_pids:
+                continue
+            try:
+                ppid = process.ppid()
+                name = process.name()
+                age = now - process.create_time()
+                parent = process.parent()
+            except psutil.NoSuchProcess:
+                continue
+            if parent is not None and _is_chrome(parent):
+                continue  # Killed with its parent
+            if not _runs_on_pool_profile(process):
+                continue
+            if "crashpad" in name:
+                directory = _profile_dir(process)
+                orphaned = directory is not None and directory not in in_use
+            elif ppid == me:
+                # Ours but never tracked, or we run as PID 1 and adopted it
+                orphaned = age > self.orphan_grace
+            else:
+                orphaned = ppid in (0, 1) or parent is None
+            if orphaned:
+                orphans.append(process)
+
+        killed = 0
+        for orphan in orphans:
+            try:
+                processes = [orphan, *orphan.children(recursive=True)]
+            except psutil.NoSuchProcess:
+                continue
+            killed += kill_tree(processes, timeout=1)
+        if orphans:
+            self._count_kill("orphan", killed)
+            print(f"Reaped {len(orphans)} orphaned Chrome processes")
+
+        self._remove_stale_profiles(in_use)
+        return killed
+
+    def _remove_stale_profiles(self, in_use: Set[Optional[str]]) -> None:
+        base = config.CHROME_PROFILES_BASE_PATH
+        with self._lock:
+            tracked = {s.user_data_dir for s in self._tracked}
+        try:
+            names = os.listdir(base)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(os.path.realpath(base), name)
+            if not name.startswith(PROFILE_PREFIX) or path in in_use:
+                continue
+            if path in {os.path.realpath(d) for d in tracked}:
+                continue
+            try:
+                # Directories are created a moment before their browser starts
+                if time.time() - os.path.getmtime(path) < self.orphan_grace:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+
+    def run_once(self) -> None:
+        self.sample()
+        self.reap_orphans()
+
+    def _loop(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Browser supervisor failed: {str(e)}")
+
+    def start(self) -> None:
+        """Reap orphans left by a previous run, then supervise in a thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._loop, name="browser-supervisor", daemon=True
+            )
+        try:
+            self.reap_orphans()
+        except Exception as e:
+            print(f"Browser supervisor failed: {str(e)}")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop supervising and wait for the thread, `start` works again after."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopped.set()
+        thread.join()
+        self._stopped.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Live browsers, processes and memory, and what was killed so far."""
+        with self._lock:
+            return {
+                "browsers": len(self._tracked),
+                "processes": self._sample["processes"],
+                "rss_bytes": self._sample["rss_bytes"],
+                "max_rss_bytes": self.max_rss,
+                "kills": dict(self._kills),
+                "recycles": dict(self._recycles),
+            }
+
+
+browser_supervisor = BrowserSupervisor()
@@ -0,0 +1,67 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Profile columns hashed together, a change log entry is recorded per group
+FIELD_GROUPS = {
+    "identity": ["fullname", "title", "image_url", "location", "profile_url"],
+    "rates": [
+        "daily_rate",
+        "response_rate",
+        "availability",
+        "experience_years",
+        "missions_count",
+    ],
+    "skills": ["top_skills", "skills", "expertise_domains", "categories"],
+    "background": ["experience", "education", "certifications"],
+    "languages": ["languages", "work_locations"],
+    "description": ["description"],
+}
+
+
+def hash_value(value: Any) -> str:
+    """Hash a JSON serialisable value, independently of dict key order."""
+    payload = json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def diff_profile(
+    data: Dict[str, Any], field_hashes: Optional[Dict[str, str]]
+) -> Tuple[Dict[str, Any], List[Dict[str, Optional[str]]]]:
+    """Compare scraped data against the stored hashes of a profile.
+
+    Groups with no column in `data` keep their stored hash.
+
+    Args:
+        data (Dict[str, Any]): Scraped profile columns
+        field_hashes (Optional[Dict[str, str]]): Stored hash per field group
+
+    Returns:
+        Tuple[Dict[str, Any], List[Dict[str, Optional[str]]]]: The columns to
+        write, including `content_hash` and `field_hashes`, empty when nothing
+        changed, and a `field`, `old_hash`, `new_hash` entry per changed group
+    """
+    old_hashes = field_hashes or {}
+    new_hashes = dict(old_hashes)
+    values: Dict[str, Any] = {}
+    changes = []
+
+    for group, columns in FIELD_GROUPS.items():
+        present = [column for column in columns if column in data]
+        if not present:
+            continue
+        new_hash = hash_value({column: data[column] for column in present})
+        if new_hash == old_hashes.get(group):
+            continue
+        new_hashes[group] = new_hash
+        values.update({column: data[column] for column in present})
+        changes.append(
+            {"field": group, "old_hash": old_hashes.get(group), "new_hash": new_hash}
+        )
+
+    if changes:
+        values["field_hashes"] = new_hashes
+        values["content_hash"] = hash_value(new_hashes)
+    return values, changes
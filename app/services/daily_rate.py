@@ -0,0 +1,25 @@
+import re
+from typing import Optional
+
+# Malt FR shows rates as "450 €", "1 200 €/jour" or "450,50 €"
+AMOUNT_PATTERN = re.compile(r"\d[\d\s\u00a0\u202f.,]*")
+FOREIGN_CURRENCIES = ("$", "£", "CHF", "USD", "GBP")
+
+
+def parse_daily_rate(text: Optional[str]) -> Optional[int]:
+    """Parse a displayed daily rate into whole euros.
+
+    Returns:
+        Optional[int]: The rate in euros, None when missing, unparseable or
+        in another currency
+    """
+    if not text or any(currency in text for currency in FOREIGN_CURRENCIES):
+        return None
+    match = AMOUNT_PATTERN.search(text)
+    if not match:
+        return None
+    amount = re.sub(r"[\s\u00a0\u202f]", "", match.group()).rstrip(".,")
+    # A separator followed by 3 digits groups thousands, otherwise decimals
+    amount = re.sub(r"[.,](?=\d{3}(?:\D|$))", "", amount)
+    amount = re.split(r"[.,]", amount)[0]
+    return int(amount) if amount else None
@@ -0,0 +1,257 @@
+import csv
+import importlib.util
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import zstandard
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.malt_profile import MaltProfile
+from app.services.search_service import search_filters
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+COMPRESSIONS = {"gzip": "gz", "zstd": "zst"}
+
+EXPORT_COLUMNS = [
+    MaltProfile.profile_id,
+    MaltProfile.fullname,
+    MaltProfile.title,
+    MaltProfile.experience_years,
+    MaltProfile.categories,
+    MaltProfile.daily_rate,
+    MaltProfile.daily_rate_eur,
+    MaltProfile.image_url,
+    MaltProfile.profile_url,
+    MaltProfile.location,
+    MaltProfile.work_locations,
+    MaltProfile.top_skills,
+    MaltProfile.skills,
+    MaltProfile.response_rate,
+    MaltProfile.languages,
+    MaltProfile.availability,
+    MaltProfile.missions_count,
+    MaltProfile.description,
+    MaltProfile.education,
+    MaltProfile.expertise_domains,
+    MaltProfile.experience,
+    MaltProfile.certifications,
+    MaltProfile.content_hash,
+    MaltProfile.last_scraped_at,
+    MaltProfile.content_changed_at,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+# Kept as numbers in Parquet, every other column is text
+INTEGER_FIELDS = {"daily_rate_eur", "missions_count"}
+TIMESTAMP_FIELDS = {"last_scraped_at", "content_changed_at"}
+
+
+def _text(value: Any) -> Optional[str]:
+    """Flatten a column value for CSV and Parquet, lists become JSON."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class NdjsonEncoder:
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return "".join(
+            json.dumps(row, ensure_ascii=False, default=_text) + "\n" for row in rows
+        ).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(EXPORT_FIELDS)
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        for row in rows:
+            self._writer.writerow([_text(row[field]) for field in EXPORT_FIELDS])
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode()
+
+    def close(self) -> bytes:
+        return self.encode([])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands what was written back in chunks."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """One row group per fetched batch, written as soon as it is full."""
+
+    def __init__(self, compression: Optional[str]):
+        # Optional, only Parquet exports need it
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        def arrow_type(field: str):
+            if field in INTEGER_FIELDS:
+                return pa.int64()
+            if field in TIMESTAMP_FIELDS:
+                return pa.timestamp("us", tz="UTC")
+            return pa.string()
+
+        self._pa = pa
+        self._schema = pa.schema([(f, arrow_type(f)) for f in EXPORT_FIELDS])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(
+            self._sink, self._schema, compression=compression or "snappy"
+        )
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        typed = INTEGER_FIELDS | TIMESTAMP_FIELDS
+        columns = {
+            field: [row[field] if field in typed else _text(row[field]) for row in rows]
+            for field in EXPORT_FIELDS
+        }
+        self._writer.write_table(
+            self._pa.Table.from_pydict(columns, schema=self._schema)
+        )
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def _compressor(compression: Optional[str]):
+    if compression == "gzip":
+        return zlib.compressobj(wbits=31)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compressobj()
+    return None
+
+
+class ExportService:
+    """Streams scraped profiles out of the database in constant memory.
+
+    Rows are read through a server-side cursor `batch_size` at a time and
+    each batch is encoded, compressed and yielded before the next is read.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+
+    async def rows(
+        self, changed_since: Optional[datetime] = None, **filters: Any
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield batches of scraped profiles matching the search filters.
+
+        Args:
+            changed_since: Only profiles whose content changed since then
+            **filters: Arguments of `search_filters`
+        """
+        clauses = search_filters(**filters)
+        if changed_since is not None:
+            clauses.append(MaltProfile.content_changed_at >= changed_since)
+        query = (
+            select(*EXPORT_COLUMNS)
+            .where(and_(*clauses))
+            .order_by(MaltProfile.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        result = await self.db.stream(query)
+        async for rows in result.mappings().partitions():
+            yield [dict(row) for row in rows]
+
+    async def export(
+        self,
+        format: str = "ndjson",
+        compression: Optional[str] = None,
+        changed_since: Optional[datetime] = None,
+        **filters: Any,
+    ) -> AsyncIterator[bytes]:
+        """Yield the export file in chunks.
+
+        Parquet compresses its pages itself, so `compression` picks its
+        codec instead of wrapping the file.
+
+        Raises:
+            ValueError: If the options are invalid, see `check_options`
+        """
+        self.check_options(format, compression)
+        if format == "parquet":
+            encoder = ParquetEncoder(compression)
+        else:
+            encoder = NdjsonEncoder() if format == "ndjson" else CsvEncoder()
+        compressor = None if format == "parquet" else _compressor(compression)
+        async for rows in self.rows(changed_since=changed_since, **filters):
+            chunk = encoder.encode(rows)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        chunk = encoder.close()
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def check_options(format: str, compression: Optional[str]) -> None:
+        """Validate export options before a response starts streaming.
+
+        Raises:
+            ValueError: If the format or compression is unknown, or Parquet
+                is asked without pyarrow installed
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Invalid format: {format}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid compression: {compression}")
+        if format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise ValueError("Parquet export requires pyarrow")
+
+    @staticmethod
+    def filename(format: str, compression: Optional[str]) -> str:
+        name = f"profiles.{FORMATS[format][1]}"
+        if compression and format != "parquet":
+            name += f".{COMPRESSIONS[compression]}"
+        return name
+
+    @staticmethod
+    def media_type(format: str, compression: Optional[str]) -> str:
+        if compression and format != "parquet":
+            return "application/gzip" if compression == "gzip" else "application/zstd"
+        return FORMATS[format][0]
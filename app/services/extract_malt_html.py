@@ -0,0 +1,100 @@
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from app.services.extract_malt_info import SELECTORS
+
+# Fields a parse must fill to be trusted without the browser
+REQUIRED_FIELDS = ("fullname", "title")
+
+
+class ExtractMaltHtml:
+    """Extract profile fields from raw profile HTML, without a browser.
+
+    Port of `ExtractMaltInfo` on BeautifulSoup using the same `SELECTORS`.
+    Fields missing from the markup are completed from the JSON-LD `Person`
+    the page embeds, when there is one.
+    """
+
+    def __init__(self, html: str, url: Optional[str] = None):
+        self.soup = BeautifulSoup(html, "html.parser")
+        self.url = url
+
+    def _text(self, key: str) -> Optional[str]:
+        element = self.soup.select_one(SELECTORS[key])
+        if element is None:
+            return None
+        return element.get_text(" ", strip=True) or None
+
+    def _texts(self, key: str) -> List[str]:
+        return [
+            element.get_text(" ", strip=True)
+            for element in self.soup.select(SELECTORS[key])
+        ]
+
+    def _attribute(self, key: str, name: str) -> Optional[str]:
+        element = self.soup.select_one(SELECTORS[key])
+        return element.get(name) if element is not None else None
+
+    def embedded_person(self) -> Dict[str, Any]:
+        """Return the JSON-LD `Person` embedded in the page, if any."""
+        for script in self.soup.select('script[type="application/ld+json"]'):
+            try:
+                data = json.loads(script.string or "")
+            except json.JSONDecodeError:
+                continue
+            for item in data if isinstance(data, list) else [data]:
+                if isinstance(item, dict) and item.get("@type") == "Person":
+                    return item
+        return {}
+
+    def extract(self) -> Dict[str, Any]:
+        image_url = self._attribute("image_url", "src")
+        if image_url and self.url:
+            image_url = urljoin(self.url, image_url)
+
+        data = {
+            "fullname": self._text("fullname"),
+            "title": self._text("title"),
+            "categories": self._texts("categories"),
+            "daily_rate": self._text("daily_rate"),
+            "response_rate": self._text("response_rate"),
+            "experience_years": self._text("experience_years"),
+            "image_url": image_url,
+            "top_skills": self._texts("top_skills"),
+            "skills": self._texts("skills"),
+            "location": self._text("location"),
+            "work_locations": self._texts("work_locations"),
+            "languages": [
+                {"name": name, "level": None} for name in self._texts("languages")
+            ],
+            "availability": self._attribute("availability", "title"),
+            "expertise_domains": self._texts("expertise_domains"),
+            "missions_count": len(self.soup.select(SELECTORS["missions"])),
+            "description": self._text("description"),
+            "certifications": [
+                {"name": name, "date": None, "description": None}
+                for name in self._texts("certifications")
+            ],
+        }
+
+        person = self.embedded_person()
+        if person:
+            address = person.get("address") or {}
+            image = person.get("image")
+            data["fullname"] = data["fullname"] or person.get("name")
+            data["title"] = data["title"] or person.get("jobTitle")
+            data["image_url"] = data["image_url"] or (
+                image.get("url") if isinstance(image, dict) else image
+            )
+            if isinstance(address, dict):
+                data["location"] = data["location"] or address.get("addressLocality")
+            data["description"] = data["description"] or person.get("description")
+
+        return data
+
+    @staticmethod
+    def is_complete(data: Dict[str, Any]) -> bool:
+        return all(data.get(key) for key in REQUIRED_FIELDS)
@@ -1,14 +1,108 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-import random
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from app.core.config import config
+from app.core.metrics import EXTRACT_FIELDS_TOTAL, FIELD_SECONDS, span
+import time
+
+# CSS selectors of every extracted field, shared by all extraction modes
+SELECTORS = {
+    "header": ".profile-header__grid",
+    "fullname": ".profile-headline-read-fullname",
+    "title": ".profile-headline-read-headline",
+    "daily_rate": ".block-list__price",
+    "response_rate": "[data-testid='answer-rate-indicator'] .profile-indicators-content",
+    "experience_years": "[data-testid='profile-level-indicator'] .profile-indicators-content",
+    "image_url": ".profile-photo_wrapper img",
+    "top_skills": '[data-testid="profile-main-skill-set-top-skills-list"] .profile-edition__skills_item__tag__link__content',
+    "skills": '[data-testid="profile-main-skill-set-selected-skills-list"] .profile-edition__skills_item__tag__link__content',
+    "location": "[data-testid='profile-location-preference-address']",
+    "work_locations": ".profile-workplace-preferences__item li",
+    "expertise_domains": ".profile-skills-read-only .profile-edition__skills_item__tag__link__content",
+    "certifications": ".profile-certifications__list-item__main-content-title",
+    "availability": ".joy-availability",
+    "languages": ".profile-languages__item__title",
+    "categories": ".categories__list-item .joy-link__text",
+    "missions": ".profile-experiences__list-item",
+    "description": '[data-testid="profile-description"]',
+}
+
+# Reads every field in the page and returns them in a single round-trip.
+# Called with SELECTORS as its only argument, returns null until the profile
+# header is rendered.
+EXTRACT_SCRIPT = """
+const s = arguments[0];
+const one = (selector) => document.querySelector(selector);
+const text = (selector) => {
+    const el = one(selector);
+    return el ? el.innerText.trim() : null;
+};
+const texts = (selector) =>
+    Array.from(document.querySelectorAll(selector), (el) => el.innerText.trim());
+
+if (!one(s.header)) {
+    return null;
+}
+
+const image = one(s.image_url);
+const availability = one(s.availability);
+
+return {
+    fullname: text(s.fullname),
+    title: text(s.title),
+    categories: texts(s.categories),
+    daily_rate: text(s.daily_rate),
+    response_rate: text(s.response_rate),
+    experience_years: text(s.experience_years),
+    image_url: image ? image.src : null,
+    top_skills: texts(s.top_skills),
+    skills: texts(s.skills),
+    location: text(s.location),
+    work_locations: texts(s.work_locations),
+    languages: texts(s.languages).map((name) => ({name: name, level: null})),
+    availability: availability ? availability.getAttribute("title") : null,
+    expertise_domains: texts(s.expertise_domains),
+    missions_count: document.querySelectorAll(s.missions).length,
+    description: text(s.description),
+    certifications: texts(s.certifications).map(
+        (name) => ({name: name, date: null, description: null})
+    ),
+};
+"""
+
+# Document state and number of resources loaded so far, used to detect idle
+NETWORK_STATE_SCRIPT = """
+return [document.readyState, performance.getEntriesByType("resource").length];
+"""
 
 
 class ExtractMaltInfo:
-    def __init__(self, driver):
+    """Extract profile fields from a loaded Malt profile page.
+
+    Modes (see `EXTRACTION_MODE`):
+        script: read every field with one `execute_script` call, falling back
+            to selectors when the page does not match
+        selectors: one WebDriver lookup per field
+        compare: run both, print their timings and differences
+    """
+
+    def __init__(
+        self,
+        driver,
+        workspace_path: Optional[str] = None,
+        mode=None,
+        page_ready_timeout: Optional[int] = None,
+    ):
         self.driver = driver
+        self.workspace_path = workspace_path
+        self.mode = mode or config.EXTRACTION_MODE
+        self.page_ready_timeout = page_ready_timeout or config.PAGE_READY_TIMEOUT
+        self.timings: Dict[str, float] = {}
+        # Whether each field was found on the page
+        self.field_presence: Dict[str, bool] = {}
+        self._ready = False
 
     def wait_for_element(self, by, value, timeout=20):
         """Wait for an element and return it once found"""
@@ -20,6 +114,8 @@ class ExtractMaltInfo:
         except TimeoutException:
             print(f"Timeout waiting for element: {value}")
             # Save page source for debugging
+            if not self.workspace_path:
+                raise
             try:
                 with open(self.workspace_path + "/page_source.html", "w") as f:
                     f.write(self.driver.page_source)
@@ -31,184 +127,182 @@ class ExtractMaltInfo:
             raise
 
     def extract(self) -> Dict[str, Any]:
-        try:
-            # Try to find any element that would indicate the page loaded
-            self.wait_for_element(By.TAG_NAME, "body")
-            print("Body element found")
-        except TimeoutException:
-            print("Failed to find body element")
-            raise
+        # Both modes share the readiness wait, a page that never renders the
+        # profile header fails here rather than once per mode
+        self.wait_for_page_ready()
+        data = self._extract()
+        for key, found in self.field_presence.items():
+            EXTRACT_FIELDS_TOTAL.labels(
+                field=key, presence="found" if found else "missing"
+            ).inc()
+        return data
 
-        # Print current URL to verify redirect
-        print(f"Current URL: {self.driver.current_url}")
+    def _extract(self) -> Dict[str, Any]:
+        if self.mode == "selectors":
+            return self._timed("selectors", self.extract_with_selectors)
+        if self.mode == "compare":
+            return self.compare()
 
-        # Wait for main content
-        print("Waiting for profile header...")
-        self.wait_for_element(By.CLASS_NAME, "profile-header__grid")
-        print("Profile header found")
-
-        # Extract basic info
-        print("Extracting basic info...")
-        fullname = self.wait_for_element(
-            By.CLASS_NAME, "profile-headline-read-fullname"
-        ).text
-        title = self.wait_for_element(
-            By.CLASS_NAME, "profile-headline-read-headline"
-        ).text
-
-        # Extract other fields with proper error handling
-        daily_rate = None
         try:
-            daily_rate = self.wait_for_element(
-                By.CLASS_NAME, "block-list__price"
-            ).text.strip()
-        except TimeoutException:
-            print("Daily rate not found")
+            data = self._timed("script", self.extract_with_script)
+            if data.get("fullname"):
+                return data
+            print("Script extraction incomplete, falling back to selectors")
+        except (TimeoutException, WebDriverException) as e:
+            print(f"Script extraction failed, falling back to selectors: {str(e)}")
+        return self._timed("selectors", self.extract_with_selectors)
 
-        # extract response rate
-        response_rate = None
+    def _timed(self, mode: str, extract) -> Dict[str, Any]:
+        started_at = time.perf_counter()
         try:
-            response_rate = self.wait_for_element(
-                By.CSS_SELECTOR,
-                "[data-testid='answer-rate-indicator'] .profile-indicators-content",
-            ).text.strip()
-        except TimeoutException:
-            print("Response rate not found")
+            return extract()
+        finally:
+            self.timings[mode] = time.perf_counter() - started_at
+            print(f"Extraction ({mode}) took {self.timings[mode]:.3f}s")
 
-        experience_years = None
+    def compare(self) -> Dict[str, Any]:
+        """Run both extraction modes and report their timing and differences."""
+        script_data = None
         try:
-            experience_years = self.wait_for_element(
-                By.CSS_SELECTOR,
-                "[data-testid='profile-level-indicator'] .profile-indicators-content",
-            ).text.strip()
-        except TimeoutException:
-            print("Experience years not found")
+            script_data = self._timed("script", self.extract_with_script)
+        except (TimeoutException, WebDriverException) as e:
+            print(f"Script extraction failed: {str(e)}")
+        selectors_data = self._timed("selectors", self.extract_with_selectors)
 
-        image_url = None
-        try:
-            image_url = self.wait_for_element(
-                By.CSS_SELECTOR, ".profile-photo_wrapper img"
-            ).get_attribute("src")
-        except TimeoutException:
-            print("Image URL not found")
+        if script_data is not None:
+            speedup = self.timings["selectors"] / max(self.timings["script"], 1e-6)
+            print(f"Script extraction is {speedup:.1f}x faster than selectors")
+            for key, value in selectors_data.items():
+                if script_data.get(key) != value:
+                    print(f"Mismatch on {key}: {script_data.get(key)!r} != {value!r}")
 
-        # Extract skills
-        top_skills = []
-        skills = []
-        try:
-            skills_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                '[data-testid="profile-main-skill-set-top-skills-list"] .profile-edition__skills_item__tag__link__content',
-            )
-            top_skills = [skill.text for skill in skills_elements]
-            skills_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                '[data-testid="profile-main-skill-set-selected-skills-list"] .profile-edition__skills_item__tag__link__content',
-            )
-            skills = [skill.text for skill in skills_elements]
-        except:
-            print("Skills not found")
+        return (
+            script_data
+            if script_data and script_data.get("fullname")
+            else selectors_data
+        )
 
-        # Extract locations
-        location = None
-        try:
-            location = self.wait_for_element(
-                By.CSS_SELECTOR, "[data-testid='profile-location-preference-address']"
-            ).text.strip()
-        except:
-            print("Location not found")
-
-        # Extract work locations
-        work_locations = []
-        try:
-            work_locations_elements = self.driver.find_elements(
-                By.CSS_SELECTOR, ".profile-workplace-preferences__item li"
-            )
-            work_locations = [location.text for location in work_locations_elements]
-        except:
-            print("Work locations not found")
+    def wait_for_page_ready(self) -> None:
+        """Wait once for the profile to be rendered.
 
-        # Extract languages
-        expertise_domains = []
-        try:
-            expertise_domains_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                ".profile-skills-read-only .profile-edition__skills_item__tag__link__content",
-            )
-            expertise_domains = [domain.text for domain in expertise_domains_elements]
-        except:
-            print("Expertise domains not found")
+        Waits for the profile header, then for the document to be complete and
+        the resource count to stop growing for `NETWORK_IDLE_MS`. Once ready,
+        every field is read without waiting, an absent field costs nothing.
+        """
+        if self._ready:
+            return
 
-        # Extract certifications
-        certifications = []
-        try:
-            certifications_elements = self.driver.find_elements(
-                By.CSS_SELECTOR,
-                ".profile-certifications__list-item__main-content-title",
-            )
-            certifications = [
-                {
-                    "name": certification.text,
-                    "date": None,
-                    "description": None,
-                }
-                for certification in certifications_elements
-            ]
-        except:
-            print("Certifications not found")
-
-        # Extract availability
-        availability: str = None
-        try:
-            availability = self.wait_for_element(
-                By.CLASS_NAME, "joy-availability", timeout=5
-            ).get_attribute("title")
-        except TimeoutException:
-            print("Availability not found")
+        with span("page_ready"):
+            self._wait_until_rendered()
+        self._ready = True
 
-        # Extract languages
-        languages = []
-        try:
-            languages_elements = self.driver.find_elements(
-                By.CSS_SELECTOR, ".profile-languages__item__title"
-            )
-            languages = [
-                {"name": language.text, "level": None}
-                for language in languages_elements
-            ]
-        except:
-            print("Languages not found")
-
-        # Categories
-        categories = []
-        try:
-            categories_elements = self.driver.find_elements(
-                By.CSS_SELECTOR, ".categories__list-item .joy-link__text"
-            )
-            categories = [category.text for category in categories_elements]
-        except:
-            print("Categories not found")
+    def _wait_until_rendered(self) -> None:
+        self.wait_for_element(
+            By.CSS_SELECTOR, SELECTORS["header"], timeout=self.page_ready_timeout
+        )
 
-        # Extract missions count
-        missions_count = None
-        try:
-            missions_count = len(
-                self.driver.find_elements(
-                    By.CLASS_NAME, "profile-experiences__list-item"
-                )
-            )
-        except TimeoutException:
-            print("Missions count not found")
+        # Network idle is best effort, a chatty page must not block extraction
+        deadline = time.monotonic() + config.NETWORK_IDLE_TIMEOUT
+        idle_for = config.NETWORK_IDLE_MS / 1000
+        last_count = None
+        stable_since = time.monotonic()
+        while time.monotonic() < deadline:
+            state, count = self.driver.execute_script(NETWORK_STATE_SCRIPT)
+            now = time.monotonic()
+            if state != "complete" or count != last_count:
+                last_count = count
+                stable_since = now
+            elif now - stable_since >= idle_for:
+                break
+            time.sleep(0.1)
 
-        # Extract description
-        description = None
-        try:
-            description = self.wait_for_element(
-                By.CSS_SELECTOR, '[data-testid="profile-description"]', timeout=5
-            ).text.strip()
-        except TimeoutException:
-            print("Description not found")
+    def probe(self, key: str):
+        """Find the elements of an optional field without waiting."""
+        with FIELD_SECONDS.labels(field=key).time():
+            elements = self.driver.find_elements(By.CSS_SELECTOR, SELECTORS[key])
+        self.field_presence[key] = bool(elements)
+        return elements
+
+    def extract_with_script(self) -> Dict[str, Any]:
+        """Read every field in a single `execute_script` round-trip."""
+        self.wait_for_page_ready()
+        data = self.driver.execute_script(EXTRACT_SCRIPT, SELECTORS)
+        if data is None:
+            raise TimeoutException("Profile header not rendered")
+        for key, value in data.items():
+            # Keyed like `probe`, where no missions is missing too
+            key = "missions" if key == "missions_count" else key
+            self.field_presence[key] = value not in (None, "", [], 0)
+        print(f"Extraction completed for: {data.get('fullname')}")
+        return data
+
+    def extract_with_selectors(self) -> Dict[str, Any]:
+        """Read every field with one WebDriver lookup per field."""
+        # Print current URL to verify redirect
+        print(f"Current URL: {self.driver.current_url}")
+
+        print("Waiting for profile to render...")
+        self.wait_for_page_ready()
+        print("Profile rendered")
+
+        # Extract basic info, both are required
+        fullname_elements = self.probe("fullname")
+        title_elements = self.probe("title")
+        if not fullname_elements or not title_elements:
+            raise TimeoutException("Profile headline not found")
+        fullname = fullname_elements[0].text
+        title = title_elements[0].text
+
+        # Optional fields are probed without waiting
+        elements = self.probe("daily_rate")
+        daily_rate = elements[0].text.strip() if elements else None
+
+        elements = self.probe("response_rate")
+        response_rate = elements[0].text.strip() if elements else None
+
+        elements = self.probe("experience_years")
+        experience_years = elements[0].text.strip() if elements else None
+
+        elements = self.probe("image_url")
+        image_url = elements[0].get_attribute("src") if elements else None
+
+        top_skills = [skill.text for skill in self.probe("top_skills")]
+        skills = [skill.text for skill in self.probe("skills")]
+
+        elements = self.probe("location")
+        location = elements[0].text.strip() if elements else None
+
+        work_locations = [location.text for location in self.probe("work_locations")]
+
+        expertise_domains = [domain.text for domain in self.probe("expertise_domains")]
+
+        certifications = [
+            {
+                "name": certification.text,
+                "date": None,
+                "description": None,
+            }
+            for certification in self.probe("certifications")
+        ]
+
+        elements = self.probe("availability")
+        availability = elements[0].get_attribute("title") if elements else None
+
+        languages = [
+            {"name": language.text, "level": None}
+            for language in self.probe("languages")
+        ]
+
+        categories = [category.text for category in self.probe("categories")]
+
+        missions_count = len(self.probe("missions"))
+
+        elements = self.probe("description")
+        description = elements[0].text.strip() if elements else None
 
+        missing = [key for key, found in self.field_presence.items() if not found]
+        if missing:
+            print(f"Fields not found: {', '.join(missing)}")
         print(f"Extraction completed for: {fullname}")
 
         return {
@@ -0,0 +1,97 @@
+import os
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import config
+from app.core.metrics import span
+from app.services.extract_malt_html import ExtractMaltHtml
+from app.services.page_archive import page_archive
+from app.services.rate_limiter import ThrottledError, detect_block
+from app.services.retry_policy import ProfileNotFound
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+    # brotli and zstandard are installed, urllib3 decodes both
+    "Accept-Encoding": "gzip, deflate, br, zstd",
+}
+
+
+class IncompleteExtraction(Exception):
+    """The page was fetched but the lightweight parse missed required fields."""
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=config.HTTP_POOL_SIZE, pool_maxsize=config.HTTP_POOL_SIZE
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by every scrape so connections and TLS sessions are reused
+http_session = _create_session()
+
+
+class HttpScrapper:
+    """Scrape a profile over plain HTTP, without starting a browser.
+
+    Same interface as `MaltScrapper`, `extract_profile_data` raises
+    `IncompleteExtraction` when the page has to be rendered by a browser.
+    """
+
+    def __init__(self, profil_url=None):
+        self.profil_url = profil_url
+        self.id = self.profil_url.split("/")[-1] if self.profil_url else None
+        self.workspace_path = (
+            f"{config.WORKSPACE_BASE_PATH}/{self.id}" if self.id else None
+        )
+
+    def fetch(self) -> str:
+        response = http_session.get(self.profil_url, timeout=config.HTTP_TIMEOUT)
+        if response.status_code == 429 or (
+            response.status_code == 403 and detect_block(response.text)
+        ):
+            retry_after = response.headers.get("Retry-After", "")
+            raise ThrottledError(
+                f"HTTP {response.status_code} for {self.id}",
+                retry_after=float(retry_after) if retry_after.isdigit() else None,
+            )
+        if response.status_code in (404, 410) or "/profile/" not in response.url:
+            raise ProfileNotFound(f"Profile {self.id} not found")
+        response.raise_for_status()
+        if detect_block(response.text):
+            raise ThrottledError(f"Blocked page served for {self.id}")
+        return response.text
+
+    def extract_profile_data(self) -> Dict[str, Any]:
+        print(f"Starting HTTP extraction for URL: {self.profil_url}")
+        with span("http_fetch", profile_id=self.id):
+            html = self.fetch()
+        data = ExtractMaltHtml(html, self.profil_url).extract()
+
+        if not ExtractMaltHtml.is_complete(data):
+            # Keep the page around to improve the parser
+            if self.workspace_path:
+                os.makedirs(self.workspace_path, exist_ok=True)
+                with open(self.workspace_path + "/page_source.html", "w") as f:
+                    f.write(html)
+            raise IncompleteExtraction(f"Incomplete HTTP extraction: {self.id}")
+
+        if config.PAGE_ARCHIVE_ENABLED:
+            try:
+                page_archive.store(self.id, html, self.profil_url)
+            except Exception as e:
+                print(f"Failed to archive the page of {self.id}: {str(e)}")
+
+        print(f"Extraction completed for: {data['fullname']}")
+        return data
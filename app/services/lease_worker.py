@@ -0,0 +1,156 @@
+import asyncio
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from app.core.config import config
+from app.core.database import AsyncSessionLocal
+from app.models.malt_profile import MaltProfile
+from app.services.browser_pool import close_all_pools
+from app.services.browser_supervisor import browser_supervisor
+from app.services.profile_service import LEASE_OWNER, ProfileService
+from app.services.rate_limiter import scrape_throttle
+from app.services.shared_rate_limiter import share_rate_limits
+from app.services.worker_service import WorkerService
+
+# Seconds of completed scrapes behind `recent_per_minute`
+RECENT_WINDOW = 600
+
+
+class LeaseWorker:
+    """Scrapes the profiles it leases from the database, on any host.
+
+    Leases are taken with `ProfileService.lease_jobs` and renewed by every
+    heartbeat. When a worker dies its leases expire after
+    `WORKER_LEASE_TTL` and other workers take the profiles over. On a
+    clean stop, unfinished profiles are given back as TODO.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = config.SCRAPE_WORKERS,
+        lease_seconds: int = config.WORKER_LEASE_TTL,
+        heartbeat_interval: float = config.WORKER_HEARTBEAT_INTERVAL,
+        poll_interval: float = config.WORKER_POLL_INTERVAL,
+    ):
+        self.id = LEASE_OWNER
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="scrape-worker"
+        )
+        self._tasks: Set[asyncio.Task] = set()
+        self._stopping: Optional[asyncio.Event] = None
+        self.scraped_count = 0
+        self.failed_count = 0
+        # Monotonic times of the scrapes completed in the last RECENT_WINDOW
+        self._completed = deque()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        while self._completed and now - self._completed[0] > RECENT_WINDOW:
+            self._completed.popleft()
+        return {
+            "in_flight": len(self._tasks),
+            "scraped_count": self.scraped_count,
+            "failed_count": self.failed_count,
+            "recent_per_minute": round(len(self._completed) * 60 / RECENT_WINDOW, 2),
+        }
+
+    def _service(self, db) -> ProfileService:
+        return ProfileService(db, lease_seconds=self.lease_seconds)
+
+    async def _scrape(self, profile: MaltProfile) -> None:
+        async with AsyncSessionLocal() as db:
+            try:
+                await self._service(db).scrape_profile(profile, executor=self._executor)
+                self.scraped_count += 1
+                self._completed.append(time.monotonic())
+            except Exception as e:
+                # The failure and its retry are recorded by scrape_profile
+                self.failed_count += 1
+                print(f"Scrape of {profile.profile_id} failed: {str(e)}")
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self._service(db).renew_leases()
+                    await WorkerService(db).heartbeat(**self.stats())
+            except Exception as e:
+                print(f"Worker heartbeat failed: {str(e)}")
+
+    async def run_once(self) -> int:
+        """Lease as many profiles as there are free slots and start them."""
+        free = self.concurrency - len(self._tasks)
+        if free <= 0:
+            return 0
+        async with AsyncSessionLocal() as db:
+            profiles = await self._service(db).lease_jobs(free)
+        for profile in profiles:
+            task = asyncio.get_running_loop().create_task(self._scrape(profile))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if profiles:
+            print(f"Worker {self.id} leased {len(profiles)} profiles")
+        return len(profiles)
+
+    async def run(self) -> None:
+        """Lease and scrape until `stop` is called or SIGTERM/SIGINT."""
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        # Other workers and API processes pace the same hosts
+        share_rate_limits(scrape_throttle.limiter)
+        # Browsers of a previous worker on this host are reaped first
+        browser_supervisor.start()
+        async with AsyncSessionLocal() as db:
+            await WorkerService(db).register(self.concurrency)
+        print(f"Worker {self.id} started with {self.concurrency} slots")
+        heartbeat = loop.create_task(self._heartbeat_loop())
+
+        try:
+            while not self._stopping.is_set():
+                try:
+                    leased = await self.run_once()
+                except Exception as e:
+                    print(f"Lease attempt failed: {str(e)}")
+                    leased = 0
+                if leased == 0:
+                    # Idle or full, wake up early when a slot frees or on stop
+                    stopped = loop.create_task(self._stopping.wait())
+                    await asyncio.wait(
+                        {stopped, *self._tasks},
+                        timeout=self.poll_interval,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    stopped.cancel()
+        finally:
+            await self._shutdown(heartbeat)
+
+    async def _shutdown(self, heartbeat: asyncio.Task) -> None:
+        print(f"Worker {self.id} stopping, {len(self._tasks)} scrapes in flight")
+        if self._tasks:
+            # Running scrapes finish within their lease, the rest are released
+            await asyncio.wait(set(self._tasks), timeout=self.lease_seconds)
+        for task in list(self._tasks):
+            task.cancel()
+        heartbeat.cancel()
+        async with AsyncSessionLocal() as db:
+            released = await self._service(db).release_leases()
+            await WorkerService(db).stop(**self.stats())
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        close_all_pools()
+        browser_supervisor.stop()
+        print(f"Worker {self.id} stopped, {released} leases released")
+
+    def stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
@@ -1,12 +1,18 @@
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from app.services.extract_malt_info import ExtractMaltInfo
+from app.services.browser_pool import get_browser_pool
+from app.services.page_archive import page_archive
+from app.services.rate_limiter import ThrottledError, detect_block
+from app.services.resource_blocker import resource_blocker
+from app.services.retry_policy import ProfileNotFound
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import random
 import time
 import os
 from app.core.config import config
+from app.core.metrics import span
 import atexit
 import signal
 import sys
@@ -21,12 +27,15 @@ class MaltScrapper:
         for instance in cls._instances.copy():
             instance._cleanup(from_shutdown=True)
 
-    def __init__(self, headless=True, profil_url=None):
+    def __init__(self, headless=True, profil_url=None, pool=None):
         self.profil_url = profil_url
         self.id = self.profil_url.split("/")[-1] if self.profil_url else None
         self.workspace_path = (
             f"{config.WORKSPACE_BASE_PATH}/{self.id}" if self.id else None
         )
+        self.pool = pool or get_browser_pool(headless)
+        self.session = None
+        self.resource_stats = {}
         self.driver = None
         self.wait = None
         self._is_closing = False
@@ -38,69 +47,35 @@ class MaltScrapper:
         if self.workspace_path and not os.path.exists(self.workspace_path):
             os.makedirs(self.workspace_path)
 
-        # Chrome options
-        options = uc.ChromeOptions()
-        if headless:
-            options.add_argument("--headless=new")  # Use new headless mode
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-infobars")
-        options.add_argument(f"--user-data-dir=/home/chrome/.config/chromium")
-        options.add_argument(f"--disk-cache-dir=/home/chrome/.cache/chromium")
-        options.binary_location = os.getenv(
-            "CHROME_EXECUTABLE_PATH", "/usr/bin/chromium"
-        )
-
-        # Create driver with options
+        # Check a warm browser out of the pool
         try:
-            print("Initializing Chrome driver...")
-            self.driver = uc.Chrome(
-                options=options,
-                browser_executable_path=options.binary_location,
-                driver_executable_path="/usr/bin/chromedriver",
-                version_main=119,
-                headless=headless,
-                use_subprocess=True,  # Changed to True for better process management
-            )
-            print("Chrome driver initialized successfully")
+            print("Acquiring Chrome session from pool...")
+            with span("browser_acquire"):
+                self.session = self.pool.acquire()
+            self.driver = self.session.driver
             self.wait = WebDriverWait(self.driver, 20)  # Increased timeout
         except Exception as e:
-            print(f"Error initializing Chrome driver: {str(e)}")
+            print(f"Error acquiring Chrome session: {str(e)}")
             raise e
 
-    def _cleanup(self, from_shutdown=False):
-        """Internal cleanup method"""
+    def _cleanup(self, from_shutdown=False, discard=False):
+        """Internal cleanup method, hands the browser back to the pool"""
         if self._is_closing:
             return
 
         self._is_closing = True
         try:
-            if self.driver:
+            if self.session:
                 if not from_shutdown:
-                    print("Closing Chrome driver...")
-                    try:
-                        self.driver.quit()
-                    except:
-                        # If quit fails, try to close the browser
-                        try:
-                            self.driver.close()
-                        except:
-                            pass
-                else:
-                    # During shutdown, just try to close the browser window
-                    try:
-                        self.driver.close()
-                    except:
-                        pass
+                    print("Releasing Chrome session...")
+                # During shutdown the browser is quit rather than reused
+                self.pool.release(self.session, discard=discard or from_shutdown)
+                self.session = None
                 self.driver = None
                 self.wait = None
         except Exception as e:
             if not from_shutdown:
-                print(f"Error closing Chrome driver: {str(e)}")
+                print(f"Error releasing Chrome session: {str(e)}")
         finally:
             MaltScrapper._instances.discard(self)
             self._is_closing = False
@@ -119,92 +94,162 @@ class MaltScrapper:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def take_full_page_screenshot(self, url):
-        """Take a full page screenshot of the given URL.
+    def take_full_page_screenshot(self):
+        """Take a full page screenshot of the current page.
 
-        Args:
-            url (str): The URL to take a screenshot of
+        The page is captured beyond the viewport through CDP, so the window
+        is never resized. Decoding and writing the PNG happen in the
+        background.
 
         Returns:
-            str: Path to the saved screenshot
+            str: Path the screenshot is being saved to
         """
         try:
-            # Navigate to the URL
-            self.driver.get(url)
-
-            # Wait for the page to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-
-            # Get the page height by executing JavaScript
-            total_height = self.driver.execute_script(
-                """
-                return Math.max(
-                    document.body.scrollHeight,
-                    document.documentElement.scrollHeight,
-                    document.body.offsetHeight,
-                    document.documentElement.offsetHeight,
-                    document.body.clientHeight,
-                    document.documentElement.clientHeight
-                );
-            """
+            metrics = self.driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+            size = metrics.get("cssContentSize") or metrics["contentSize"]
+            screenshot = self.driver.execute_cdp_cmd(
+                "Page.captureScreenshot",
+                {
+                    "format": "png",
+                    "captureBeyondViewport": True,
+                    "clip": {
+                        "x": 0,
+                        "y": 0,
+                        "width": size["width"],
+                        "height": size["height"],
+                        "scale": 1,
+                    },
+                },
             )
+        except (TimeoutException, WebDriverException, KeyError) as e:
+            print(f"Failed to take screenshot: {str(e)}")
+            return None
 
-            # Set window size to capture full page
-            self.driver.set_window_size(1920, total_height)
-
-            # Take screenshot
-            screenshot_path = f"{self.workspace_path}/full_page.png"
-            self.driver.save_screenshot(screenshot_path)
+        screenshot_path = f"{self.workspace_path}/full_page.png"
+        _artifacts_executor.submit(_write_base64, screenshot_path, screenshot["data"])
+        return screenshot_path
 
-            return screenshot_path
+    def _should_screenshot(self, requested, failed):
+        """Decide whether to capture a screenshot for this scrape.
 
-        except (TimeoutException, WebDriverException) as e:
-            print(f"Failed to take screenshot: {str(e)}")
-            return None
+        Args:
+            requested (Optional[bool]): Per request flag, overrides the config
+            failed (bool): Whether the extraction failed
+        """
+        if requested is not None:
+            return requested
+        mode = config.SCREENSHOT_MODE
+        if mode == "always":
+            return True
+        if mode == "failure":
+            return failed
+        if mode == "sample":
+            return failed or random.randrange(config.SCREENSHOT_SAMPLE_RATE) == 0
+        return False
+
+    def _capture_screenshot(self):
+        with span("screenshot", profile_id=self.id):
+            screenshot_path = self.take_full_page_screenshot()
+        if screenshot_path:
+            print(f"Full page screenshot saved to: {screenshot_path}")
+
+    def extract_profile_data(self, screenshot=None, page_ready_timeout=None):
+        """Load the profile page once and extract its data.
 
-    def extract_profile_data(self):
+        Args:
+            screenshot (Optional[bool]): Capture a full page screenshot after
+                extraction, defaults to `SCREENSHOT_MODE`
+            page_ready_timeout (Optional[int]): Seconds to wait for the
+                profile to render, defaults to `PAGE_READY_TIMEOUT`
+
+        Raises:
+            ProfileNotFound: The browser was redirected away from the profile
+            ThrottledError: A captcha or blocked page was served
+        """
+        discard = False
         try:
             print(f"Starting extraction for URL: {self.profil_url}")
 
-            # Take full page screenshot before scraping
-            screenshot_path = self.take_full_page_screenshot(self.profil_url)
-            if screenshot_path:
-                print(f"Full page screenshot saved to: {screenshot_path}")
-
-            # Navigate to profile URL if not already there
-            if self.driver.current_url != self.profil_url:
+            resource_blocker.reset(self.driver)
+            with span("navigate", profile_id=self.id):
                 self.driver.get(self.profil_url)
 
-            # Set window size before navigating
-            self.driver.set_window_size(1920, 1080)
-
-            # Wait for page load
-            # time.sleep(1)  # Initial wait
-            # print("Checking if page loaded...")
+            with span("extract", profile_id=self.id):
+                data = ExtractMaltInfo(
+                    self.driver,
+                    self.workspace_path,
+                    page_ready_timeout=page_ready_timeout,
+                ).extract()
+
+            self.resource_stats = resource_blocker.collect(self.driver)
+            if self.resource_stats:
+                print(f"Resources: {self.resource_stats}")
+
+            if self._should_screenshot(screenshot, failed=False):
+                self._capture_screenshot()
+
+            if config.PAGE_ARCHIVE_ENABLED:
+                with span("archive", profile_id=self.id):
+                    page_source = self.driver.page_source
+                _artifacts_executor.submit(
+                    _archive_page, self.id, page_source, self.profil_url
+                )
 
-            return ExtractMaltInfo(self.driver).extract()
+            return data
 
         except Exception as e:
             print(f"Error during extraction: {str(e)}")
+            # A crashed browser must not go back to the pool
+            discard = isinstance(e, WebDriverException) and not isinstance(
+                e, TimeoutException
+            )
             # Save page source for debugging
+            page_source = None
             try:
+                page_source = self.driver.page_source
                 with open(self.workspace_path + "/page_source.html", "w") as f:
-                    f.write(self.driver.page_source)
+                    f.write(page_source)
                 print(
                     "Page source saved to " + self.workspace_path + "/page_source.html"
                 )
             except Exception as save_error:
                 print(f"Failed to save page source: {str(save_error)}")
+            if not discard and self._should_screenshot(screenshot, failed=True):
+                self._capture_screenshot()
+            if detect_block(page_source):
+                raise ThrottledError(f"Blocked page served for {self.id}") from e
+            current_url = None if discard else self._current_url()
+            if current_url and "/profile/" not in current_url:
+                raise ProfileNotFound(f"Profile {self.id} not found") from e
             raise e
 
         finally:
-            try:
-                print("Quitting driver...")
-                self.driver.quit()
-            except:
-                pass
+            self._cleanup(discard=discard)
+
+    def _current_url(self):
+        try:
+            return self.driver.current_url
+        except WebDriverException:
+            return ""
+
+
+def _write_base64(path, data):
+    try:
+        with open(path, "wb") as f:
+            f.write(base64.b64decode(data))
+    except Exception as e:
+        print(f"Failed to save {path}: {str(e)}")
+
+
+def _archive_page(profile_id, html, url):
+    try:
+        page_archive.store(profile_id, html, url)
+    except Exception as e:
+        print(f"Failed to archive the page of {profile_id}: {str(e)}")
+
+
+# Screenshots and archived pages are written off the scraping thread
+_artifacts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
 
 
 def signal_handler(signum, frame):
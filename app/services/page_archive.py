@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import zstandard
+
+from app.core.config import config
+
+# Dictionary ID of pages compressed without a dictionary
+NO_DICTIONARY = 0
+
+
+class PageArchive:
+    """Content-addressed archive of scraped pages, zstd compressed.
+
+    Layout under `root`:
+
+        objects/<sha[:2]>/<sha>.zst  page HTML keyed by its SHA-256
+        refs/<profile_id>.jsonl      one line per scrape: time, URL, SHA-256
+        dictionaries/<id>.zdict      shared dictionaries, `current` names the
+                                     one new pages are compressed with
+
+    Malt pages share most of their markup, a dictionary trained on a sample
+    of them compresses each page several times better than zstd alone.
+    Pages name their dictionary in the zstd frame header, so older pages
+    stay readable when a new dictionary is trained.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+        self._lock = threading.Lock()
+        self._dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+
+    @property
+    def root(self) -> str:
+        # Resolved on use, tools point the workspace elsewhere at runtime
+        return (
+            self._root
+            or config.PAGE_ARCHIVE_PATH
+            or os.path.join(config.WORKSPACE_BASE_PATH, "archive")
+        )
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def _object_path(self, digest: str) -> str:
+        return self._path("objects", digest[:2], f"{digest}.zst")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def dictionary(self, dict_id: int) -> Optional[zstandard.ZstdCompressionDict]:
+        """Load a dictionary by ID, None for `NO_DICTIONARY`."""
+        if dict_id == NO_DICTIONARY:
+            return None
+        with self._lock:
+            if dict_id not in self._dictionaries:
+                with open(self._path("dictionaries", f"{dict_id}.zdict"), "rb") as f:
+                    self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(
+                        f.read()
+                    )
+            return self._dictionaries[dict_id]
+
+    def current_dictionary_id(self) -> int:
+        try:
+            with open(self._path("dictionaries", "current")) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return NO_DICTIONARY
+
+    def store(
+        self,
+        profile_id: str,
+        html: str,
+        url: Optional[str] = None,
+        scraped_at: Optional[datetime] = None,
+    ) -> str:
+        """Archive the page of a scrape, returns its SHA-256.
+
+        Identical pages are stored once, every scrape still gets a ref.
+        """
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            compressor = zstandard.ZstdCompressor(
+                level=config.PAGE_ARCHIVE_LEVEL,
+                dict_data=self.dictionary(self.current_dictionary_id()),
+            )
+            self._write_atomic(path, compressor.compress(raw))
+
+        ref = {
+            "scraped_at": (scraped_at or datetime.now(timezone.utc)).isoformat(),
+            "sha256": digest,
+            "size": len(raw),
+            "url": url,
+        }
+        os.makedirs(self._path("refs"), exist_ok=True)
+        # Single short appends, safe across threads and processes
+        with open(self._path("refs", f"{profile_id}.jsonl"), "a") as f:
+            f.write(json.dumps(ref) + "\n")
+        return digest
+
+    def load(self, digest: str) -> str:
+        """Return the HTML of an archived page."""
+        with open(self._object_path(digest), "rb") as f:
+            data = f.read()
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary(dict_id))
+        return decompressor.decompress(data).decode("utf-8")
+
+    def history(self, profile_id: str) -> List[Dict[str, Any]]:
+        """Archived scrapes of a profile, oldest first."""
+        try:
+            with open(self._path("refs", f"{profile_id}.jsonl")) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def latest(self, profile_ids: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Yield the last archived scrape of each profile, with its ID."""
+        if profile_ids is None:
+            try:
+                names = sorted(os.listdir(self._path("refs")))
+            except FileNotFoundError:
+                return
+            profile_ids = [n[: -len(".jsonl")] for n in names if n.endswith(".jsonl")]
+        for profile_id in profile_ids:
+            history = self.history(profile_id)
+            if history:
+                yield {"profile_id": profile_id, **history[-1]}
+
+    def train_dictionary(self, samples: int = 500, size: int = 112640) -> int:
+        """Train a dictionary on a random sample of the latest pages.
+
+        New pages are compressed with it, existing ones are left as they are.
+
+        Returns:
+            int: ID of the new dictionary
+        """
+        refs = list(self.latest())
+        if not refs:
+            raise ValueError("The archive is empty, scrape some pages first")
+        chosen = random.sample(refs, min(samples, len(refs)))
+        pages = [self.load(ref["sha256"]).encode("utf-8") for ref in chosen]
+        dictionary = zstandard.train_dictionary(size, pages)
+        dict_id = dictionary.dict_id()
+        self._write_atomic(
+            self._path("dictionaries", f"{dict_id}.zdict"), dictionary.as_bytes()
+        )
+        self._write_atomic(self._path("dictionaries", "current"), str(dict_id).encode())
+        return dict_id
+
+    def stats(self) -> Dict[str, Any]:
+        """Pages, profiles and sizes on disk of the archive."""
+        objects = stored = 0
+        for directory, _, files in os.walk(self._path("objects")):
+            for name in files:
+                if name.endswith(".zst"):
+                    objects += 1
+                    stored += os.path.getsize(os.path.join(directory, name))
+        profiles = scrapes = raw = 0
+        try:
+            names = os.listdir(self._path("refs"))
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            history = self.history(name[: -len(".jsonl")])
+            if history:
+                profiles += 1
+                scrapes += len(history)
+                raw += history[-1]["size"]
+        return {
+            "profiles": profiles,
+            "scrapes": scrapes,
+            "pages": objects,
+            "stored_bytes": stored,
+            "latest_raw_bytes": raw,
+            "dictionary": self.current_dictionary_id(),
+        }
+
+
+page_archive = PageArchive()
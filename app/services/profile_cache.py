@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import config
+from app.services.change_detection import hash_value
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+def freshness(
+    scraped_at: Optional[datetime],
+    max_age: int = config.PROFILE_TTL,
+    stale_ttl: int = config.PROFILE_STALE_TTL,
+) -> str:
+    """Classify a scrape by age.
+
+    Returns:
+        str: FRESH within `max_age` seconds, STALE for `stale_ttl` more
+        seconds (served while a refresh runs), EXPIRED past that. Profiles
+        scraped before `last_scraped_at` was recorded count as STALE.
+    """
+    if scraped_at is None:
+        return STALE
+    age = (datetime.now(timezone.utc) - scraped_at).total_seconds()
+    if age <= max_age:
+        return FRESH
+    if age <= max_age + stale_ttl:
+        return STALE
+    return EXPIRED
+
+
+def cache_headers(
+    data: Dict[str, Any], cache: str, max_age: Optional[int] = None
+) -> Dict[str, str]:
+    """HTTP validators of a served profile: `ETag` and `Cache-Control`.
+
+    The ETag is strong, derived from the content hash and from what else the
+    response carries: scrape time, status and freshness. Fresh profiles may
+    be cached until they turn stale, stale ones must be revalidated.
+
+    Args:
+        data (Dict[str, Any]): Profile as formatted for the API
+        cache (str): "hit" or "stale", as returned by `lookup_profile`
+        max_age (Optional[int]): Max age the profile was looked up with,
+            defaults to `PROFILE_TTL`
+    """
+    max_age = config.PROFILE_TTL if max_age is None else max_age
+    scraped_at = data.get("last_scraped_at")
+    # Rows scraped before content hashes existed are hashed whole
+    content = data.get("content_hash") or hash_value(data)
+    tag = hash_value([content, scraped_at, data.get("status"), cache])
+    control = "no-cache"
+    if cache == "hit" and scraped_at is not None:
+        age = (datetime.now(timezone.utc) - scraped_at).total_seconds()
+        control = f"public, max-age={max(int(max_age - age), 0)}"
+    return {"ETag": f'"{tag}"', "Cache-Control": control}
+
+
+class ProfileCache:
+    """In-process LRU of formatted profiles, in front of the database.
+
+    Entries expire `ttl` seconds after being cached: scrapes finished by a
+    worker or another API process are not seen here until then.
+    """
+
+    def __init__(
+        self,
+        max_size: int = config.PROFILE_CACHE_SIZE,
+        ttl: float = config.PROFILE_CACHE_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale": 0, "misses": 0}
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(profile_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["cached_at"] > self.ttl:
+                del self._entries[profile_id]
+                return None
+            self._entries.move_to_end(profile_id)
+            return entry
+
+    def set(
+        self,
+        profile_id: str,
+        job_id: str,
+        data: Dict[str, Any],
+        scraped_at: Optional[datetime],
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[profile_id] = {
+                "job_id": job_id,
+                "data": data,
+                "scraped_at": scraped_at,
+                "cached_at": time.monotonic(),
+            }
+            self._entries.move_to_end(profile_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, profile_id: str) -> None:
+        with self._lock:
+            self._entries.pop(profile_id, None)
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome: "hits", "stale" or "misses"."""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
+
+
+profile_cache = ProfileCache()
+
+
+class RequestCounter:
+    """Counts profile requests in memory until they are flushed in bulk.
+
+    Keeps `/api/profile` free of writes, the recrawl scheduler stores the
+    counts with one statement per scan. Nothing is counted when it does not
+    run, and at most `max_size` profiles are counted between two scans.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.RECRAWL_ENABLED,
+        max_size: int = config.RECRAWL_REQUEST_COUNTS,
+    ):
+        self.enabled = enabled
+        self.max_size = max_size
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, profile_id: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if profile_id in self._counts or len(self._counts) < self.max_size:
+                self._counts[profile_id] = self._counts.get(profile_id, 0) + 1
+
+    def drain(self) -> Dict[str, int]:
+        """Return the counts recorded since the last drain and reset them."""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+
+request_counter = RequestCounter()
@@ -1,51 +1,649 @@
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+import asyncio
+import contextvars
+import os
+import socket
+import time
+from sqlalchemy import and_, bindparam, case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.malt_profile import MaltProfile, ProfileStatus
-from app.services.malt_scrapper import MaltScrapper
+from app.core.config import config
+from app.core.metrics import span
+
+from app.models.malt_profile import MaltProfile, MaltProfileChange, ProfileStatus
+from app.services.change_detection import diff_profile
+from app.services.daily_rate import parse_daily_rate
+from app.services.retry_policy import (
+    NOT_FOUND,
+    classify_failure,
+    page_ready_timeout,
+    retry_delay,
+)
+from app.services.profile_cache import (
+    profile_cache,
+    request_counter,
+    freshness,
+    FRESH,
+    STALE,
+)
+from app.services.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    # The browser stack loads on the first scrape, API processes serving
+    # stored profiles never pay for it
+    from app.services.browser_pool import BrowserPool
+
+# Scrapes in flight in this process, keyed by profile ID
+scrape_flight = SingleFlight()
+
+# Owner of the leases taken by this process, a scrape worker's ID
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+# Advisory lock of the recrawl scan, one API process scans at a time
+RECRAWL_LOCK = 0x6D616C74
+
+# Columns cleared by a successful scrape
+RETRY_RESET = {
+    "attempt_count": 0,
+    "next_retry_at": None,
+    "last_error": None,
+    "last_error_kind": None,
+}
+# Columns cleared once a scrape ends
+LEASE_RELEASE = {"leased_by": None, "lease_expires_at": None}
 
 
 class ProfileService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, lease_seconds: int = config.CLAIM_TIMEOUT):
+        """
+        Args:
+            db (AsyncSession): Database session
+            lease_seconds (int): Duration of the leases this service takes,
+                scrape workers renew shorter leases with heartbeats
+        """
         self.db = db
+        self.lease_seconds = lease_seconds
+
+    @staticmethod
+    def parse_profile_url(url: str) -> Tuple[str, str]:
+        """Normalise a Malt profile URL.
 
-    def get_profile_by_id(self, profile_id: str) -> Optional[MaltProfile]:
+        Returns:
+            Tuple[str, str]: The URL without query string and the profile ID
+
+        Raises:
+            ValueError: The URL is not a Malt profile URL
+        """
+        url = url.split("?")[0]
+        if not url.startswith(
+            ("https://malt.fr/profile/", "https://www.malt.fr/profile/")
+        ):
+            raise ValueError("Invalid URL")
+
+        return url, url.split("/")[-1]
+
+    async def get_profile(self, id: str) -> Optional[MaltProfile]:
+        """Get a profile by its row ID, which is also its job ID."""
+        return await self.db.scalar(select(MaltProfile).where(MaltProfile.id == id))
+
+    async def get_profile_by_id(self, profile_id: str) -> Optional[MaltProfile]:
         """Get a profile by its ID."""
-        return (
-            self.db.query(MaltProfile)
-            .filter(MaltProfile.profile_id == profile_id)
-            .first()
+        return await self.db.scalar(
+            select(MaltProfile).where(MaltProfile.profile_id == profile_id)
         )
 
-    def create_profile(self, profile_id: str, profile_url: str) -> MaltProfile:
+    async def create_profile(self, profile_id: str, profile_url: str) -> MaltProfile:
+        """Create a TODO profile, or return the row a concurrent call created."""
+        await self.db.execute(
+            insert(MaltProfile)
+            .values(
+                profile_id=profile_id,
+                profile_url=profile_url,
+                status=ProfileStatus.TODO,
+            )
+            .on_conflict_do_nothing(index_elements=[MaltProfile.profile_id])
+        )
+        await self.db.commit()
 
-        profile = MaltProfile(
-            profile_id=profile_id,
-            profile_url=profile_url,
-            status=ProfileStatus.TODO,
+        return await self.get_profile_by_id(profile_id)
+
+    async def claim_profile(
+        self, profile_id: str, profile_url: str
+    ) -> Optional[MaltProfile]:
+        """Create or lease a profile IN_PROGRESS unless another worker owns it.
+
+        A single `INSERT ... ON CONFLICT DO UPDATE ... RETURNING` statement
+        creates missing rows and claims existing ones, concurrent claims from
+        any process resolve to a single winner. IN_PROGRESS rows are taken
+        over once their lease expired, or when this process already holds it.
+
+        Returns:
+            Optional[MaltProfile]: The claimed profile, None when another
+            worker owns the scrape
+        """
+        now = datetime.now(timezone.utc)
+        lease = {
+            "status": ProfileStatus.IN_PROGRESS,
+            "leased_by": LEASE_OWNER,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            "updated_at": func.now(),
+        }
+        stmt = insert(MaltProfile).values(
+            profile_id=profile_id, profile_url=profile_url, **lease
         )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MaltProfile.profile_id],
+            set_=lease,
+            where=or_(
+                MaltProfile.status != ProfileStatus.IN_PROGRESS,
+                MaltProfile.lease_expires_at.is_(None),
+                MaltProfile.lease_expires_at < now,
+                MaltProfile.leased_by == LEASE_OWNER,
+            ),
+        ).returning(MaltProfile)
+        with span("db_claim", profile_id=profile_id):
+            claimed = await self.db.scalar(
+                select(MaltProfile)
+                .from_statement(stmt)
+                .execution_options(populate_existing=True)
+            )
+            await self.db.commit()
+        return claimed
 
-        self.db.add(profile)
-        self.db.commit()
+    async def wait_for_scrape(self, profile_id: str) -> Dict[str, Any]:
+        """Wait for the scrape another worker is running and return its result."""
+        deadline = time.monotonic() + config.CLAIM_TIMEOUT
+        while True:
+            profile = await self.db.scalar(
+                select(MaltProfile)
+                .where(MaltProfile.profile_id == profile_id)
+                .execution_options(populate_existing=True)
+            )
+            await self.db.commit()
+            if (
+                profile is None
+                or profile.status != ProfileStatus.IN_PROGRESS
+                or time.monotonic() >= deadline
+            ):
+                break
+            await asyncio.sleep(1)
 
-        return profile
+        if profile is None or profile.status != ProfileStatus.SCRAPPED:
+            raise RuntimeError(
+                f"Concurrent scrape of {profile_id} ended in "
+                f"{profile.status if profile else None}"
+            )
+        return self.format_profile_response(profile)
+
+    async def take_due_retries(self, limit: int) -> List[str]:
+        """Take up to `limit` failed profiles whose retry is due.
+
+        Their `next_retry_at` is pushed back by `CLAIM_TIMEOUT` in the same
+        statement, so other processes skip them and a retry lost with its
+        process comes back later.
+
+        Returns:
+            List[str]: Job IDs of the profiles to scrape again
+        """
+        now = datetime.now(timezone.utc)
+        due = (
+            select(MaltProfile.id)
+            .where(
+                MaltProfile.status == ProfileStatus.ERROR,
+                MaltProfile.next_retry_at <= now,
+            )
+            .order_by(MaltProfile.next_retry_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ids = (
+            await self.db.scalars(
+                update(MaltProfile)
+                .where(MaltProfile.id.in_(due.scalar_subquery()))
+                .values(next_retry_at=now + timedelta(seconds=config.CLAIM_TIMEOUT))
+                .returning(MaltProfile.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await self.db.commit()
+        return list(ids)
+
+    async def take_abandoned(self, limit: int) -> List[str]:
+        """Take up to `limit` TODO profiles left by a process that stopped.
+
+        TODO rows untouched for `CLAIM_TIMEOUT` are considered abandoned, as
+        jobs queued by a running process are scraped or claimed sooner. Their
+        `updated_at` is bumped in the same statement, so other processes skip
+        them and a job lost again comes back later.
+
+        Returns:
+            List[str]: Job IDs of the profiles to scrape
+        """
+        touched_at = func.coalesce(MaltProfile.updated_at, MaltProfile.created_at)
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=config.CLAIM_TIMEOUT)
+        abandoned = (
+            select(MaltProfile.id)
+            .where(MaltProfile.status == ProfileStatus.TODO, touched_at < cutoff)
+            .order_by(touched_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ids = (
+            await self.db.scalars(
+                update(MaltProfile)
+                .where(MaltProfile.id.in_(abandoned.scalar_subquery()))
+                .values(updated_at=func.now())
+                .returning(MaltProfile.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await self.db.commit()
+        return list(ids)
+
+    async def lease_jobs(self, limit: int) -> List[MaltProfile]:
+        """Lease up to `limit` profiles to scrape to this process.
+
+        Takes TODO profiles, failed ones whose retry is due and IN_PROGRESS
+        ones whose lease expired with their worker. `FOR UPDATE SKIP LOCKED`
+        lets any number of workers lease at once without sharing a profile.
+
+        Returns:
+            List[MaltProfile]: The leased profiles, IN_PROGRESS
+        """
+        now = datetime.now(timezone.utc)
+        available = (
+            select(MaltProfile.id)
+            .where(
+                or_(
+                    MaltProfile.status == ProfileStatus.TODO,
+                    and_(
+                        MaltProfile.status == ProfileStatus.ERROR,
+                        MaltProfile.next_retry_at <= now,
+                    ),
+                    and_(
+                        MaltProfile.status == ProfileStatus.IN_PROGRESS,
+                        or_(
+                            MaltProfile.lease_expires_at.is_(None),
+                            MaltProfile.lease_expires_at < now,
+                        ),
+                    ),
+                )
+            )
+            .order_by(MaltProfile.updated_at.asc().nulls_first())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(MaltProfile)
+            .where(MaltProfile.id.in_(available.scalar_subquery()))
+            .values(
+                status=ProfileStatus.IN_PROGRESS,
+                leased_by=LEASE_OWNER,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                updated_at=func.now(),
+            )
+            .returning(MaltProfile)
+        )
+        with span("db_lease", limit=limit):
+            profiles = list(
+                await self.db.scalars(
+                    select(MaltProfile)
+                    .from_statement(stmt)
+                    .execution_options(populate_existing=True)
+                )
+            )
+            await self.db.commit()
+        return profiles
+
+    async def renew_leases(self) -> int:
+        """Extend the leases of the profiles this process is scraping."""
+        result = await self.db.execute(
+            update(MaltProfile)
+            .where(
+                MaltProfile.leased_by == LEASE_OWNER,
+                MaltProfile.status == ProfileStatus.IN_PROGRESS,
+            )
+            .values(
+                lease_expires_at=datetime.now(timezone.utc)
+                + timedelta(seconds=self.lease_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def release_leases(self) -> int:
+        """Give the profiles this process did not finish back as TODO."""
+        result = await self.db.execute(
+            update(MaltProfile)
+            .where(
+                MaltProfile.leased_by == LEASE_OWNER,
+                MaltProfile.status == ProfileStatus.IN_PROGRESS,
+            )
+            .values(status=ProfileStatus.TODO, **LEASE_RELEASE)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    def _recrawl_due(self, cutoff: datetime):
+        return and_(
+            MaltProfile.status == ProfileStatus.SCRAPPED,
+            MaltProfile.last_scraped_at < cutoff,
+        )
+
+    async def take_recrawl_batch(self, limit: int) -> List[str]:
+        """Take up to `limit` profiles older than `RECRAWL_TTL` to scrape again.
+
+        Profiles are ranked by API requests, plus `RECRAWL_CHANGE_BOOST` when
+        their content changed within `RECRAWL_CHANGE_WINDOW`, then by age.
+        They are set to TODO in the same statement, so they are taken once
+        and requeued on restart, and stamped with `recrawl_queued_at`.
+
+        Returns:
+            List[str]: Job IDs of the profiles to scrape
+        """
+        now = datetime.now(timezone.utc)
+        recently_changed = MaltProfile.content_changed_at > now - timedelta(
+            seconds=config.RECRAWL_CHANGE_WINDOW
+        )
+        priority = MaltProfile.request_count + case(
+            (recently_changed, config.RECRAWL_CHANGE_BOOST), else_=0
+        )
+        due = (
+            select(MaltProfile.id)
+            .where(self._recrawl_due(now - timedelta(seconds=config.RECRAWL_TTL)))
+            .order_by(priority.desc(), MaltProfile.last_scraped_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ids = (
+            await self.db.scalars(
+                update(MaltProfile)
+                .where(MaltProfile.id.in_(due.scalar_subquery()))
+                .values(
+                    status=ProfileStatus.TODO,
+                    recrawl_queued_at=func.now(),
+                    updated_at=func.now(),
+                )
+                .returning(MaltProfile.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await self.db.commit()
+        return list(ids)
+
+    async def lock_recrawl(self) -> bool:
+        """Take the recrawl scan lock until the transaction ends, if free."""
+        return await self.db.scalar(
+            select(func.pg_try_advisory_xact_lock(RECRAWL_LOCK))
+        )
+
+    async def recrawl_usage(self) -> Tuple[int, int]:
+        """Count recrawls queued in the last hour and scrape jobs pending.
 
-    def update_profile_status(
+        Returns:
+            Tuple[int, int]: Profiles queued by the recrawl scheduler within
+            an hour, and profiles in TODO or IN_PROGRESS
+        """
+        hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+        queued = (
+            select(func.count())
+            .where(MaltProfile.recrawl_queued_at > hour_ago)
+            .scalar_subquery()
+        )
+        pending = (
+            select(func.count())
+            .where(
+                MaltProfile.status.in_([ProfileStatus.TODO, ProfileStatus.IN_PROGRESS])
+            )
+            .scalar_subquery()
+        )
+        return tuple((await self.db.execute(select(queued, pending))).one())
+
+    async def recrawl_backlog(self) -> Dict[str, Any]:
+        """Count profiles due for a recrawl and how overdue the oldest is."""
+        now = datetime.now(timezone.utc)
+        due, oldest = (
+            await self.db.execute(
+                select(func.count(), func.min(MaltProfile.last_scraped_at)).where(
+                    self._recrawl_due(now - timedelta(seconds=config.RECRAWL_TTL))
+                )
+            )
+        ).one()
+        await self.db.commit()
+        lag = (now - oldest).total_seconds() - config.RECRAWL_TTL if oldest else 0
+        return {"due": due, "lag_seconds": round(lag)}
+
+    async def add_request_counts(self, counts: Dict[str, int]) -> None:
+        """Add API request counts to profiles, with one batched statement."""
+        if not counts:
+            return
+        # On the table, ORM bulk updates only match rows by primary key
+        table = MaltProfile.__table__
+        await self.db.execute(
+            update(table)
+            .where(table.c.profile_id == bindparam("pid"))
+            .values(request_count=table.c.request_count + bindparam("n")),
+            [{"pid": profile_id, "n": n} for profile_id, n in counts.items()],
+        )
+        await self.db.commit()
+
+    async def update_profile_status(
         self, profile: MaltProfile, status: ProfileStatus
     ) -> None:
         """Update the status of a profile."""
         profile.status = status
-        self.db.commit()
+        await self.db.commit()
+
+    async def record_failure(self, profile: MaltProfile, error: Exception) -> None:
+        """Mark a profile NOT_FOUND or ERROR and schedule its retry.
+
+        The failure is classified by `retry_policy`, retries are picked up by
+        the `retry_scheduler` once `next_retry_at` is due.
+        """
+        kind = classify_failure(error)
+        attempt = profile.attempt_count + 1
+        delay = retry_delay(kind, attempt, error)
 
-    def update_profile_data(self, profile: MaltProfile, data: Dict[str, Any]) -> None:
-        print("Update profile with scraped data.")
+        profile.status = (
+            ProfileStatus.NOT_FOUND if kind == NOT_FOUND else ProfileStatus.ERROR
+        )
+        profile.attempt_count = attempt
+        profile.next_retry_at = (
+            datetime.now(timezone.utc) + timedelta(seconds=delay)
+            if delay is not None
+            else None
+        )
+        profile.last_error = f"{type(error).__name__}: {str(error)}"[:1000]
+        profile.last_error_kind = kind
+        profile.leased_by = None
+        profile.lease_expires_at = None
+        await self.db.commit()
+
+        if delay is None:
+            print(f"Scrape of {profile.profile_id} failed ({kind}), giving up")
+        else:
+            print(
+                f"Scrape of {profile.profile_id} failed ({kind}), "
+                f"retry {attempt} in {delay:.0f}s"
+            )
 
+    @staticmethod
+    def profile_values(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the scraped fields that map to a profile column."""
+        columns = MaltProfile.__table__.columns.keys()
+        values = {}
         for key, value in data.items():
-            if hasattr(profile, key):
-                setattr(profile, key, value)
+            if key in columns:
+                values[key] = value
             else:
                 print(f"Warning: unknown key {key} in scraped data.")
-        self.db.commit()
+        return values
+
+    async def update_profile_data(
+        self, profile: MaltProfile, data: Dict[str, Any]
+    ) -> MaltProfile:
+        """Store scraped data and mark the profile SCRAPPED in one statement.
+
+        Only the field groups whose hash changed are written, and each change
+        is recorded in the change log.
+        """
+        values, changes = diff_profile(self.profile_values(data), profile.field_hashes)
+        if "daily_rate" in values:
+            values["daily_rate_eur"] = parse_daily_rate(values["daily_rate"])
+        if changes:
+            values["content_changed_at"] = func.now()
+            print(f"Update profile fields: {', '.join(c['field'] for c in changes)}")
+        else:
+            print("Profile unchanged, only marking it scrapped.")
+
+        stmt = (
+            update(MaltProfile)
+            .where(MaltProfile.id == profile.id)
+            .values(
+                **values,
+                **RETRY_RESET,
+                **LEASE_RELEASE,
+                status=ProfileStatus.SCRAPPED,
+                last_scraped_at=func.now(),
+                updated_at=func.now(),
+            )
+            .returning(MaltProfile)
+        )
+        with span("db_persist", profile_id=profile.profile_id, changed=len(changes)):
+            profile = await self.db.scalar(
+                select(MaltProfile)
+                .from_statement(stmt)
+                .execution_options(populate_existing=True)
+            )
+            await self.record_changes(
+                [{"profile_id": profile.profile_id, **change} for change in changes]
+            )
+            await self.db.commit()
+        return profile
+
+    async def upsert_profiles_data(
+        self, results: List[Tuple[str, str, Dict[str, Any]]], scraped: bool = True
+    ) -> List[MaltProfile]:
+        """Store the scraped data of many profiles with bulk upserts.
+
+        Profiles are marked SCRAPPED and missing rows are created. Only the
+        changed field groups are written, results changing the same columns
+        are written by a single statement.
+
+        Args:
+            results (List[Tuple[str, str, Dict[str, Any]]]): Profile ID,
+                profile URL and scraped data of each profile
+            scraped (bool): False for data extracted again from archived
+                pages, only the changed fields of known profiles are written
+                and their status and scrape time are kept
+        """
+        with span("db_bulk_upsert", profiles=len(results)):
+            stored = dict(
+                (
+                    await self.db.execute(
+                        select(MaltProfile.profile_id, MaltProfile.field_hashes).where(
+                            MaltProfile.profile_id.in_([r[0] for r in results])
+                        )
+                    )
+                ).all()
+            )
+
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            changes = []
+            for profile_id, profile_url, data in results:
+                values, profile_changes = diff_profile(
+                    self.profile_values(data), stored.get(profile_id)
+                )
+                if not scraped and (profile_id not in stored or not profile_changes):
+                    continue
+                if profile_changes:
+                    values["content_changed_at"] = func.now()
+                if "daily_rate" in values:
+                    values["daily_rate_eur"] = parse_daily_rate(values["daily_rate"])
+                changes.extend(
+                    {"profile_id": profile_id, **change} for change in profile_changes
+                )
+                row = {**values, "profile_id": profile_id, "profile_url": profile_url}
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+
+            scrape_state = {
+                **RETRY_RESET,
+                **LEASE_RELEASE,
+                "status": ProfileStatus.SCRAPPED,
+                "last_scraped_at": func.now(),
+                "updated_at": func.now(),
+            }
+            profiles = []
+            for keys, rows in groups.items():
+                stmt = insert(MaltProfile).values(
+                    [{**row, **scrape_state} for row in rows]
+                )
+                updated = [key for key in keys if key != "profile_id"]
+                if scraped:
+                    updated += list(scrape_state)
+                else:
+                    updated.append("updated_at")
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MaltProfile.profile_id],
+                    set_={key: stmt.excluded[key] for key in updated},
+                ).returning(MaltProfile)
+                profiles.extend(
+                    await self.db.scalars(
+                        select(MaltProfile)
+                        .from_statement(stmt)
+                        .execution_options(populate_existing=True)
+                    )
+                )
+            await self.record_changes(changes)
+            await self.db.commit()
+
+        for profile in profiles:
+            self.cache_profile(profile)
+        return profiles
+
+    async def record_changes(self, changes: List[Dict[str, Any]]) -> None:
+        """Add entries to the change log, in the current transaction."""
+        if changes:
+            await self.db.execute(insert(MaltProfileChange).values(changes))
+
+    async def get_changes(
+        self,
+        after: int = 0,
+        limit: int = 100,
+        profile_id: Optional[str] = None,
+    ) -> List[MaltProfileChange]:
+        """List change log entries with an ID above `after`, oldest first."""
+        query = select(MaltProfileChange).where(MaltProfileChange.id > after)
+        if profile_id:
+            query = query.where(MaltProfileChange.profile_id == profile_id)
+        return list(
+            await self.db.scalars(query.order_by(MaltProfileChange.id).limit(limit))
+        )
+
+    def format_change_response(self, change: MaltProfileChange) -> Dict[str, Any]:
+        """Format a change log entry for API response."""
+        return {
+            "id": change.id,
+            "profile_id": change.profile_id,
+            "field": change.field,
+            "old_hash": change.old_hash,
+            "new_hash": change.new_hash,
+            "changed_at": change.changed_at,
+        }
+
+    def cache_profile(self, profile: MaltProfile) -> None:
+        profile_cache.set(
+            profile.profile_id,
+            profile.id,
+            self.format_profile_response(profile),
+            profile.last_scraped_at,
+        )
 
     def format_profile_response(self, profile: MaltProfile) -> Dict[str, Any]:
         """Format profile data for API response."""
@@ -56,6 +654,7 @@ class ProfileService:
             "experience_years": profile.experience_years,
             "categories": profile.categories,
             "daily_rate": profile.daily_rate,
+            "daily_rate_eur": profile.daily_rate_eur,
             "image_url": profile.image_url,
             "profile_url": profile.profile_url,
             "location": profile.location,
@@ -70,53 +669,249 @@ class ProfileService:
             "experience": profile.experience,
             "certifications": profile.certifications,
             "status": profile.status,
+            "content_hash": profile.content_hash,
+            "last_scraped_at": profile.last_scraped_at,
         }
 
-    def process_profile(self, url: str) -> Dict[str, Any]:
-        url = url.split("?")[0]
+    def format_job_response(self, profile: MaltProfile) -> Dict[str, Any]:
+        """Format the scrape job state of a profile for API response."""
+        return {
+            "job_id": profile.id,
+            "profile_id": profile.profile_id,
+            "status": profile.status,
+            "attempt_count": profile.attempt_count,
+            "next_retry_at": profile.next_retry_at,
+            "last_error_kind": profile.last_error_kind,
+            "profile": (
+                self.format_profile_response(profile)
+                if profile.status == ProfileStatus.SCRAPPED
+                else None
+            ),
+        }
 
-        print(f"Processing profile: {url}")
+    async def enqueue_profile(
+        self, url: str, force: bool = False
+    ) -> Tuple[MaltProfile, bool]:
+        """Find or create the profile row for a URL.
 
-        """Process a profile URL: check if exists, create if not, and scrape data."""
-        if not url.startswith(
-            ("https://malt.fr/profile/", "https://www.malt.fr/profile/")
-        ):
-            raise ValueError("Invalid URL")
+        Args:
+            url (str): Profile URL
+            force (bool): Queue a scrape even if the profile is scrapped
 
-        profile_id = url.split("/")[-1]
+        Returns:
+            Tuple[MaltProfile, bool]: The profile and whether it still has to
+            be scraped
+        """
+        url, profile_id = self.parse_profile_url(url)
+
+        print(f"Processing profile: {url}")
 
         # Check if profile already exists
-        profile = self.get_profile_by_id(profile_id)
+        profile = await self.get_profile_by_id(profile_id)
         print("Existing profile: ", profile)
 
         if profile:
-            if profile.status == ProfileStatus.SCRAPPED:
-                return {
-                    "message": "Profile found in database",
-                    "data": self.format_profile_response(profile),
-                }
+            if profile.status == ProfileStatus.SCRAPPED and not force:
+                return profile, False
+            if profile.status not in (ProfileStatus.TODO, ProfileStatus.IN_PROGRESS):
+                await self.update_profile_status(profile, ProfileStatus.TODO)
         else:
             # Create new profile
-            profile = self.create_profile(profile_id, url)
+            profile = await self.create_profile(profile_id, url)
 
-        try:
-            print("Update status to IN_PROGRESS")
-            self.update_profile_status(profile, ProfileStatus.IN_PROGRESS)
+        return profile, True
+
+    async def lookup_profile(
+        self, url: str, max_age: Optional[int] = None, force: bool = False
+    ) -> Dict[str, Any]:
+        """Serve a profile from the cache or the database by freshness.
 
+        Fresh profiles are served as is, stale ones are served while a
+        refresh is queued, expired, unknown or forced ones must be scraped.
+
+        Args:
+            url (str): Profile URL
+            max_age (Optional[int]): Max age in seconds, defaults to `PROFILE_TTL`
+            force (bool): Ignore stored data and scrape again
+
+        Unless forced, profiles not found are not scraped again and failed
+        ones wait for their scheduled retry, even when they kept the data of
+        an earlier scrape. Stale profiles are only refreshed when their last
+        scrape succeeded, failed ones are left to the retry scheduler.
+
+        Returns:
+            Dict[str, Any]: `cache` ("hit", "stale", "miss" or "not_found"),
+            `data` the profile unless a miss, `job_id` the scrape to run if
+            any and `profile` the row when it was loaded
+        """
+        url, profile_id = self.parse_profile_url(url)
+        max_age = config.PROFILE_TTL if max_age is None else max_age
+        request_counter.record(profile_id)
+
+        if not force:
+            entry = profile_cache.get(profile_id)
+            if entry and freshness(entry["scraped_at"], max_age) == FRESH:
+                profile_cache.record("hits")
+                return {"cache": "hit", "data": entry["data"], "job_id": None}
+
+        profile = await self.get_profile_by_id(profile_id)
+        if profile is not None and not force:
+            if profile.status == ProfileStatus.NOT_FOUND:
+                profile_cache.record("misses")
+                return {"cache": "not_found", "data": None, "job_id": None}
+            if (
+                profile.status == ProfileStatus.ERROR
+                and profile.next_retry_at is not None
+                and profile.next_retry_at > datetime.now(timezone.utc)
+            ):
+                profile_cache.record("misses")
+                return {
+                    "cache": "miss",
+                    "data": None,
+                    "job_id": None,
+                    "profile": profile,
+                }
+
+        # Rows keep their last scraped data while being refreshed
+        servable = profile is not None and (
+            profile.status == ProfileStatus.SCRAPPED
+            or profile.last_scraped_at is not None
+        )
+        if servable and not force:
+            data = self.format_profile_response(profile)
+            profile_cache.set(profile_id, profile.id, data, profile.last_scraped_at)
+            state = freshness(profile.last_scraped_at, max_age)
+            if state == FRESH:
+                profile_cache.record("hits")
+                return {"cache": "hit", "data": data, "job_id": None}
+            if state == STALE:
+                profile_cache.record("stale")
+                if profile.status == ProfileStatus.SCRAPPED:
+                    await self.update_profile_status(profile, ProfileStatus.TODO)
+                refreshing = profile.status in (
+                    ProfileStatus.TODO,
+                    ProfileStatus.IN_PROGRESS,
+                )
+                return {
+                    "cache": "stale",
+                    "data": data,
+                    "job_id": profile.id if refreshing else None,
+                    "profile": profile,
+                }
+
+        profile_cache.record("misses")
+        profile, _ = await self.enqueue_profile(url, force=True)
+        return {"cache": "miss", "data": None, "job_id": profile.id, "profile": profile}
+
+    async def scrape_profile(
+        self,
+        profile: MaltProfile,
+        pool: Optional["BrowserPool"] = None,
+        screenshot: Optional[bool] = None,
+        engine: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        persist: bool = True,
+    ) -> Dict[str, Any]:
+        """Scrape a profile and store the result.
+
+        Concurrent calls for the same profile share one scrape: within this
+        process through `scrape_flight`, across processes through the row
+        claim.
+
+        Args:
+            profile (MaltProfile): The profile to scrape
+            pool (Optional[BrowserPool]): Browser pool to use instead of the
+                process wide one
+            screenshot (Optional[bool]): Capture a screenshot, defaults to
+                `SCREENSHOT_MODE`
+            engine (Optional[str]): Scrape engine, defaults to `SCRAPE_ENGINE`
+            executor (Optional[Executor]): Threads running the blocking
+                scrape, defaults to the event loop executor
+            persist (bool): Store the result, callers writing results in bulk
+                with `upsert_profiles_data` pass False
+        """
+        return await self.scrape_url(
+            profile.profile_id,
+            profile.profile_url,
+            pool=pool,
+            screenshot=screenshot,
+            engine=engine,
+            executor=executor,
+            persist=persist,
+        )
+
+    async def scrape_url(
+        self, profile_id: str, profile_url: str, **options
+    ) -> Dict[str, Any]:
+        """Scrape a profile by ID and URL, creating its row if missing.
+
+        Takes the options of `scrape_profile`.
+        """
+        return await scrape_flight.do(
+            profile_id,
+            lambda: self._scrape_claimed(profile_id, profile_url, **options),
+        )
+
+    async def _scrape_claimed(
+        self,
+        profile_id: str,
+        profile_url: str,
+        pool: Optional["BrowserPool"] = None,
+        screenshot: Optional[bool] = None,
+        engine: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        persist: bool = True,
+    ) -> Dict[str, Any]:
+        from app.services.scrape_engine import scrape_profile_data
+
+        print("Claim profile")
+        profile = await self.claim_profile(profile_id, profile_url)
+        if profile is None:
+            print(f"Profile {profile_id} is being scraped elsewhere")
+            return await self.wait_for_scrape(profile_id)
+
+        try:
             print("Scrape profile data")
-            scraper = MaltScrapper(headless=False, profil_url=url)
-            result = scraper.extract_profile_data()
+            # Run in a copy of the context so logs keep the request ID
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                partial(
+                    contextvars.copy_context().run,
+                    scrape_profile_data,
+                    profile.profile_url,
+                    engine=engine,
+                    headless=False,
+                    pool=pool,
+                    screenshot=screenshot,
+                    page_ready_timeout=page_ready_timeout(
+                        profile.last_error_kind, profile.attempt_count
+                    ),
+                ),
+            )
+        except Exception as e:
+            await self.record_failure(profile, e)
+            raise e
+
+        if persist:
+            profile = await self.update_profile_data(profile, result)
+            self.cache_profile(profile)
 
-            # Update profile with scraped data
-            self.update_profile_data(profile, result)
-            self.update_profile_status(profile, ProfileStatus.SCRAPPED)
+        return result
 
+    async def process_profile(self, url: str) -> Dict[str, Any]:
+        """Process a profile URL inline: find or create it, then scrape."""
+        url, profile_id = self.parse_profile_url(url)
+
+        print(f"Processing profile: {url}")
+        profile = await self.get_profile_by_id(profile_id)
+        if profile and profile.status == ProfileStatus.SCRAPPED:
             return {
-                "message": "Profile scraped and stored successfully",
-                "data": result,
+                "message": "Profile found in database",
+                "data": self.format_profile_response(profile),
             }
 
-        except Exception as e:
-            # Update status to ERROR if scraping fails
-            self.update_profile_status(profile, ProfileStatus.ERROR)
-            raise e
+        # The claim creates the row when the profile is unknown
+        return {
+            "message": "Profile scraped and stored successfully",
+            "data": await self.scrape_url(profile_id, url),
+        }
@@ -0,0 +1,268 @@
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import TimeoutException
+
+from app.core.config import config
+
+# Markers of the anti-bot interstitial served instead of a profile
+BLOCK_MARKERS = (
+    "captcha-delivery.com",
+    "geo.captcha-delivery",
+    "datadome",
+    "Access denied",
+    "Too Many Requests",
+)
+
+
+class ThrottledError(Exception):
+    """The site rate limited (429) or blocked (captcha, 403) a scrape."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def detect_block(html: Optional[str]) -> bool:
+    """Whether a page is an anti-bot interstitial rather than a profile."""
+    return bool(html) and any(marker in html for marker in BLOCK_MARKERS)
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether a scrape error is a browser, HTTP or socket timeout."""
+    if isinstance(error, (TimeoutException, TimeoutError)):
+        return True
+    # Looked up rather than imported, processes that never fetched a page over
+    # HTTP need not load requests
+    requests = sys.modules.get("requests")
+    return requests is not None and isinstance(error, requests.Timeout)
+
+
+def classify(error: Optional[BaseException]) -> str:
+    """Map a scrape outcome to "ok", "throttled", "timeout" or "error"."""
+    if error is None:
+        return "ok"
+    if isinstance(error, ThrottledError):
+        return "throttled"
+    if is_timeout(error):
+        return "timeout"
+    return "error"
+
+
+class TokenBucket:
+    """Thread-safe token bucket, `rate` tokens per second up to `burst`.
+
+    Waits are spread by up to `jitter` of the token interval so parallel
+    workers do not fire in lockstep.
+    """
+
+    def __init__(self, rate: float, burst: int, jitter: float = 0.0):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill_locked(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            delay += random.uniform(0, self.jitter / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no token for `seconds`, and drop the saved up burst."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class RateLimiter:
+    """One token bucket per host.
+
+    Buckets live in the process until `use` swaps them for shared ones, see
+    `shared_rate_limiter`.
+    """
+
+    def __init__(
+        self,
+        rate: float = config.RATE_LIMIT_PER_SECOND,
+        burst: int = config.RATE_LIMIT_BURST,
+        jitter: float = config.RATE_LIMIT_JITTER,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._factory: Callable[[str], TokenBucket] = lambda host: TokenBucket(
+            self.rate, self.burst, self.jitter
+        )
+        self._lock = threading.Lock()
+
+    def use(self, factory: Callable[[str], TokenBucket]) -> None:
+        """Create the bucket of each host with `factory` from now on."""
+        with self._lock:
+            self._factory = factory
+            self._buckets.clear()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).hostname or ""
+        # www.malt.fr and malt.fr are the same site
+        host = host[4:] if host.startswith("www.") else host
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = self._factory(host)
+            return self._buckets[host]
+
+    def acquire(self, url: str) -> float:
+        return self.bucket(url).acquire()
+
+    def pause(self, url: str, seconds: float) -> None:
+        self.bucket(url).pause(seconds)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of scrapes running at once.
+
+    The limit grows by one after a full window of healthy scrapes (success
+    within `target_latency`) and is halved on a timeout or throttling, at
+    most once per `cooldown` seconds.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = config.CONCURRENCY_MIN,
+        max_limit: int = config.CONCURRENCY_MAX,
+        target_latency: float = config.CONCURRENCY_TARGET_LATENCY,
+        cooldown: float = config.THROTTLE_COOLDOWN,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.limit = min_limit
+        self.in_flight = 0
+        self._healthy = 0
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+
+    def start_at(self, limit: int) -> None:
+        """Run `limit` scrapes at once from now on, and never more."""
+        with self._cond:
+            self.min_limit = min(self.min_limit, limit)
+            self.max_limit = limit
+            self.limit = limit
+            self._healthy = 0
+            self._cond.notify_all()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def record(self, outcome: str, latency: float) -> None:
+        """Adjust the limit after a scrape ended with `outcome`."""
+        with self._cond:
+            if outcome in ("timeout", "throttled"):
+                self._healthy = 0
+                now = time.monotonic()
+                if now - self._decreased_at >= self.cooldown:
+                    self._decreased_at = now
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    print(f"Scrape concurrency decreased to {self.limit} ({outcome})")
+            elif outcome == "ok" and latency <= self.target_latency:
+                self._healthy += 1
+                if self._healthy >= self.limit and self.limit < self.max_limit:
+                    self._healthy = 0
+                    self.limit += 1
+                    print(f"Scrape concurrency increased to {self.limit}")
+                    self._cond.notify_all()
+            elif outcome == "ok":
+                # Slow but successful, hold the current limit
+                self._healthy = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self.in_flight}
+
+
+class ScrapeThrottle:
+    """Paces scrapes per host and adapts how many run at once."""
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+    ):
+        self.limiter = limiter or RateLimiter()
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.outcomes = {"ok": 0, "throttled": 0, "timeout": 0, "error": 0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """Wait for a concurrency slot and a token, then time the scrape."""
+        self.concurrency.acquire()
+        try:
+            self.limiter.acquire(url)
+            started_at = time.monotonic()
+            error = None
+            try:
+                yield
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self._record(url, error, time.monotonic() - started_at)
+        finally:
+            self.concurrency.release()
+
+    def _record(self, url: str, error: Optional[BaseException], latency: float):
+        outcome = classify(error)
+        with self._lock:
+            self.outcomes[outcome] += 1
+        if outcome == "throttled":
+            retry_after = getattr(error, "retry_after", None)
+            pause = retry_after or config.THROTTLE_COOLDOWN
+            print(f"Throttled by {urlparse(url).hostname}, pausing {pause:.0f}s")
+            self.limiter.pause(url, pause)
+        self.concurrency.record(outcome, latency)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            outcomes = dict(self.outcomes)
+        return {**self.concurrency.stats(), "outcomes": outcomes}
+
+
+scrape_throttle = ScrapeThrottle()
@@ -0,0 +1,98 @@
+import asyncio
+import math
+from typing import Any, Dict, Optional
+
+from app.core.config import config
+from app.core.database import AsyncSessionLocal
+from app.services.profile_cache import request_counter
+from app.services.profile_service import ProfileService
+from app.services.scrape_queue import ScrapeQueue, scrape_queue
+
+
+class RecrawlScheduler:
+    """Keeps stored profiles fresh by scraping them again in the background.
+
+    Every `interval` seconds it stores the buffered API request counts, then
+    queues the highest priority profiles older than `RECRAWL_TTL`. Profiles
+    are queued at `budget_per_hour` at most, and only while fewer than
+    `max_pending` profiles wait in TODO or IN_PROGRESS. Both are counted in
+    the database under a lock, so the schedulers of every API process share
+    them and one scans at a time.
+    """
+
+    def __init__(
+        self,
+        queue: ScrapeQueue,
+        budget_per_hour: int = config.RECRAWL_BUDGET_PER_HOUR,
+        interval: float = config.RECRAWL_INTERVAL,
+        max_pending: int = config.RECRAWL_MAX_PENDING,
+    ):
+        self.queue = queue
+        self.budget_per_hour = budget_per_hour
+        self.interval = interval
+        self.max_pending = max_pending
+        # The hourly budget spread over the scans, not spent in one burst
+        self.per_scan = max(1, math.ceil(budget_per_hour * interval / 3600))
+        self._usage: Dict[str, Any] = {"queued_last_hour": None, "pending_jobs": None}
+        self._backlog: Dict[str, Any] = {"due": None, "lag_seconds": None}
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Store request counts and queue the recrawls the budget allows."""
+        job_ids = []
+        async with AsyncSessionLocal() as db:
+            service = ProfileService(db)
+            await service.add_request_counts(request_counter.drain())
+            # One process scans per tick, the others skip it
+            if await service.lock_recrawl():
+                queued, pending = await service.recrawl_usage()
+                limit = min(
+                    self.per_scan,
+                    self.budget_per_hour - queued,
+                    self.max_pending - pending,
+                )
+                if limit > 0:
+                    job_ids = await service.take_recrawl_batch(limit)
+                self._usage = {
+                    "queued_last_hour": queued + len(job_ids),
+                    "pending_jobs": pending + len(job_ids),
+                }
+            # Releases the lock
+            await db.commit()
+            self._backlog = await service.recrawl_backlog()
+
+        for job_id in job_ids:
+            self.queue.submit(job_id)
+        if job_ids:
+            print(f"Queued {len(job_ids)} profile recrawls")
+        return len(job_ids)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Recrawl scan failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start scanning, must be called from the event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Backlog, recrawls of the last hour and pending jobs as of the last scan."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "budget_per_hour": self.budget_per_hour,
+            **self._usage,
+            **self._backlog,
+        }
+
+
+recrawl_scheduler = RecrawlScheduler(scrape_queue)
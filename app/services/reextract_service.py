@@ -0,0 +1,121 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.malt_profile import MaltProfile
+from app.services.extract_malt_html import ExtractMaltHtml
+from app.services.page_archive import PageArchive, page_archive
+from app.services.profile_service import ProfileService
+
+
+def extract_archived(
+    root: str, ref: Dict[str, Any]
+) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Parse an archived page, runs in the pool processes.
+
+    Returns:
+        Tuple[str, Optional[Dict[str, Any]], Optional[str]]: Profile ID,
+        extracted data or None, and the error when the parse failed
+    """
+    try:
+        html = PageArchive(root).load(ref["sha256"])
+        data = ExtractMaltHtml(html, ref.get("url")).extract()
+        if not ExtractMaltHtml.is_complete(data):
+            return ref["profile_id"], None, "incomplete"
+        return ref["profile_id"], data, None
+    except Exception as e:
+        return ref["profile_id"], None, f"{type(e).__name__}: {str(e)}"
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def reextract(
+    profile_ids: Optional[List[str]] = None,
+    processes: Optional[int] = None,
+    batch_size: int = 500,
+    dry_run: bool = False,
+    archive: PageArchive = page_archive,
+) -> Dict[str, Any]:
+    """Extract profiles again from their last archived page and store them.
+
+    Pages are parsed by a pool of `processes` with `ExtractMaltHtml`, the
+    results are bulk written `batch_size` at a time while the pool parses
+    ahead. Only the changed fields of known profiles are written, with their
+    change log, their status and scrape time are kept.
+
+    Args:
+        profile_ids (Optional[List[str]]): Profiles to extract, all by default
+        processes (Optional[int]): Parser processes, defaults to the CPU count
+        batch_size (int): Results written per bulk upsert
+        dry_run (bool): Parse and count the pages without writing
+    """
+    stats = {"pages": 0, "extracted": 0, "failed": 0, "updated": 0, "unknown": 0}
+    failures: Dict[str, int] = {}
+    started_at = time.perf_counter()
+    refs = list(archive.latest(profile_ids))
+
+    # Spawned, forked children would share the parent's database sockets
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        parsed = pool.map(
+            extract_archived,
+            [archive.root] * len(refs),
+            refs,
+            chunksize=20,
+        )
+        for batch in _batches(parsed, batch_size):
+            stats["pages"] += len(batch)
+            extracted = {}
+            for profile_id, data, error in batch:
+                if data is None:
+                    stats["failed"] += 1
+                    kind = error.split(":")[0]
+                    failures[kind] = failures.get(kind, 0) + 1
+                else:
+                    extracted[profile_id] = data
+            stats["extracted"] += len(extracted)
+            if not extracted:
+                continue
+
+            async with AsyncSessionLocal() as db:
+                urls = dict(
+                    (
+                        await db.execute(
+                            select(
+                                MaltProfile.profile_id, MaltProfile.profile_url
+                            ).where(MaltProfile.profile_id.in_(list(extracted)))
+                        )
+                    ).all()
+                )
+                stats["unknown"] += len(extracted) - len(urls)
+                if dry_run:
+                    continue
+                updated = await ProfileService(db).upsert_profiles_data(
+                    [
+                        (pid, urls[pid], data)
+                        for pid, data in extracted.items()
+                        if pid in urls
+                    ],
+                    scraped=False,
+                )
+                stats["updated"] += len(updated)
+            print(f"{stats['pages']}/{len(refs)} pages, {stats['updated']} updated")
+
+    elapsed = time.perf_counter() - started_at
+    stats["failures"] = failures
+    stats["seconds"] = round(elapsed, 1)
+    stats["pages_per_second"] = round(stats["pages"] / elapsed, 1) if elapsed else 0
+    return stats
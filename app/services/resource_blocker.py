@@ -0,0 +1,154 @@
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from app.core.config import config
+
+# URL patterns of each resource type, Network.setBlockedURLs only matches URLs
+RESOURCE_TYPE_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "mp3", "ogg", "wav", "m3u8"],
+    "stylesheet": ["css"],
+    "script": ["js"],
+}
+
+# Analytics and third-party hosts the extraction never needs
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*connect.facebook.net*",
+    "*hotjar.com*",
+    "*segment.com*",
+    "*segment.io*",
+    "*intercom.io*",
+    "*intercomcdn.com*",
+    "*hs-scripts.com*",
+    "*hubspot.com*",
+    "*clarity.ms*",
+    "*bing.com*",
+    "*linkedin.com/px*",
+    "*ads.linkedin.com*",
+    "*tiktok.com*",
+]
+
+# Rough transfer size of a blocked request, used to estimate bytes saved
+ESTIMATED_BYTES = {
+    "Image": 40_000,
+    "Font": 30_000,
+    "Media": 500_000,
+    "Stylesheet": 20_000,
+    "Script": 60_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+class ResourceBlocker:
+    """Blocks unneeded requests in the scraping browser and counts them.
+
+    Requests are blocked through CDP `Network.setBlockedURLs`. A resource
+    type is blocked when it is in the deny list and not in the allow list,
+    trackers are blocked by host. Counts come from the browser performance
+    log, which has to be drained after every page.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.RESOURCE_BLOCKING_ENABLED,
+        blocked_types: List[str] = config.BLOCKED_RESOURCE_TYPES,
+        allowed_types: List[str] = config.ALLOWED_RESOURCE_TYPES,
+        block_trackers: bool = config.BLOCK_TRACKERS,
+        extra_patterns: List[str] = config.BLOCKED_URL_PATTERNS,
+    ):
+        self.enabled = enabled
+        self.blocked_types = [t for t in blocked_types if t not in allowed_types]
+        self.block_trackers = block_trackers
+        self.extra_patterns = extra_patterns
+        self.totals: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def patterns(self) -> List[str]:
+        patterns = []
+        for resource_type in self.blocked_types:
+            for extension in RESOURCE_TYPE_EXTENSIONS.get(resource_type, []):
+                patterns.append(f"*.{extension}")
+                patterns.append(f"*.{extension}?*")
+        if self.block_trackers:
+            patterns.extend(TRACKER_PATTERNS)
+        patterns.extend(self.extra_patterns)
+        return patterns
+
+    def configure_options(self, options) -> None:
+        """Enable the performance log the request counters are read from."""
+        if self.enabled:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    def install(self, driver) -> None:
+        """Start blocking on a freshly launched browser."""
+        if not self.enabled:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+
+    def _events(self, driver) -> List[Dict[str, Any]]:
+        events = []
+        for entry in driver.get_log("performance"):
+            try:
+                events.append(json.loads(entry["message"])["message"])
+            except (KeyError, ValueError):
+                continue
+        return events
+
+    def reset(self, driver) -> None:
+        """Drop the log of previous pages before loading a new one."""
+        if self.enabled:
+            self._events(driver)
+
+    def collect(self, driver) -> Dict[str, Any]:
+        """Count requests loaded and blocked since the last call."""
+        if not self.enabled:
+            return {}
+
+        types: Dict[str, str] = {}
+        stats: Dict[str, Any] = {
+            "requests_loaded": 0,
+            "bytes_loaded": 0,
+            "requests_blocked": 0,
+            "estimated_bytes_saved": 0,
+            "blocked_by_type": defaultdict(int),
+        }
+        for event in self._events(driver):
+            method = event.get("method")
+            params = event.get("params", {})
+            if method == "Network.requestWillBeSent":
+                types[params.get("requestId")] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                stats["requests_loaded"] += 1
+                stats["bytes_loaded"] += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                resource_type = params.get("type") or types.get(
+                    params.get("requestId"), "Other"
+                )
+                stats["requests_blocked"] += 1
+                stats["blocked_by_type"][resource_type] += 1
+                stats["estimated_bytes_saved"] += ESTIMATED_BYTES.get(
+                    resource_type, DEFAULT_ESTIMATED_BYTES
+                )
+        stats["blocked_by_type"] = dict(stats["blocked_by_type"])
+
+        with self._lock:
+            self.totals["pages"] += 1
+            for key in (
+                "requests_loaded",
+                "bytes_loaded",
+                "requests_blocked",
+                "estimated_bytes_saved",
+            ):
+                self.totals[key] += stats[key]
+        return stats
+
+
+resource_blocker = ResourceBlocker()
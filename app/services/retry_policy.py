@@ -0,0 +1,63 @@
+import random
+from typing import Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from app.core.config import config
+from app.services.rate_limiter import ThrottledError, is_timeout
+
+# Failure kinds, stored in `MaltProfile.last_error_kind`
+NOT_FOUND = "not_found"  # profile removed, never retried
+CRASHED = "crashed"  # browser died, retried soon on a fresh session
+TIMEOUT = "timeout"  # page did not render, retried with a longer wait
+BLOCKED = "blocked"  # rate limited or captcha, retried after a cooldown
+ERROR = "error"  # anything else, retried with backoff
+
+
+class ProfileNotFound(Exception):
+    """The profile page does not exist (404, 410 or redirected away)."""
+
+
+def classify_failure(error: BaseException) -> str:
+    """Return the failure kind of a scrape error."""
+    if isinstance(error, ProfileNotFound):
+        return NOT_FOUND
+    if isinstance(error, ThrottledError):
+        return BLOCKED
+    if is_timeout(error):
+        return TIMEOUT
+    if isinstance(error, WebDriverException):
+        return CRASHED
+    return ERROR
+
+
+def retry_delay(
+    kind: str, attempt: int, error: Optional[BaseException] = None
+) -> Optional[float]:
+    """Seconds to wait before retry number `attempt` + 1, with jitter.
+
+    Returns:
+        Optional[float]: None when the profile must not be retried
+    """
+    if kind == NOT_FOUND or attempt >= config.RETRY_MAX_ATTEMPTS:
+        return None
+
+    base = config.RETRY_BASE_DELAY
+    if kind == CRASHED:
+        # The crashed browser is discarded, the next one has no reason to fail
+        base /= 4
+    elif kind == BLOCKED:
+        retry_after = getattr(error, "retry_after", None)
+        base = max(base, retry_after or config.THROTTLE_COOLDOWN)
+
+    delay = min(config.RETRY_MAX_DELAY, base * 2 ** (attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def page_ready_timeout(last_error_kind: Optional[str], attempt_count: int) -> int:
+    """Page readiness wait of the next attempt, longer after timeouts."""
+    if last_error_kind != TIMEOUT:
+        return config.PAGE_READY_TIMEOUT
+    return min(
+        config.PAGE_READY_TIMEOUT * 2**attempt_count, config.PAGE_READY_MAX_TIMEOUT
+    )
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Optional
+
+from app.core.config import config
+from app.core.database import AsyncSessionLocal
+from app.services.profile_service import ProfileService
+from app.services.scrape_queue import ScrapeQueue, scrape_queue
+
+
+class RetryScheduler:
+    """Queues the scrapes of failed profiles once their retry is due.
+
+    Scans every `interval` seconds from the event loop, the backoff itself is
+    decided by `retry_policy` when a scrape fails. Each scan also resumes a
+    batch of TODO jobs abandoned by a process that stopped, so a restart does
+    not submit the whole backlog at once.
+    """
+
+    def __init__(
+        self,
+        queue: ScrapeQueue,
+        interval: float = config.RETRY_POLL_INTERVAL,
+        batch_size: int = config.RETRY_BATCH_SIZE,
+    ):
+        self.queue = queue
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Queue the retries due now and abandoned jobs, returns how many."""
+        async with AsyncSessionLocal() as db:
+            service = ProfileService(db)
+            retries = await service.take_due_retries(self.batch_size)
+            abandoned = await service.take_abandoned(self.batch_size)
+        for job_id in retries + abandoned:
+            self.queue.submit(job_id)
+        if retries:
+            print(f"Queued {len(retries)} scrape retries")
+        if abandoned:
+            print(f"Resumed {len(abandoned)} abandoned scrape jobs")
+        return len(retries) + len(abandoned)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Retry scan failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start scanning, must be called from the event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+retry_scheduler = RetryScheduler(scrape_queue)
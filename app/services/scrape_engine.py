@@ -0,0 +1,63 @@
+from typing import Any, Dict, Optional
+
+import requests
+
+from app.core.config import config
+from app.core.metrics import SCRAPES_TOTAL, span
+from app.services.browser_pool import BrowserPool
+from app.services.http_scrapper import HttpScrapper, IncompleteExtraction
+from app.services.malt_scrapper import MaltScrapper
+from app.services.rate_limiter import scrape_throttle
+
+ENGINES = ("browser", "http")
+
+
+def scrape_profile_data(
+    url: str,
+    engine: Optional[str] = None,
+    headless: bool = False,
+    pool: Optional[BrowserPool] = None,
+    screenshot: Optional[bool] = None,
+    page_ready_timeout: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Scrape a profile with the chosen engine.
+
+    The "http" engine fetches the page without a browser and falls back to
+    the "browser" engine when the request fails or the parse is incomplete.
+    A requested screenshot always goes through the browser. Every page load
+    is paced and bounded by `scrape_throttle`, a throttled HTTP attempt raises
+    `ThrottledError` rather than retrying with the browser.
+
+    Args:
+        url (str): Profile URL
+        engine (Optional[str]): "browser" or "http", defaults to `SCRAPE_ENGINE`
+        headless (bool): Headless mode of the browser engine
+        pool (Optional[BrowserPool]): Browser pool of the browser engine
+        screenshot (Optional[bool]): Capture a screenshot, browser engine only
+        page_ready_timeout (Optional[int]): Render wait of the browser engine
+    """
+    engine = engine or config.SCRAPE_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown scrape engine: {engine}")
+
+    if engine == "http" and not screenshot:
+        try:
+            with scrape_throttle.slot(url), span("scrape", engine="http", url=url):
+                data = HttpScrapper(profil_url=url).extract_profile_data()
+            SCRAPES_TOTAL.labels(engine="http", outcome="ok").inc()
+            return data
+        except (IncompleteExtraction, requests.RequestException) as e:
+            SCRAPES_TOTAL.labels(engine="http", outcome="fallback").inc()
+            print(f"HTTP engine failed, falling back to browser: {str(e)}")
+
+    try:
+        with scrape_throttle.slot(url), span("scrape", engine="browser", url=url):
+            scraper = MaltScrapper(headless=headless, profil_url=url, pool=pool)
+            data = scraper.extract_profile_data(
+                screenshot=screenshot, page_ready_timeout=page_ready_timeout
+            )
+    except Exception:
+        SCRAPES_TOTAL.labels(engine="browser", outcome="error").inc()
+        raise
+    SCRAPES_TOTAL.labels(engine="browser", outcome="ok").inc()
+    return data
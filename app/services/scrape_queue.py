@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.core.config import config
+from app.core.database import AsyncSessionLocal
+from app.services.profile_service import ProfileService
+
+
+class ScrapeQueue:
+    """Runs profile scrapes in the background with bounded concurrency.
+
+    Jobs are identified by the `MaltProfile.id` of the row they scrape, the
+    row status (TODO, IN_PROGRESS, SCRAPPED, ERROR) is the job state. Jobs
+    are asyncio tasks, at most `max_workers` of them scrape at once, each on
+    its own thread since Selenium blocks.
+
+    With `remote`, scrapes are left to the `app/worker.py` processes: jobs
+    stay TODO rows for them to lease and nothing runs here.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config.SCRAPE_WORKERS,
+        remote: bool = config.SCRAPE_EXECUTION == "workers",
+    ):
+        self.max_workers = max_workers
+        self.remote = remote
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="scrape-worker"
+        )
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(self, job_id: str, **options) -> Optional[asyncio.Task]:
+        """Queue a scrape for the profile row, unless one is already queued.
+
+        Must be called from the event loop. `options` are passed on to
+        `ProfileService.scrape_profile`, they are ignored when `remote`.
+        """
+        if self.remote:
+            return None
+        task = self._jobs.get(job_id)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.get_running_loop().create_task(self._run(job_id, options))
+        self._jobs[job_id] = task
+        task.add_done_callback(lambda t: self._forget(job_id, t))
+        return task
+
+    def _forget(self, job_id: str, task: asyncio.Task) -> None:
+        if self._jobs.get(job_id) is task:
+            del self._jobs[job_id]
+
+    async def _run(self, job_id: str, options: Dict[str, Any]) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            async with AsyncSessionLocal() as db:
+                try:
+                    service = ProfileService(db)
+                    profile = await service.get_profile(job_id)
+                    if profile is None:
+                        print(f"Job {job_id} has no matching profile, skipping")
+                        return
+                    await service.scrape_profile(
+                        profile, executor=self._executor, **options
+                    )
+                except Exception as e:
+                    print(f"Job {job_id} failed: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[asyncio.Task]:
+        return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    async def wait(self, job_id: str, timeout: float) -> None:
+        """Wait up to `timeout` seconds for a job run by this process to end.
+
+        Jobs run by another process cannot be awaited, this just sleeps so
+        callers can poll the database again.
+        """
+        task = self.get(job_id)
+        if task is None:
+            await asyncio.sleep(timeout)
+            return
+        await asyncio.wait({task}, timeout=timeout)
+
+    def shutdown(self) -> None:
+        for task in list(self._jobs.values()):
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+scrape_queue = ScrapeQueue()
@@ -0,0 +1,170 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.malt_profile import MaltProfile
+
+# Sort orders, each a list of (column, descending), ending with the ID so
+# keyset cursors are unique
+SORTS = {
+    "recent": [(MaltProfile.last_scraped_at, True), (MaltProfile.id, True)],
+    "rate_asc": [(MaltProfile.daily_rate_eur, False), (MaltProfile.id, False)],
+    "rate_desc": [(MaltProfile.daily_rate_eur, True), (MaltProfile.id, True)],
+}
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_cursor(sort: str, values: List[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"sort": sort, "after": payload}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> List[Any]:
+    """Decode a cursor returned by `encode_cursor` for the same sort.
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["after"]
+        if payload["sort"] != sort or len(values) != len(SORTS[sort]):
+            raise ValueError
+        if sort == "recent":
+            values[0] = datetime.fromisoformat(values[0])
+        elif not isinstance(values[0], int):
+            raise ValueError
+        if not isinstance(values[-1], str):
+            raise ValueError
+        return values
+    except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def search_filters(
+    skills: Optional[List[str]] = None,
+    categories: Optional[List[str]] = None,
+    languages: Optional[List[str]] = None,
+    location: Optional[str] = None,
+    availability: Optional[str] = None,
+    min_rate: Optional[int] = None,
+    max_rate: Optional[int] = None,
+    q: Optional[str] = None,
+) -> List[Any]:
+    """WHERE clauses of a profile search, scraped profiles only."""
+    # Containment (@>) is what the jsonb_path_ops GIN indexes serve
+    filters = [MaltProfile.last_scraped_at.isnot(None)]
+    for skill in skills or []:
+        filters.append(
+            or_(
+                MaltProfile.skills.contains([skill]),
+                MaltProfile.top_skills.contains([skill]),
+            )
+        )
+    for category in categories or []:
+        filters.append(MaltProfile.categories.contains([category]))
+    for language in languages or []:
+        filters.append(MaltProfile.languages.contains([{"name": language}]))
+    if location:
+        filters.append(
+            or_(
+                MaltProfile.location.ilike(f"%{_escape_like(location)}%"),
+                MaltProfile.work_locations.contains([location]),
+            )
+        )
+    if availability:
+        filters.append(
+            MaltProfile.availability.ilike(f"%{_escape_like(availability)}%")
+        )
+    if min_rate is not None:
+        filters.append(MaltProfile.daily_rate_eur >= min_rate)
+    if max_rate is not None:
+        filters.append(MaltProfile.daily_rate_eur <= max_rate)
+    if q:
+        pattern = f"%{_escape_like(q)}%"
+        filters.append(
+            or_(
+                MaltProfile.fullname.ilike(pattern),
+                MaltProfile.title.ilike(pattern),
+            )
+        )
+    return filters
+
+
+class SearchService:
+    """Filters scraped profiles with the JSONB, trigram and rate indexes."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(
+        self,
+        skills: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        languages: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        availability: Optional[str] = None,
+        min_rate: Optional[int] = None,
+        max_rate: Optional[int] = None,
+        q: Optional[str] = None,
+        sort: str = "recent",
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[MaltProfile], Optional[str]]:
+        """Search scraped profiles, one keyset page at a time.
+
+        Several skills, categories or languages must all match. Rate sorts
+        skip profiles without a parsed euro rate.
+
+        Returns:
+            Tuple[List[MaltProfile], Optional[str]]: The page, and the cursor
+            of the next page or None on the last one
+
+        Raises:
+            ValueError: If the sort or the cursor is invalid
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Invalid sort: {sort}")
+        order = SORTS[sort]
+        columns = [column for column, _ in order]
+        descending = order[0][1]
+
+        filters = search_filters(
+            skills,
+            categories,
+            languages,
+            location,
+            availability,
+            min_rate,
+            max_rate,
+            q,
+        )
+        if sort != "recent":
+            filters.append(MaltProfile.daily_rate_eur.isnot(None))
+        if cursor:
+            after = tuple_(*decode_cursor(sort, cursor))
+            filters.append(
+                tuple_(*columns) < after if descending else tuple_(*columns) > after
+            )
+
+        query = (
+            select(MaltProfile)
+            .where(and_(*filters))
+            .order_by(*(c.desc() if desc else c.asc() for c, desc in order))
+            .limit(limit + 1)
+        )
+        profiles = list(await self.db.scalars(query))
+        if len(profiles) <= limit:
+            return profiles, None
+        profiles = profiles[:limit]
+        last = profiles[-1]
+        return profiles, encode_cursor(sort, [getattr(last, c.key) for c in columns])
@@ -0,0 +1,165 @@
+import asyncio
+import random
+import time
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import AsyncSessionLocal
+from app.models.rate_limit import RateLimit
+from app.services.rate_limiter import RateLimiter, TokenBucket
+
+# Seconds a thread waits for the database before pacing on its own
+DATABASE_TIMEOUT = 10
+
+
+class SharedTokenBucket:
+    """Token bucket of a host kept in `rate_limits`, shared by every process.
+
+    Tokens are refilled and taken in one locked `UPDATE ... RETURNING` on
+    database time. Scrapes call `acquire` from executor threads, the
+    statements run on the event loop of the process. When the database
+    cannot be reached the process paces on its own bucket meanwhile.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        loop: asyncio.AbstractEventLoop,
+        rate: float,
+        burst: int,
+        jitter: float = 0.0,
+    ):
+        self.host = host
+        self.loop = loop
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.fallback = TokenBucket(rate, burst, jitter)
+        self._created = False
+
+    async def _ensure_row(self, db) -> None:
+        if not self._created:
+            await db.execute(
+                insert(RateLimit)
+                .values(host=self.host, tokens=self.burst)
+                .on_conflict_do_nothing(index_elements=["host"])
+            )
+            self._created = True
+
+    async def take(self) -> Tuple[bool, float]:
+        """Take a token if one is available.
+
+        Returns:
+            Tuple[bool, float]: Whether a token was taken, else the seconds
+            until the next one
+        """
+        now = func.clock_timestamp()
+        bucket = (
+            select(
+                RateLimit.host,
+                func.least(
+                    self.burst,
+                    RateLimit.tokens
+                    + func.extract("epoch", now - RateLimit.updated_at) * self.rate,
+                ).label("tokens"),
+                func.greatest(
+                    func.extract("epoch", RateLimit.paused_until - now), 0
+                ).label("paused"),
+            )
+            .where(RateLimit.host == self.host)
+            .with_for_update()
+            .cte("bucket")
+        )
+        granted = and_(bucket.c.paused == 0, bucket.c.tokens >= 1)
+        async with AsyncSessionLocal() as db:
+            await self._ensure_row(db)
+            tokens, paused = (
+                await db.execute(
+                    update(RateLimit)
+                    .where(RateLimit.host == bucket.c.host)
+                    .values(
+                        tokens=case(
+                            (granted, bucket.c.tokens - 1), else_=bucket.c.tokens
+                        ),
+                        updated_at=now,
+                    )
+                    .returning(bucket.c.tokens, bucket.c.paused)
+                )
+            ).one()
+            await db.commit()
+        tokens, paused = float(tokens), float(paused)
+        if paused == 0 and tokens >= 1:
+            return True, 0.0
+        return False, max(paused, (1 - tokens) / self.rate)
+
+    async def hold(self, seconds: float) -> None:
+        """Pause the bucket for `seconds`, for every process."""
+        async with AsyncSessionLocal() as db:
+            await self._ensure_row(db)
+            until = func.clock_timestamp() + timedelta(seconds=seconds)
+            await db.execute(
+                update(RateLimit)
+                .where(RateLimit.host == self.host)
+                .values(
+                    paused_until=func.greatest(RateLimit.paused_until, until),
+                    tokens=0,
+                    updated_at=func.clock_timestamp(),
+                )
+            )
+            await db.commit()
+
+    def _run(self, coro) -> Optional[object]:
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop or self.loop.is_closed():
+            # Blocking on the loop from its own thread would deadlock
+            coro.close()
+            return None
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+            return future.result(DATABASE_TIMEOUT)
+        except Exception as e:
+            print(f"Shared rate limit of {self.host} unavailable: {str(e)}")
+            return None
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            result = self._run(self.take())
+            if result is None:
+                return waited + self.fallback.acquire()
+            granted, delay = result
+            if granted:
+                return waited
+            delay += random.uniform(0, self.jitter / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        self.fallback.pause(seconds)
+        self._run(self.hold(seconds))
+
+
+def share_rate_limits(
+    limiter: RateLimiter, loop: Optional[asyncio.AbstractEventLoop] = None
+) -> None:
+    """Pace the hosts of `limiter` with buckets shared through the database.
+
+    Call from the event loop the scrapes of the process are started from.
+    """
+    loop = loop or asyncio.get_running_loop()
+    limiter.use(
+        lambda host: SharedTokenBucket(
+            host, loop, limiter.rate, limiter.burst, limiter.jitter
+        )
+    )
@@ -0,0 +1,115 @@
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import config
+from app.models.malt_profile import MaltProfile, ProfileStatus
+from app.models.scrape_worker import ScrapeWorker
+from app.services.profile_service import LEASE_OWNER
+
+
+class WorkerService:
+    """Registry of the scrape worker processes, fed by their heartbeats."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def register(self, concurrency: int) -> None:
+        """Record this process as a running worker, its ID is `LEASE_OWNER`."""
+        values = {
+            "hostname": socket.gethostname(),
+            "pid": os.getpid(),
+            "concurrency": concurrency,
+            "started_at": func.now(),
+            "heartbeat_at": func.now(),
+            "stopped_at": None,
+            "in_flight": 0,
+            "scraped_count": 0,
+            "failed_count": 0,
+            "recent_per_minute": 0,
+        }
+        stmt = insert(ScrapeWorker).values(id=LEASE_OWNER, **values)
+        await self.db.execute(
+            stmt.on_conflict_do_update(index_elements=[ScrapeWorker.id], set_=values)
+        )
+        await self.db.commit()
+
+    async def heartbeat(self, **stats: Any) -> None:
+        """Store the counters of this worker and mark it alive.
+
+        Args:
+            **stats: `in_flight`, `scraped_count`, `failed_count` and
+                `recent_per_minute`
+        """
+        await self.db.execute(
+            update(ScrapeWorker)
+            .where(ScrapeWorker.id == LEASE_OWNER)
+            .values(heartbeat_at=func.now(), **stats)
+        )
+        await self.db.commit()
+
+    async def stop(self, **stats: Any) -> None:
+        """Mark this worker stopped, with its final counters."""
+        await self.db.execute(
+            update(ScrapeWorker)
+            .where(ScrapeWorker.id == LEASE_OWNER)
+            .values(heartbeat_at=func.now(), stopped_at=func.now(), **stats)
+        )
+        await self.db.commit()
+
+    async def list_workers(self, since: timedelta) -> List[ScrapeWorker]:
+        """Workers seen within `since`, most recently started first."""
+        cutoff = datetime.now(timezone.utc) - since
+        return list(
+            await self.db.scalars(
+                select(ScrapeWorker)
+                .where(ScrapeWorker.heartbeat_at >= cutoff)
+                .order_by(ScrapeWorker.started_at.desc())
+            )
+        )
+
+    async def lease_counts(self) -> Dict[str, int]:
+        """Count the IN_PROGRESS profiles with a live and an expired lease."""
+        now = datetime.now(timezone.utc)
+        live, expired = (
+            await self.db.execute(
+                select(
+                    func.count().filter(MaltProfile.lease_expires_at >= now),
+                    func.count().filter(MaltProfile.lease_expires_at < now),
+                ).where(MaltProfile.status == ProfileStatus.IN_PROGRESS)
+            )
+        ).one()
+        return {"leased": live, "expired_leases": expired}
+
+    def format_worker_response(self, worker: ScrapeWorker) -> Dict[str, Any]:
+        """Format a worker for API response, with its state and throughput."""
+        now = datetime.now(timezone.utc)
+        if worker.stopped_at is not None:
+            state = "stopped"
+        elif now - worker.heartbeat_at > timedelta(seconds=config.WORKER_STALE_AFTER):
+            state = "lost"
+        else:
+            state = "running"
+        uptime = ((worker.stopped_at or now) - worker.started_at).total_seconds()
+        return {
+            "id": worker.id,
+            "hostname": worker.hostname,
+            "pid": worker.pid,
+            "state": state,
+            "concurrency": worker.concurrency,
+            "in_flight": worker.in_flight,
+            "scraped_count": worker.scraped_count,
+            "failed_count": worker.failed_count,
+            "recent_per_minute": worker.recent_per_minute,
+            "per_minute": (
+                round(worker.scraped_count / uptime * 60, 2) if uptime > 0 else 0
+            ),
+            "started_at": worker.started_at,
+            "heartbeat_at": worker.heartbeat_at,
+            "stopped_at": worker.stopped_at,
+        }
@@ -0,0 +1,24 @@
+import argparse
+import asyncio
+import os
+import sys
+
+base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(base_dir)
+
+from app.core.config import config
+from app.services.lease_worker import LeaseWorker
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scrape queued Malt profiles, run one per host or more"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.SCRAPE_WORKERS,
+        help="Profiles scraped at once, keep <= BROWSER_POOL_MAX_SIZE",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(LeaseWorker(concurrency=args.concurrency).run())
@@ -12,7 +12,12 @@ from sqlalchemy import pool
 from alembic import context
 from app.core.config import config
 from app.core.database import Base
-from app.models.malt_profile import MaltProfile  # Import all models here
+from app.models.malt_profile import (  # Import all models here
+    MaltProfile,
+    MaltProfileChange,
+)
+from app.models.rate_limit import RateLimit
+from app.models.scrape_worker import ScrapeWorker
 
 context_config = context.config
 
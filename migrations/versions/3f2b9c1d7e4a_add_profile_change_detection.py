@@ -0,0 +1,54 @@
+"""add profile change detection
+
+Revision ID: 3f2b9c1d7e4a
+Revises: 6a9ac2073b16
+Create Date: 2026-10-18 15:30:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f2b9c1d7e4a"
+down_revision = "6a9ac2073b16"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "malt_profiles", sa.Column("content_hash", sa.String(), nullable=True)
+    )
+    op.add_column("malt_profiles", sa.Column("field_hashes", sa.JSON(), nullable=True))
+    op.create_table(
+        "malt_profile_changes",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("profile_id", sa.String(), nullable=False),
+        sa.Column("field", sa.String(), nullable=False),
+        sa.Column("old_hash", sa.String(), nullable=True),
+        sa.Column("new_hash", sa.String(), nullable=False),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_malt_profile_changes_profile_id"),
+        "malt_profile_changes",
+        ["profile_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_malt_profile_changes_profile_id"), table_name="malt_profile_changes"
+    )
+    op.drop_table("malt_profile_changes")
+    op.drop_column("malt_profiles", "field_hashes")
+    op.drop_column("malt_profiles", "content_hash")
@@ -0,0 +1,29 @@
+"""add profile batch id
+
+Revision ID: 5d2c8e1f7a93
+Revises: c6a2e8f41d07
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5d2c8e1f7a93"
+down_revision = "c6a2e8f41d07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("malt_profiles", sa.Column("batch_id", sa.String(), nullable=True))
+    op.create_index(
+        op.f("ix_malt_profiles_batch_id"), "malt_profiles", ["batch_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_malt_profiles_batch_id"), table_name="malt_profiles")
+    op.drop_column("malt_profiles", "batch_id")
@@ -0,0 +1,46 @@
+"""add profile retry state
+
+Revision ID: 8c4e2a7b9d15
+Revises: b4d81f6c9e23
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c4e2a7b9d15"
+down_revision = "b4d81f6c9e23"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "malt_profiles",
+        sa.Column("attempt_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "malt_profiles",
+        sa.Column("next_retry_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column("malt_profiles", sa.Column("last_error", sa.String(), nullable=True))
+    op.add_column(
+        "malt_profiles", sa.Column("last_error_kind", sa.String(), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_malt_profiles_next_retry_at"),
+        "malt_profiles",
+        ["next_retry_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_malt_profiles_next_retry_at"), table_name="malt_profiles")
+    op.drop_column("malt_profiles", "last_error_kind")
+    op.drop_column("malt_profiles", "last_error")
+    op.drop_column("malt_profiles", "next_retry_at")
+    op.drop_column("malt_profiles", "attempt_count")
@@ -0,0 +1,135 @@
+"""add profile search indexes
+
+Revision ID: a93f6d2e4c71
+Revises: d51a7e3c0b28
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "a93f6d2e4c71"
+down_revision = "d51a7e3c0b28"
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = (
+    "categories",
+    "work_locations",
+    "top_skills",
+    "skills",
+    "languages",
+    "expertise_domains",
+)
+GIN_COLUMNS = ("skills", "top_skills", "categories", "languages")
+TRGM_COLUMNS = ("fullname", "title", "location")
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app.services.daily_rate at this revision, so later parser
+# changes do not alter what this migration writes
+AMOUNT_PATTERN = re.compile(r"\d[\d\s\u00a0\u202f.,]*")
+FOREIGN_CURRENCIES = ("$", "£", "CHF", "USD", "GBP")
+
+
+def parse_daily_rate(text):
+    if not text or any(currency in text for currency in FOREIGN_CURRENCIES):
+        return None
+    match = AMOUNT_PATTERN.search(text)
+    if not match:
+        return None
+    amount = re.sub(r"[\s\u00a0\u202f]", "", match.group()).rstrip(".,")
+    amount = re.sub(r"[.,](?=\d{3}(?:\D|$))", "", amount)
+    amount = re.split(r"[.,]", amount)[0]
+    return int(amount) if amount else None
+
+
+def backfill_daily_rate_eur(connection) -> None:
+    """Parse stored rates like new scrapes, one batch of ids at a time."""
+    select_batch = sa.text(
+        "SELECT id, daily_rate FROM malt_profiles"
+        " WHERE daily_rate IS NOT NULL AND id > :after"
+        " ORDER BY id LIMIT :limit"
+    )
+    update_rate = sa.text(
+        "UPDATE malt_profiles SET daily_rate_eur = :rate WHERE id = :id"
+    )
+    after = ""
+    while True:
+        rows = connection.execute(
+            select_batch, {"after": after, "limit": BACKFILL_BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        rates = [
+            {"id": row.id, "rate": rate}
+            for row in rows
+            if (rate := parse_daily_rate(row.daily_rate)) is not None
+        ]
+        if rates:
+            connection.execute(update_rate, rates)
+        after = rows[-1].id
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for column in JSONB_COLUMNS:
+        op.alter_column(
+            "malt_profiles",
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+
+    op.add_column(
+        "malt_profiles", sa.Column("daily_rate_eur", sa.Integer(), nullable=True)
+    )
+    backfill_daily_rate_eur(op.get_bind())
+    op.create_index(
+        op.f("ix_malt_profiles_daily_rate_eur"),
+        "malt_profiles",
+        ["daily_rate_eur"],
+        unique=False,
+    )
+
+    for column in GIN_COLUMNS:
+        op.create_index(
+            f"ix_malt_profiles_{column}_gin",
+            "malt_profiles",
+            [column],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column: "jsonb_path_ops"},
+        )
+    for column in TRGM_COLUMNS:
+        op.create_index(
+            f"ix_malt_profiles_{column}_trgm",
+            "malt_profiles",
+            [column],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for column in TRGM_COLUMNS:
+        op.drop_index(f"ix_malt_profiles_{column}_trgm", table_name="malt_profiles")
+    for column in GIN_COLUMNS:
+        op.drop_index(f"ix_malt_profiles_{column}_gin", table_name="malt_profiles")
+    op.drop_index(op.f("ix_malt_profiles_daily_rate_eur"), table_name="malt_profiles")
+    op.drop_column("malt_profiles", "daily_rate_eur")
+    for column in JSONB_COLUMNS:
+        op.alter_column(
+            "malt_profiles",
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
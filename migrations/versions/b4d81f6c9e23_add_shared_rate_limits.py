@@ -0,0 +1,37 @@
+"""add shared rate limits
+
+Revision ID: b4d81f6c9e23
+Revises: 3f2b9c1d7e4a
+Create Date: 2026-10-18 15:45:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b4d81f6c9e23"
+down_revision = "3f2b9c1d7e4a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limits",
+        sa.Column("host", sa.String(), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("paused_until", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("host"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limits")
@@ -0,0 +1,37 @@
+"""add profile recrawl queued at
+
+Revision ID: c6a2e8f41d07
+Revises: e7b3f91a2c58
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c6a2e8f41d07"
+down_revision = "e7b3f91a2c58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "malt_profiles",
+        sa.Column("recrawl_queued_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_malt_profiles_recrawl_queued_at"),
+        "malt_profiles",
+        ["recrawl_queued_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_malt_profiles_recrawl_queued_at"), table_name="malt_profiles"
+    )
+    op.drop_column("malt_profiles", "recrawl_queued_at")
@@ -0,0 +1,40 @@
+"""add profile recrawl priority
+
+Revision ID: d51a7e3c0b28
+Revises: 8c4e2a7b9d15
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d51a7e3c0b28"
+down_revision = "8c4e2a7b9d15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "malt_profiles",
+        sa.Column("request_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "malt_profiles",
+        sa.Column("content_changed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_malt_profiles_status_last_scraped_at",
+        "malt_profiles",
+        ["status", "last_scraped_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_malt_profiles_status_last_scraped_at", table_name="malt_profiles")
+    op.drop_column("malt_profiles", "content_changed_at")
+    op.drop_column("malt_profiles", "request_count")
@@ -0,0 +1,72 @@
+"""add scrape worker leases
+
+Revision ID: e7b3f91a2c58
+Revises: a93f6d2e4c71
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e7b3f91a2c58"
+down_revision = "a93f6d2e4c71"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("malt_profiles", sa.Column("leased_by", sa.String(), nullable=True))
+    op.add_column(
+        "malt_profiles",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_malt_profiles_lease_expires_at"),
+        "malt_profiles",
+        ["lease_expires_at"],
+        unique=False,
+    )
+    # Claims made before leases are expired, their processes are restarting
+    op.execute(
+        """
+        UPDATE malt_profiles
+        SET lease_expires_at = COALESCE(updated_at, now())
+        WHERE status = 'IN_PROGRESS'
+        """
+    )
+
+    op.create_table(
+        "scrape_workers",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("hostname", sa.String(), nullable=False),
+        sa.Column("pid", sa.Integer(), nullable=False),
+        sa.Column("concurrency", sa.Integer(), nullable=False),
+        sa.Column(
+            "started_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "heartbeat_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("stopped_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("in_flight", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("scraped_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("failed_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("recent_per_minute", sa.Float(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scrape_workers")
+    op.drop_index(op.f("ix_malt_profiles_lease_expires_at"), table_name="malt_profiles")
+    op.drop_column("malt_profiles", "lease_expires_at")
+    op.drop_column("malt_profiles", "leased_by")
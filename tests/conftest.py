@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(base_dir)
+
+# Required settings, no test talks to OpenAI or the database
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("HTTP_TOKEN", "test")
+
+
+async def call_asgi(
+    app, path: str, query: str = "", headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Dict[str, str], bytes, List[dict]]:
+    """Send a GET request to an ASGI app.
+
+    Returns:
+        Tuple[int, Dict[str, str], bytes, List[dict]]: Status, headers, body
+        and the messages sent
+    """
+    received = False
+    messages: List[dict] = []
+
+    async def receive() -> dict:
+        nonlocal received
+        if received:
+            # Like a client keeping the connection open
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    await app(scope, receive, send)
+    start, *bodies = messages
+    response_headers = {
+        name.decode(): value.decode() for name, value in start["headers"]
+    }
+    body = b"".join(message.get("body", b"") for message in bodies)
+    return start["status"], response_headers, body, messages
+
+
+@pytest.fixture
+def call():
+    """Run `call_asgi` to completion."""
+
+    def run(app, path: str, query: str = "", headers: Optional[Dict[str, str]] = None):
+        return asyncio.run(call_asgi(app, path, query, headers))
+
+    return run
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app.api as api
+from app.core.database import get_async_db
+from app.models.malt_profile import MaltProfile, ProfileStatus
+from app.services.profile_service import ProfileService
+
+URL = "https://www.malt.fr/profile/adalovelace"
+
+
+async def no_db():
+    yield None
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Jobs the API queued, no database or scrape involved."""
+    jobs = []
+    api.app.dependency_overrides[get_async_db] = no_db
+    monkeypatch.setattr(
+        api.scrape_queue, "submit", lambda job_id, **options: jobs.append(job_id)
+    )
+    yield jobs
+    api.app.dependency_overrides.pop(get_async_db, None)
+
+
+def lookup_returns(monkeypatch, result):
+    async def lookup_profile(self, url, max_age=None, force=False):
+        return result
+
+    monkeypatch.setattr(ProfileService, "lookup_profile", lookup_profile)
+
+
+def test_failed_scrape_answers_503_until_its_retry(call, monkeypatch, submitted):
+    profile = MaltProfile(
+        id="job-1",
+        profile_id="adalovelace",
+        status=ProfileStatus.ERROR,
+        last_error_kind="blocked",
+        next_retry_at=datetime.now(timezone.utc) + timedelta(seconds=90),
+    )
+    lookup_returns(
+        monkeypatch, {"cache": "miss", "data": None, "job_id": None, "profile": profile}
+    )
+
+    status, headers, body, _ = call(api.app, "/api/profile", f"url={URL}")
+
+    assert status == 503
+    assert 89 <= int(headers["retry-after"]) <= 90
+    assert json.loads(body)["error"] == "blocked"
+    assert submitted == []
+
+
+def test_queued_scrape_returns_its_job(call, monkeypatch, submitted):
+    profile = MaltProfile(
+        id="job-1", profile_id="adalovelace", status=ProfileStatus.TODO
+    )
+    lookup_returns(
+        monkeypatch,
+        {"cache": "miss", "data": None, "job_id": profile.id, "profile": profile},
+    )
+
+    status, headers, body, _ = call(api.app, "/api/profile", f"url={URL}")
+
+    assert status == 202
+    assert headers["cache-control"] == "no-store"
+    assert headers["x-cache"] == "MISS"
+    payload = json.loads(body)
+    assert payload["data"]["job_id"] == "job-1"
+    assert payload["data"]["profile_id"] == "adalovelace"
+    assert payload["data"]["status"] == "todo"
+    assert submitted == ["job-1"]
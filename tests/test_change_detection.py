@@ -0,0 +1,54 @@
+from app.services.change_detection import FIELD_GROUPS, diff_profile, hash_value
+
+
+def test_hash_ignores_key_order():
+    assert hash_value({"a": 1, "b": [1, 2]}) == hash_value({"b": [1, 2], "a": 1})
+
+
+def test_hash_depends_on_values():
+    assert hash_value({"a": 1}) != hash_value({"a": 2})
+    assert hash_value(["x", "y"]) != hash_value(["y", "x"])
+
+
+def test_hash_is_short_hex():
+    value = hash_value("Développeuse Python")
+    assert len(value) == 32
+    int(value, 16)
+
+
+def test_first_scrape_records_every_present_group():
+    data = {"fullname": "Ada", "title": "Dev", "skills": ["Python"]}
+    values, changes = diff_profile(data, None)
+
+    assert [c["field"] for c in changes] == ["identity", "skills"]
+    assert all(c["old_hash"] is None for c in changes)
+    assert values["fullname"] == "Ada" and values["skills"] == ["Python"]
+    assert set(values["field_hashes"]) == {"identity", "skills"}
+    assert values["content_hash"] == hash_value(values["field_hashes"])
+
+
+def test_unchanged_scrape_writes_nothing():
+    data = {"fullname": "Ada", "daily_rate": "450 €"}
+    values, _ = diff_profile(data, None)
+
+    assert diff_profile(data, values["field_hashes"]) == ({}, [])
+
+
+def test_only_changed_groups_are_written():
+    old = {"fullname": "Ada", "daily_rate": "450 €"}
+    hashes = diff_profile(old, None)[0]["field_hashes"]
+
+    values, changes = diff_profile({"fullname": "Ada", "daily_rate": "500 €"}, hashes)
+
+    assert [c["field"] for c in changes] == ["rates"]
+    assert changes[0]["old_hash"] == hashes["rates"]
+    assert "fullname" not in values and values["daily_rate"] == "500 €"
+    assert values["field_hashes"]["identity"] == hashes["identity"]
+
+
+def test_missing_groups_keep_their_hash():
+    hashes = {group: "stored" for group in FIELD_GROUPS}
+    values, changes = diff_profile({"description": "New"}, hashes)
+
+    assert [c["field"] for c in changes] == ["description"]
+    assert values["field_hashes"]["skills"] == "stored"
@@ -0,0 +1,30 @@
+import pytest
+
+from app.services.daily_rate import parse_daily_rate
+
+
+@pytest.mark.parametrize(
+    "text, rate",
+    [
+        ("450 €", 450),
+        ("450€/jour", 450),
+        ("1 200 €", 1200),
+        ("1 200 €", 1200),
+        ("1 200 €/jour", 1200),
+        ("1,200 €", 1200),
+        ("1.200 €", 1200),
+        ("450,50 €", 450),
+        ("450.5 €", 450),
+        ("1 200,00 €", 1200),
+        ("À partir de 600 €", 600),
+    ],
+)
+def test_parses_euro_amounts(text, rate):
+    assert parse_daily_rate(text) == rate
+
+
+@pytest.mark.parametrize(
+    "text", [None, "", "Tarif non communiqué", "$500", "500 CHF", "£400 / day"]
+)
+def test_missing_or_foreign_rates(text):
+    assert parse_daily_rate(text) is None
@@ -0,0 +1,52 @@
+from prometheus_client import REGISTRY
+
+from app.services.extract_malt_info import ExtractMaltInfo
+
+
+class FakeDriver:
+    """Answers the extraction script with a fixed profile."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def execute_script(self, script, *args):
+        return self.data
+
+
+def counted(field: str, presence: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "malt_extract_fields_total", {"field": field, "presence": presence}
+        )
+        or 0
+    )
+
+
+def extract(data):
+    extractor = ExtractMaltInfo(FakeDriver(data), mode="script")
+    extractor._ready = True
+    extractor.extract()
+    return extractor.field_presence
+
+
+def test_empty_values_and_no_missions_are_missing():
+    presence = extract(
+        {"fullname": "Ada", "daily_rate": "", "skills": [], "missions_count": 0}
+    )
+
+    assert presence == {
+        "fullname": True,
+        "daily_rate": False,
+        "skills": False,
+        "missions": False,
+    }
+
+
+def test_presence_is_counted_per_field():
+    before_found = counted("missions", "found")
+    before_missing = counted("description", "missing")
+
+    extract({"fullname": "Ada", "missions_count": 3, "description": None})
+
+    assert counted("missions", "found") == before_found + 1
+    assert counted("description", "missing") == before_missing + 1
@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core import metrics
+from app.core.metrics import span
+
+
+def observed(stage: str, outcome: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "malt_stage_duration_seconds_count", {"stage": stage, "outcome": outcome}
+        )
+        or 0
+    )
+
+
+class FakeSentry:
+    """Records transactions and spans like `sentry_sdk` would start them."""
+
+    def __init__(self):
+        self.started = []
+        self.current = None
+
+    def get_current_span(self):
+        return self.current
+
+    @contextmanager
+    def start_transaction(self, op, name):
+        self.started.append(("transaction", op))
+        self.current = op
+        try:
+            yield
+        finally:
+            self.current = None
+
+    @contextmanager
+    def start_span(self, op):
+        self.started.append(("span", op))
+        yield
+
+
+@pytest.fixture
+def sentry(monkeypatch):
+    fake = FakeSentry()
+    monkeypatch.setattr(metrics, "_sentry", fake)
+    return fake
+
+
+def test_stage_duration_is_observed_by_outcome():
+    before_ok = observed("test_stage", "ok")
+    before_error = observed("test_stage", "error")
+
+    with span("test_stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("test_stage"):
+            raise RuntimeError("failed")
+
+    assert observed("test_stage", "ok") == before_ok + 1
+    assert observed("test_stage", "error") == before_error + 1
+
+
+def test_outermost_span_starts_a_transaction(sentry):
+    with span("scrape"):
+        with span("page_load"):
+            pass
+
+    assert sentry.started == [("transaction", "scrape"), ("span", "page_load")]
+
+
+def test_spans_join_a_running_transaction(sentry):
+    sentry.current = "request"
+    with span("db_write"):
+        pass
+
+    assert sentry.started == [("span", "db_write")]
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import config
+from app.services.profile_cache import (
+    EXPIRED,
+    FRESH,
+    STALE,
+    ProfileCache,
+    RequestCounter,
+    cache_headers,
+    freshness,
+)
+
+
+def profile(age: float, content_hash="abc", status="SCRAPPED"):
+    scraped_at = datetime.now(timezone.utc) - timedelta(seconds=age)
+    return {
+        "profile_id": "ada",
+        "content_hash": content_hash,
+        "last_scraped_at": scraped_at,
+        "status": status,
+    }
+
+
+def test_freshness():
+    now = datetime.now(timezone.utc)
+    assert freshness(now, max_age=60, stale_ttl=60) == FRESH
+    assert freshness(now - timedelta(seconds=90), max_age=60, stale_ttl=60) == STALE
+    assert freshness(now - timedelta(seconds=150), max_age=60, stale_ttl=60) == EXPIRED
+    assert freshness(None) == STALE
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ProfileCache(max_size=2)
+    cache.set("a", "1", {}, None)
+    cache.set("b", "2", {}, None)
+    cache.get("a")
+    cache.set("c", "3", {}, None)
+
+    assert cache.get("b") is None
+    assert cache.get("a")["job_id"] == "1" and cache.get("c")["job_id"] == "3"
+
+
+def test_lru_entries_expire():
+    cache = ProfileCache(ttl=-1)
+    cache.set("a", "1", {}, None)
+
+    assert cache.get("a") is None
+    assert cache.snapshot()["size"] == 0
+
+
+def test_request_counter_is_bounded():
+    counter = RequestCounter(enabled=True, max_size=2)
+    for profile_id in ["a", "b", "c", "a"]:
+        counter.record(profile_id)
+
+    assert counter.drain() == {"a": 2, "b": 1}
+    assert counter.drain() == {}
+
+
+def test_request_counter_disabled_without_recrawl():
+    counter = RequestCounter(enabled=False)
+    counter.record("a")
+    assert counter.drain() == {}
+
+
+def test_hit_may_be_cached_until_stale():
+    headers = cache_headers(profile(age=100), "hit", max_age=3600)
+
+    assert headers["ETag"].startswith('"') and headers["ETag"].endswith('"')
+    max_age = int(headers["Cache-Control"].split("max-age=")[1])
+    assert headers["Cache-Control"].startswith("public, ")
+    assert 3498 <= max_age <= 3500
+
+
+def test_max_age_defaults_to_profile_ttl():
+    headers = cache_headers(profile(age=0), "hit")
+    max_age = int(headers["Cache-Control"].split("max-age=")[1])
+    assert config.PROFILE_TTL - 2 <= max_age <= config.PROFILE_TTL
+
+
+def test_stale_must_be_revalidated():
+    assert cache_headers(profile(age=100), "stale")["Cache-Control"] == "no-cache"
+
+
+def test_etag_follows_content_and_state():
+    data = profile(age=100)
+    etag = cache_headers(data, "hit")["ETag"]
+
+    assert cache_headers(dict(data), "hit")["ETag"] == etag
+    assert cache_headers(data, "stale")["ETag"] != etag
+    assert cache_headers({**data, "content_hash": "def"}, "hit")["ETag"] != etag
+    assert cache_headers({**data, "status": "IN_PROGRESS"}, "hit")["ETag"] != etag
+    rescraped = {**data, "last_scraped_at": datetime.now(timezone.utc)}
+    assert cache_headers(rescraped, "hit")["ETag"] != etag
+
+
+def test_rows_without_content_hash_are_hashed_whole():
+    data = profile(age=100, content_hash=None)
+    etag = cache_headers(data, "hit")["ETag"]
+
+    assert cache_headers({**data, "fullname": "Ada"}, "hit")["ETag"] != etag
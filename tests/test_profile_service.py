@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import config
+from app.models.malt_profile import MaltProfile, ProfileStatus
+from app.services import profile_service
+from app.services.profile_cache import ProfileCache
+from app.services.profile_service import ProfileService
+
+URL = "https://www.malt.fr/profile/adalovelace"
+STALE_AGE = timedelta(seconds=config.PROFILE_TTL + 60)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """A service whose database holds one row, set as `service.row`."""
+    service = ProfileService(None)
+    service.row = None
+    service.statuses = []
+
+    async def get_profile_by_id(profile_id):
+        return service.row
+
+    async def update_profile_status(profile, status):
+        profile.status = status
+        service.statuses.append(status)
+
+    async def enqueue_profile(url, force=False):
+        service.statuses.append("enqueued")
+        return service.row, True
+
+    monkeypatch.setattr(service, "get_profile_by_id", get_profile_by_id)
+    monkeypatch.setattr(service, "update_profile_status", update_profile_status)
+    monkeypatch.setattr(service, "enqueue_profile", enqueue_profile)
+    monkeypatch.setattr(profile_service, "profile_cache", ProfileCache())
+    return service
+
+
+def row(status, age=timedelta(0), **fields):
+    return MaltProfile(
+        id="job-1",
+        profile_id="adalovelace",
+        status=status,
+        last_scraped_at=datetime.now(timezone.utc) - age,
+        attempt_count=0,
+        **fields,
+    )
+
+
+def lookup(service, **options):
+    return asyncio.run(service.lookup_profile(URL, **options))
+
+
+def test_fresh_profile_is_a_hit(service):
+    service.row = row(ProfileStatus.SCRAPPED)
+    result = lookup(service)
+
+    assert result["cache"] == "hit" and result["job_id"] is None
+    assert service.statuses == []
+
+
+def test_stale_profile_is_served_and_refreshed(service):
+    service.row = row(ProfileStatus.SCRAPPED, STALE_AGE)
+    result = lookup(service)
+
+    assert result["cache"] == "stale" and result["job_id"] == "job-1"
+    assert service.statuses == [ProfileStatus.TODO]
+
+
+@pytest.mark.parametrize("age", [timedelta(0), STALE_AGE], ids=["fresh", "stale"])
+def test_removed_profile_is_not_served(service, age):
+    service.row = row(ProfileStatus.NOT_FOUND, age)
+    result = lookup(service)
+
+    assert result == {"cache": "not_found", "data": None, "job_id": None}
+    assert service.statuses == []
+
+
+@pytest.mark.parametrize("age", [timedelta(0), STALE_AGE], ids=["fresh", "stale"])
+def test_failed_profile_waits_for_its_retry(service, age):
+    retry_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    service.row = row(ProfileStatus.ERROR, age, next_retry_at=retry_at)
+    result = lookup(service)
+
+    assert result["cache"] == "miss" and result["job_id"] is None
+    assert service.statuses == []
+
+
+def test_stale_profile_out_of_retries_is_not_refreshed(service):
+    service.row = row(ProfileStatus.ERROR, STALE_AGE, next_retry_at=None)
+    result = lookup(service)
+
+    assert result["cache"] == "stale" and result["job_id"] is None
+    assert service.statuses == []
+
+
+def test_force_scrapes_removed_profiles(service):
+    service.row = row(ProfileStatus.NOT_FOUND)
+    result = lookup(service, force=True)
+
+    assert result["cache"] == "miss" and result["job_id"] == "job-1"
+    assert service.statuses == ["enqueued"]
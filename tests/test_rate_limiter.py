@@ -0,0 +1,103 @@
+import pytest
+
+from app.services import rate_limiter
+from app.services.rate_limiter import AdaptiveConcurrency, RateLimiter, TokenBucket
+
+
+class FakeTime:
+    """Clock that advances only when slept on."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+def test_burst_is_served_without_waiting(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+
+
+def test_waits_one_interval_once_empty(clock):
+    bucket = TokenBucket(rate=2, burst=1)
+    bucket.acquire()
+
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(1001.0)
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+
+    assert [bucket.acquire() for _ in range(2)] == [0, 0]
+    assert bucket.acquire() == pytest.approx(1)
+
+
+def test_partial_refill(clock):
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    clock.now += 0.75
+
+    assert bucket.acquire() == pytest.approx(0.25)
+
+
+def test_pause_holds_tokens(clock):
+    bucket = TokenBucket(rate=1, burst=5)
+    bucket.pause(30)
+
+    assert bucket.acquire() == pytest.approx(30)
+
+
+def test_pause_only_extends(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    bucket.pause(30)
+    bucket.pause(5)
+
+    assert bucket.acquire() == pytest.approx(30)
+
+
+def test_jitter_adds_up_to_a_fraction_of_the_interval(clock):
+    bucket = TokenBucket(rate=1, burst=1, jitter=0.5)
+    bucket.acquire()
+    waits = [bucket.acquire() for _ in range(50)]
+
+    assert len(set(waits)) > 1
+    assert all(1 <= wait <= 1.5 for wait in waits)
+
+
+def test_one_bucket_per_host():
+    limiter = RateLimiter(rate=1, burst=1)
+
+    assert limiter.bucket("https://www.malt.fr/profile/a") is limiter.bucket(
+        "https://malt.fr/profile/b"
+    )
+    assert limiter.bucket("https://www.malt.fr/") is not limiter.bucket(
+        "https://www.malt.de/"
+    )
+
+
+def test_concurrency_starts_at_the_requested_width(clock):
+    concurrency = AdaptiveConcurrency(min_limit=1, max_limit=4, cooldown=0)
+    concurrency.start_at(8)
+    assert concurrency.limit == 8
+
+    concurrency.record("throttled", 1)
+    assert concurrency.limit == 4
+    for _ in range(50):
+        concurrency.record("ok", 1)
+    assert concurrency.limit == 8
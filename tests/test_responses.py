@@ -0,0 +1,124 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import brotli
+import pytest
+
+from app.core.responses import (
+    CompressionMiddleware,
+    FastJSONResponse,
+    _accepted_encoding,
+    etag_matches,
+)
+
+ETAG = '"abc123"'
+BODY = json.dumps({"skills": ["Python"] * 200}).encode()
+
+
+def make_app(body: bytes = BODY, content_type="application/json", chunks=1):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"etag", ETAG.encode()),
+                ],
+            }
+        )
+        size = len(body) // chunks + 1
+        for start in range(0, len(body), size):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": body[start : start + size],
+                    "more_body": start + size < len(body),
+                }
+            )
+
+    return app
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matched",
+    [
+        (None, None),
+        ("", None),
+        (ETAG, ETAG),
+        (f"W/{ETAG}", ETAG),
+        ('"other", "abc123"', ETAG),
+        ('"abc123-br"', '"abc123-br"'),
+        ('"abc123-gzip"', '"abc123-gzip"'),
+        ("*", ETAG),
+        ('"other"', None),
+        ('"abc123-zstd"', None),
+    ],
+)
+def test_etag_matches(if_none_match, matched):
+    assert etag_matches(if_none_match, ETAG) == matched
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("BR;q=0.5", "br"),
+        ("gzip;q=bad", None),
+    ],
+)
+def test_accepted_encoding(accept_encoding, encoding):
+    assert _accepted_encoding(accept_encoding) == encoding
+
+
+def test_brotli_preferred(call):
+    app = CompressionMiddleware(make_app(), minimum_size=100)
+    status, headers, body, _ = call(app, "/", headers={"Accept-Encoding": "gzip, br"})
+
+    assert status == 200
+    assert headers["content-encoding"] == "br"
+    assert headers["etag"] == '"abc123-br"'
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body) < len(BODY)
+    assert brotli.decompress(body) == BODY
+
+
+def test_gzip(call):
+    app = CompressionMiddleware(make_app(), minimum_size=100)
+    _, headers, body, _ = call(app, "/", headers={"Accept-Encoding": "gzip"})
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == '"abc123-gzip"'
+    assert gzip.decompress(body) == BODY
+
+
+@pytest.mark.parametrize(
+    "body, content_type, chunks, accept_encoding",
+    [
+        (BODY, "application/json", 1, ""),
+        (b"{}", "application/json", 1, "br"),
+        (BODY, "image/png", 1, "br"),
+        (BODY, "application/json", 3, "br"),
+    ],
+    ids=["not accepted", "too small", "binary", "streamed"],
+)
+def test_passed_through(call, body, content_type, chunks, accept_encoding):
+    app = CompressionMiddleware(make_app(body, content_type, chunks), minimum_size=100)
+    _, headers, sent, _ = call(app, "/", headers={"Accept-Encoding": accept_encoding})
+
+    assert "content-encoding" not in headers
+    assert headers["etag"] == ETAG
+    assert sent == body
+
+
+def test_fast_json_datetimes_end_in_z():
+    response = FastJSONResponse(
+        {"at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}
+    )
+    assert response.body == b'{"at":"2026-01-02T03:04:05Z"}'
@@ -0,0 +1,81 @@
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from app.core.config import config
+from app.services import retry_policy
+from app.services.rate_limiter import ThrottledError
+from app.services.retry_policy import (
+    BLOCKED,
+    CRASHED,
+    ERROR,
+    NOT_FOUND,
+    TIMEOUT,
+    ProfileNotFound,
+    classify_failure,
+    page_ready_timeout,
+    retry_delay,
+)
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: 1.0)
+
+
+@pytest.mark.parametrize(
+    "error, kind",
+    [
+        (ProfileNotFound("gone"), NOT_FOUND),
+        (ThrottledError("429"), BLOCKED),
+        (TimeoutException("header"), TIMEOUT),
+        (TimeoutError(), TIMEOUT),
+        (WebDriverException("tab crashed"), CRASHED),
+        (RuntimeError("parse"), ERROR),
+    ],
+)
+def test_classify_failure(error, kind):
+    assert classify_failure(error) == kind
+
+
+def test_not_found_is_never_retried():
+    assert retry_delay(NOT_FOUND, 1) is None
+
+
+def test_no_retry_after_max_attempts():
+    assert retry_delay(ERROR, config.RETRY_MAX_ATTEMPTS) is None
+
+
+def test_backoff_doubles_per_attempt(no_jitter):
+    delays = [retry_delay(ERROR, attempt) for attempt in (1, 2, 3)]
+    base = config.RETRY_BASE_DELAY
+    assert delays == [base, base * 2, base * 4]
+
+
+def test_backoff_is_capped(no_jitter, monkeypatch):
+    monkeypatch.setattr(config, "RETRY_MAX_ATTEMPTS", 100)
+    assert retry_delay(ERROR, 50) == config.RETRY_MAX_DELAY
+
+
+def test_crashes_retry_sooner(no_jitter):
+    assert retry_delay(CRASHED, 1) == config.RETRY_BASE_DELAY / 4
+
+
+def test_blocked_waits_for_retry_after(no_jitter):
+    error = ThrottledError("429", retry_after=600)
+    assert retry_delay(BLOCKED, 1, error) == 600
+    assert retry_delay(BLOCKED, 1) == max(
+        config.RETRY_BASE_DELAY, config.THROTTLE_COOLDOWN
+    )
+
+
+def test_jitter_stays_within_twenty_percent():
+    for _ in range(100):
+        delay = retry_delay(ERROR, 1)
+        assert 0.8 * config.RETRY_BASE_DELAY <= delay <= 1.2 * config.RETRY_BASE_DELAY
+
+
+def test_page_ready_timeout_grows_after_timeouts():
+    assert page_ready_timeout(None, 3) == config.PAGE_READY_TIMEOUT
+    assert page_ready_timeout(ERROR, 3) == config.PAGE_READY_TIMEOUT
+    assert page_ready_timeout(TIMEOUT, 1) == config.PAGE_READY_TIMEOUT * 2
+    assert page_ready_timeout(TIMEOUT, 10) == config.PAGE_READY_MAX_TIMEOUT
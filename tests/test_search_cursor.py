@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.search_service import decode_cursor, encode_cursor
+
+PROFILE_ID = "0b6c3f0e-8a4f-4a43-9d56-5a3f1f0c2b1e"
+
+
+def forge(payload) -> str:
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_rate_cursor_round_trip():
+    cursor = encode_cursor("rate_asc", [450, PROFILE_ID])
+    assert "=" not in cursor
+    assert decode_cursor("rate_asc", cursor) == [450, PROFILE_ID]
+
+
+def test_recent_cursor_round_trip():
+    scraped_at = datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor("recent", [scraped_at, PROFILE_ID])
+    assert decode_cursor("recent", cursor) == [scraped_at, PROFILE_ID]
+
+
+def test_cursor_of_another_sort_is_rejected():
+    cursor = encode_cursor("rate_asc", [450, PROFILE_ID])
+    with pytest.raises(ValueError):
+        decode_cursor("rate_desc", cursor)
+
+
+@pytest.mark.parametrize(
+    "sort, cursor",
+    [
+        ("rate_asc", "not base64!"),
+        ("rate_asc", forge([450, PROFILE_ID])),
+        ("rate_asc", forge({"sort": "rate_asc"})),
+        ("rate_asc", forge({"sort": "rate_asc", "after": [450]})),
+        ("rate_asc", forge({"sort": "rate_asc", "after": ["450", PROFILE_ID]})),
+        ("rate_asc", forge({"sort": "rate_asc", "after": [450, {"id": 1}]})),
+        ("rate_asc", forge({"sort": "rate_asc", "after": [450, None]})),
+        ("recent", forge({"sort": "recent", "after": ["yesterday", PROFILE_ID]})),
+        ("recent", forge({"sort": "recent", "after": [None, PROFILE_ID]})),
+        ("unknown", forge({"sort": "unknown", "after": [1]})),
+    ],
+)
+def test_forged_cursors_are_rejected(sort, cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(sort, cursor)